@@ -0,0 +1,82 @@
+"""Поля ресурсов API поверх values().
+
+Каждое поле ответа — путь для values(), поэтому запрошенные через
+`fields=` связи подтягиваются JOIN-ом того же запроса, а незапрошенные не
+читаются вовсе. Словари строятся из строк values() без создания моделей.
+"""
+from django.core.files.storage import default_storage
+
+from .utils import ApiError
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class FieldSet:
+    def __init__(self, fields, required=('id',), converters=None,
+                 computed=()):
+        self.fields = fields
+        self.required = required
+        self.converters = converters or {}
+        # считаются отдельными запросами и только если их попросили
+        self.computed = computed
+
+    def parse(self, value):
+        """Имена полей из параметра fields=, по умолчанию все."""
+        if not value:
+            return [*self.fields, *self.computed]
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names
+                   if name not in self.fields and name not in self.computed]
+        if unknown:
+            raise ApiError(400, f'Неизвестные поля: {", ".join(unknown)}')
+        return names
+
+    def lookups(self, names):
+        """Пути для values(): запрошенные и нужные для курсора."""
+        lookups = [*self.required,
+                   *(self.fields[name] for name in names
+                     if name in self.fields)]
+        return list(dict.fromkeys(lookups))
+
+    def serialize(self, row, names):
+        item = {}
+        for name in names:
+            if name in self.computed:
+                continue
+            value = row[self.fields[name]]
+            convert = self.converters.get(name)
+            item[name] = convert(value) if convert else value
+        return item
+
+
+POSTS = FieldSet({
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comment_count': 'comment_count',
+}, required=('id', 'pub_date'), converters={'image': media_url})
+
+COMMENTS = FieldSet({
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}, required=('id', 'created'))
+
+GROUPS = FieldSet({
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+})
+
+PROFILES = FieldSet({
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+}, computed=('post_count', 'followers', 'following'))
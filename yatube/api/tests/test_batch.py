@@ -0,0 +1,81 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class BatchWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='offline')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(3)]
+        cls.posts = [Post.objects.create(author=author, text='Пост')
+                     for author in cls.authors]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'api:{name}'), json.dumps(data),
+                                content_type='application/json')
+
+    def test_comments_batch(self):
+        comments = [{'post': post.pk, 'text': f'С телефона {number}'}
+                    for number in range(10) for post in self.posts]
+        comments += [{'post': 999, 'text': 'Нет поста'},
+                     {'post': self.posts[0].pk, 'text': ''},
+                     'мусор']
+        # сессия и пользователь, поиск постов, savepoint, вставка,
+        # чтение id, пересчёт, release — сколько бы комментариев ни пришло
+        with self.assertNumQueries(8):
+            response = self.post('comments_batch', {'comments': comments})
+        results = response.json()['results']
+        created = {result['id']: comments[result['index']]['text']
+                   for result in results[:-3]}
+        self.assertEqual(created, dict(Comment.objects.values_list(
+            'pk', 'text'
+        )))
+        self.assertEqual([result['status'] for result in results[-3:]],
+                         ['error'] * 3)
+        self.assertIn('post', results[-3]['errors'])
+        self.assertIn('text', results[-2]['errors'])
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Comment.objects.filter(author=self.user).count(),
+                         30)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].comment_count, 10)
+
+    def test_follows_batch(self):
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        response = self.post('follows_batch', {'operations': [
+            {'op': 'follow', 'author': 'author0'},
+            {'op': 'follow', 'author': 'author1'},
+            {'op': 'unfollow', 'author': 'author1'},
+            {'op': 'unfollow', 'author': 'author2'},
+            {'op': 'follow', 'author': 'offline'},
+            {'op': 'follow', 'author': 'ghost'},
+            {'op': 'poke', 'author': 'author0'},
+        ]})
+        statuses = [result['status'] for result in response.json()['results']]
+        self.assertEqual(statuses, ['ok'] * 4 + ['error'] * 3)
+        self.assertEqual(
+            list(Follow.objects.filter(user=self.user)
+                 .values_list('author__username', flat=True)),
+            ['author0']
+        )
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.post('comments_batch', {}).status_code, 400)
+        too_many = {'comments': [{'post': 1, 'text': 'x'}] * 101}
+        self.assertEqual(self.post('comments_batch', too_many).status_code,
+                         400)
+        self.client.logout()
+        response = self.post('follows_batch', {'operations': []})
+        self.assertEqual(response.status_code, 401)
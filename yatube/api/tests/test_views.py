@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ReadApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author',
+                                              first_name='Анна')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {number}')
+            for number in range(15)
+        ]
+        for number in range(3):
+            Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                                   text=f'Комментарий {number}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_cursor_pages_cover_feed(self):
+        response = self.get('posts', limit=6)
+        ids = [item['id'] for item in response.json()['results']]
+        while response.json()['next_cursor']:
+            response = self.get('posts', limit=6,
+                                cursor=response.json()['next_cursor'])
+            ids += [item['id'] for item in response.json()['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields(self):
+        response = self.get('posts', fields='id,author', limit=1)
+        self.assertEqual(response.json()['results'],
+                         [{'id': self.posts[-1].pk, 'author': 'author'}])
+        response = self.get('posts', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_sparse_fields_skip_joins(self):
+        with self.assertNumQueries(1) as context:
+            self.get('posts', fields='id,text')
+        self.assertNotIn('auth_user', context.captured_queries[0]['sql'])
+
+    def test_detail_comments_and_profile(self):
+        response = self.get('post_detail', self.posts[0].pk)
+        self.assertEqual(response.json()['comment_count'], 3)
+        self.assertEqual(response.json()['group'], 'group')
+        response = self.get('post_comments', self.posts[0].pk,
+                            fields='text,author')
+        self.assertEqual(response.json()['results'][0],
+                         {'text': 'Комментарий 2', 'author': 'reader'})
+        response = self.get('profile', 'author')
+        self.assertEqual(response.json(), {
+            'username': 'author', 'first_name': 'Анна', 'last_name': '',
+            'post_count': 15, 'followers': 1, 'following': 0,
+        })
+        self.assertEqual(self.get('post_detail', 999).status_code, 404)
+
+    def test_groups_and_group_posts(self):
+        response = self.get('groups', fields='slug')
+        self.assertEqual(response.json()['results'], [{'slug': 'group'}])
+        response = self.get('group_posts', 'group', limit=20)
+        self.assertEqual(len(response.json()['results']), 15)
+
+    def test_follow_requires_login(self):
+        self.assertEqual(self.get('follow').status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.get('follow', fields='id')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_etag(self):
+        response = self.get('posts')
+        etag = response['ETag']
+        response = self.client.get(reverse('api:posts'),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый')
+        response = self.client.get(reverse('api:posts'),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_errors_are_json(self):
+        for params in ({'cursor': 'x'}, {'limit': '1000'}):
+            with self.subTest(params=params):
+                response = self.get('posts', **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+        response = self.client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
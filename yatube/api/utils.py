@@ -0,0 +1,85 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def json_response(request, data, status=200):
+    """JSON-ответ с ETag по содержимому; совпавший If-None-Match
+    получает 304 без тела."""
+    body = json.dumps(data, cls=DjangoJSONEncoder,
+                      ensure_ascii=False).encode()
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    if status == 200 and etag in parse_etags(
+            request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, status=status,
+                                content_type='application/json')
+    response['ETag'] = etag
+    # лента подписок и результаты записи зависят от сессии
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def error_response(request, status, message):
+    return json_response(request, {'error': message}, status=status)
+
+
+def api_view(methods=('GET',), login=False):
+    """Ошибки API в JSON вместо HTML-страниц и редиректов."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = error_response(request, 405, 'Метод не разрешён')
+                response['Allow'] = ', '.join(methods)
+                return response
+            if login and not request.user.is_authenticated:
+                return error_response(request, 401, 'Нужна авторизация')
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return error_response(request, error.status, error.message)
+            except Http404:
+                return error_response(request, 404, 'Не найдено')
+        return wrapper
+    return decorator
+
+
+def read_batch(request, key, maximum):
+    """Список операций из JSON-тела запроса."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Тело запроса должно быть JSON')
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ApiError(400, f'Ожидается непустой список {key}')
+    if len(items) > maximum:
+        raise ApiError(400, f'Не больше {maximum} операций за запрос')
+    return items
+
+
+def parse_limit(request, default, maximum):
+    value = request.GET.get('limit')
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом')
+    if not 1 <= limit <= maximum:
+        raise ApiError(400, f'limit от 1 до {maximum}')
+    return limit
@@ -0,0 +1,226 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from core.db.routers import mark_write
+from posts.archive import archived_posts, author_posts, get_post_or_archived
+from posts.backfills import recount_comments
+from posts.cursors import keyset_page
+from posts.forms import CommentForm
+from posts.models import Comment, Follow, Group, Post
+from posts.following import invalidate as invalidate_following
+from posts.recommendations import follows_changed
+from posts.sharding import (feed, locate_posts, next_id, posts_by_authors,
+                            sharding_enabled)
+from .serializers import COMMENTS, GROUPS, POSTS, PROFILES
+from .utils import (ApiError, api_view, json_response, parse_limit,
+                    read_batch)
+
+User = get_user_model()
+
+
+def values(source, lookups):
+    """values() для queryset или каждой части составной ленты."""
+    if hasattr(source, 'querysets'):
+        return source.replace([queryset.values(*lookups)
+                               for queryset in source.querysets])
+    return source.values(*lookups)
+
+
+def page_response(request, source, fieldset, field):
+    names = fieldset.parse(request.GET.get('fields'))
+    limit = parse_limit(request, settings.POSTS_PER_PAGE,
+                        settings.API_MAX_LIMIT)
+    source = values(source, fieldset.lookups(names))
+    try:
+        rows, next_cursor = keyset_page(source, request.GET.get('cursor'),
+                                        limit, field)
+    except ValueError:
+        raise ApiError(400, 'Неверный cursor')
+    return json_response(request, {
+        'results': [fieldset.serialize(row, names) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+def posts_response(request, source):
+    return page_response(request, source, POSTS, 'pub_date')
+
+
+@api_view()
+def posts(request):
+    return posts_response(request, feed(Post.objects.all()))
+
+
+@api_view()
+def post_detail(request, post_id):
+    names = POSTS.parse(request.GET.get('fields'))
+    lookups = POSTS.lookups(names)
+    sources = [Post.objects.using(alias)
+               for alias in settings.POST_SHARDS or ['default']]
+    for queryset in [*sources, archived_posts()]:
+        row = queryset.filter(pk=post_id).values(*lookups).first()
+        if row is not None:
+            return json_response(request, POSTS.serialize(row, names))
+    raise Http404
+
+
+@api_view()
+def post_comments(request, post_id):
+    post = get_post_or_archived(post_id)
+    return page_response(request, post.comments.all(), COMMENTS, 'created')
+
+
+@api_view()
+def groups(request):
+    names = GROUPS.parse(request.GET.get('fields'))
+    rows = Group.objects.order_by('title').values(*GROUPS.lookups(names))
+    return json_response(request, {
+        'results': [GROUPS.serialize(row, names) for row in rows],
+    })
+
+
+@api_view()
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return posts_response(request, feed(Post.objects.filter(group=group)))
+
+
+@api_view()
+def profile(request, username):
+    names = PROFILES.parse(request.GET.get('fields'))
+    row = User.objects.filter(username=username).values(
+        *PROFILES.lookups(names)
+    ).first()
+    if row is None:
+        raise Http404
+    item = PROFILES.serialize(row, names)
+    if 'post_count' in names:
+        author = User(pk=row['id'])
+        item['post_count'] = author_posts(author).count()
+    if 'followers' in names:
+        item['followers'] = Follow.objects.filter(author_id=row['id']).count()
+    if 'following' in names:
+        item['following'] = Follow.objects.filter(user_id=row['id']).count()
+    return json_response(request, item)
+
+
+@api_view()
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return posts_response(request, author_posts(author))
+
+
+@api_view(login=True)
+def follow(request):
+    return posts_response(request, posts_by_authors(
+        request.user.follower.values_list('author_id', flat=True)
+    ))
+
+
+def item_errors(errors):
+    return {field: list(messages) for field, messages in errors.items()}
+
+
+def read_inserted_ids(queryset, objects):
+    """Проставляет id строкам, только что вставленным bulk_create.
+
+    Django 2.2 на SQLite не возвращает id из bulk_create. Транзакция
+    после вставки держит блокировку записи, а AUTOINCREMENT выдаёт id
+    по возрастанию, так что это последние len(objects) id таблицы.
+    """
+    pks = queryset.order_by('-pk').values_list('pk', flat=True)
+    for obj, pk in zip(objects, reversed(pks[:len(objects)])):
+        obj.pk = pk
+
+
+@api_view(methods=('POST',), login=True)
+def comments_batch(request):
+    """Пачка комментариев к разным постам: {"comments": [{"post": id,
+    "text": "..."}]}. Все валидные пишутся одной транзакцией на базу."""
+    items = read_batch(request, 'comments', settings.API_MAX_BATCH)
+    post_ids = {item.get('post') for item in items
+                if isinstance(item, dict) and type(item.get('post')) is int}
+    aliases = locate_posts(post_ids)
+    results, by_alias = [], {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({'index': index, 'status': 'error',
+                            'errors': {'__all__': ['Ожидается объект']}})
+            continue
+        form = CommentForm({'text': item.get('text')})
+        errors = {} if form.is_valid() else item_errors(form.errors)
+        alias = aliases.get(item.get('post'))
+        if alias is None:
+            errors['post'] = ['Пост не найден']
+        if errors:
+            results.append({'index': index, 'status': 'error',
+                            'errors': errors})
+            continue
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = item['post']
+        if sharding_enabled():
+            comment.pk = next_id()
+        by_alias.setdefault(alias, []).append(comment)
+        results.append({'index': index, 'status': 'created',
+                        'comment': comment})
+    for alias, comments in by_alias.items():
+        with transaction.atomic(using=alias):
+            Comment.objects.using(alias).bulk_create(comments)
+            if not sharding_enabled():
+                read_inserted_ids(Comment.objects.using(alias), comments)
+            recount_comments(Post.objects.using(alias).filter(
+                pk__in={comment.post_id for comment in comments}
+            ))
+    if by_alias:
+        mark_write()
+    for result in results:
+        comment = result.pop('comment', None)
+        if comment is not None:
+            result['id'] = comment.pk
+    return json_response(request, {'results': results})
+
+
+@api_view(methods=('POST',), login=True)
+def follows_batch(request):
+    """Пачка подписок: {"operations": [{"op": "follow" | "unfollow",
+    "author": username}]}. Для одного автора побеждает последняя."""
+    items = read_batch(request, 'operations', settings.API_MAX_BATCH)
+    names = {item.get('author') for item in items if isinstance(item, dict)}
+    authors = dict(User.objects.filter(
+        username__in=[name for name in names if isinstance(name, str)]
+    ).values_list('username', 'pk'))
+    results, wanted = [], {}
+    for index, item in enumerate(items):
+        error = None
+        if not isinstance(item, dict):
+            error = 'Ожидается объект'
+        elif item.get('op') not in ('follow', 'unfollow'):
+            error = 'op: follow или unfollow'
+        elif item.get('author') not in authors:
+            error = 'Автор не найден'
+        elif authors[item['author']] == request.user.pk:
+            error = 'Нельзя подписаться на себя'
+        if error:
+            results.append({'index': index, 'status': 'error',
+                            'errors': {'__all__': [error]}})
+            continue
+        wanted[authors[item['author']]] = item['op'] == 'follow'
+        results.append({'index': index, 'status': 'ok'})
+    follow = [pk for pk, value in wanted.items() if value]
+    unfollow = [pk for pk, value in wanted.items() if not value]
+    with transaction.atomic():
+        Follow.objects.bulk_create(
+            [Follow(user=request.user, author_id=pk) for pk in follow],
+            ignore_conflicts=True
+        )
+        Follow.objects.filter(user=request.user,
+                              author_id__in=unfollow).delete()
+        # bulk_create не шлёт сигналов
+        if follow:
+            invalidate_following(request.user.pk)
+            follows_changed(request.user.pk, follow)
+    return json_response(request, {'results': results})
@@ -0,0 +1,27 @@
+from django.contrib import admin
+
+from .models import OutboxMessage, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts',
+                    'run_at', 'worker', 'finished')
+    list_filter = ('status', 'name')
+    readonly_fields = [field.name for field in Task._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'recipients', 'status', 'attempts',
+                    'created', 'sent_at')
+    list_filter = ('status',)
+    exclude = ('payload',)
+    readonly_fields = [field.name for field in OutboxMessage._meta.fields
+                       if field.name != 'payload']
+
+    def has_add_permission(self, request):
+        return False
@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.utils.module_loading import autodiscover_modules
+
+        from . import mail  # noqa: F401
+        from .db.sqlite import configure_connection
+
+        connection_created.connect(configure_connection)
+        autodiscover_modules('backfills', 'tasks')
@@ -0,0 +1,99 @@
+"""Онлайн-заполнение производных данных пачками по диапазонам pk.
+
+Backfill описывает модель и обработку одной пачки; раннер идёт по
+диапазонам (last_pk, last_pk + batch_size], после каждой пачки сохраняет
+BackfillCheckpoint и делает паузу, поэтому прерванный прогон
+продолжается с места остановки, а таблица не блокируется надолго.
+Обработка пачки должна быть идемпотентной: пачку, на которой процесс
+упал, раннер выполнит ещё раз.
+
+Backfills регистрируются декоратором `register` в модулях backfills.py
+приложений, их находит CoreConfig.ready().
+"""
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .models import BackfillCheckpoint
+
+registry = {}
+
+
+def register(cls):
+    registry[cls.name] = cls
+    return cls
+
+
+class Backfill:
+    name = None
+    model = None
+    batch_size = 1000
+    description = ''
+
+    def databases(self):
+        """Базы с таблицей модели: посты и комментарии лежат в шардах."""
+        if self.model._meta.model_name in ('post', 'comment'):
+            return settings.POST_SHARDS or ['default']
+        return ['default']
+
+    def queryset(self, alias):
+        return self.model._base_manager.using(alias)
+
+    def process(self, queryset):
+        """Обрабатывает строки пачки, возвращает число изменённых."""
+        raise NotImplementedError
+
+
+@dataclass
+class Chunk:
+    alias: str
+    start: int
+    end: int
+    rows: int
+    seconds: float
+
+
+def pause_after(seconds, sleep, duty):
+    """Пауза после пачки: не меньше `sleep` и такая, чтобы работа
+    занимала не больше доли `duty` времени."""
+    if duty:
+        sleep = max(sleep, seconds * (1 / duty - 1))
+    return sleep
+
+
+def run(backfill, alias, batch_size=None, sleep=0.0, duty=None,
+        dry_run=False, max_chunks=None):
+    """Гонит backfill по одной базе, отдавая пачки по мере готовности."""
+    batch_size = batch_size or backfill.batch_size
+    checkpoint = BackfillCheckpoint.objects.filter(
+        name=backfill.name, alias=alias
+    ).first() or BackfillCheckpoint(name=backfill.name, alias=alias)
+    top = backfill.queryset(alias).aggregate(top=Max('pk'))['top'] or 0
+    start, done = checkpoint.last_pk, 0
+    while start < top and (max_chunks is None or done < max_chunks):
+        end = start + batch_size
+        started = time.monotonic()
+        chunk = backfill.queryset(alias).filter(pk__gt=start, pk__lte=end)
+        if dry_run:
+            rows = chunk.count()
+        else:
+            with transaction.atomic(using=alias):
+                rows = backfill.process(chunk)
+            checkpoint.last_pk = end
+            checkpoint.rows += rows
+            checkpoint.chunks += 1
+            checkpoint.save()
+        seconds = time.monotonic() - started
+        yield Chunk(alias, start, end, rows, seconds)
+        start, done = end, done + 1
+        time.sleep(pause_after(seconds, sleep, duty))
+    if not dry_run:
+        checkpoint.finished = start >= top
+        checkpoint.save()
+
+
+def reset(backfill):
+    BackfillCheckpoint.objects.filter(name=backfill.name).delete()
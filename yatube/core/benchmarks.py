@@ -0,0 +1,57 @@
+import json
+import os
+import statistics
+from datetime import datetime
+
+from django.conf import settings
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу, `share` от 0 до 1."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed=None):
+    """p50/p95/p99 и среднее в миллисекундах плюс пропускная способность."""
+    summary = {
+        'count': len(latencies),
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+    if elapsed:
+        summary['rps'] = len(latencies) / elapsed
+    return summary
+
+
+def save_results(name, results):
+    """Сохраняет результаты прогона в BENCHMARKS_DIR и возвращает путь."""
+    os.makedirs(settings.BENCHMARKS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(settings.BENCHMARKS_DIR, f'{name}-{stamp}.json')
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(results, output, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def compare_rows(old, new, keys=('p50_ms', 'p95_ms', 'p99_ms')):
+    """Строки сравнения двух прогонов: ключ, метрика, было, стало, %."""
+    rows = []
+    for name in sorted(set(old) & set(new)):
+        for key in keys:
+            before, after = old[name].get(key), new[name].get(key)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append((name, key, before, after, change))
+    return rows
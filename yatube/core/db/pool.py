@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError
+
+
+class PoolTimeout(DatabaseError):
+    """Свободное соединение не появилось за DATABASE_POOL['TIMEOUT']."""
+
+
+class ConnectionPool:
+    """Ограниченный набор тёплых соединений одного алиаса в процессе.
+
+    Соединение выдаётся после проверки живости и пока не превысило
+    максимальный срок жизни. Если все соединения заняты, поток ждёт
+    освобождения не дольше `timeout` секунд.
+    """
+
+    def __init__(self, max_size, max_lifetime, timeout):
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.idle = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+        self.stats = {
+            'checkouts': 0,
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'exhausted': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    def expired(self, born):
+        return time.monotonic() - born > self.max_lifetime
+
+    def acquire(self, connect, is_healthy):
+        """Возвращает (соединение, время создания)."""
+        started = time.monotonic()
+        exhausted = False
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    if not exhausted:
+                        exhausted = True
+                        self.stats['exhausted'] += 1
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise PoolTimeout('Пул соединений исчерпан')
+                    self.condition.wait(remaining)
+                if self.idle:
+                    connection, born = self.idle.pop()
+                else:
+                    connection, born = None, None
+                    self.size += 1
+            if connection is None:
+                break
+            # проверка живости идёт вне блокировки, она ходит в базу
+            if not self.expired(born) and is_healthy(connection):
+                self.checked_out(started, reused=True)
+                return connection, born
+            self.discard(connection)
+        try:
+            connection = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        self.checked_out(started, reused=False)
+        return connection, time.monotonic()
+
+    def checked_out(self, started, reused):
+        waited = time.monotonic() - started
+        with self.condition:
+            self.stats['checkouts'] += 1
+            self.stats['reused' if reused else 'created'] += 1
+            self.stats['wait_total'] += waited
+            self.stats['wait_max'] = max(self.stats['wait_max'], waited)
+
+    def release(self, connection, born, reusable):
+        if not reusable or self.expired(born):
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, born))
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.stats['discarded'] += 1
+            self.condition.notify()
+
+    def snapshot(self):
+        with self.condition:
+            stats = dict(self.stats, size=self.size, idle=len(self.idle))
+        checkouts = stats['checkouts'] or 1
+        stats['wait_avg'] = stats['wait_total'] / checkouts
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def create_pool(**overrides):
+    options = {**settings.DATABASE_POOL, **overrides}
+    return ConnectionPool(
+        max_size=options['MAX_SIZE'],
+        max_lifetime=options['MAX_LIFETIME'],
+        timeout=options['TIMEOUT'],
+    )
+
+
+def get_pool(alias):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = create_pool()
+        return _pools[alias]
+
+
+def reset_pool(alias, **overrides):
+    """Закрывает свободные соединения алиаса и заводит пул заново."""
+    with _pools_lock:
+        old = _pools.get(alias)
+        _pools[alias] = create_pool(**overrides)
+    while old is not None and old.idle:
+        old.discard(old.idle.pop()[0])
+    return _pools[alias]
+
+
+def close_pools():
+    """Закрывает свободные соединения всех алиасов и забывает пулы.
+
+    Нужен перед fork: connections.close_all() лишь возвращает сырые
+    соединения в пул, а делить их между процессами SQLite не умеет.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while pool.idle:
+            pool.discard(pool.idle.pop()[0])
+
+
+def pool_stats():
+    with _pools_lock:
+        return {alias: pool.snapshot() for alias, pool in _pools.items()}
+
+
+def is_healthy(connection):
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+class PooledDatabaseWrapperMixin:
+    """Подмешивается к DatabaseWrapper любого бэкенда.
+
+    Django по-прежнему «открывает» и «закрывает» соединение на каждый
+    запрос, но настоящие соединения берутся из пула и возвращаются в него.
+    """
+
+    # взято ли текущее соединение из пула уже настроенным: Django шлёт
+    # connection_created на каждую выдачу, а PRAGMA и прочая настройка
+    # нужны только новому соединению
+    pool_reused = False
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        created = []
+
+        def connect_new():
+            created.append(True)
+            return connect(conn_params)
+
+        connection, self.pool_born = get_pool(self.alias).acquire(
+            connect_new, is_healthy
+        )
+        self.pool_reused = not created
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # соединение посреди транзакции или после ошибки в пул не вернётся
+        reusable = (
+            not self.in_atomic_block
+            and not self.errors_occurred
+            and self.get_autocommit()
+        )
+        get_pool(self.alias).release(self.connection, self.pool_born,
+                                     reusable)
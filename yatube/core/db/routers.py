@@ -0,0 +1,84 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# состояние текущего запроса: читать ли с реплик и была ли запись
+_state = threading.local()
+
+# сессии читаем только с основной базы, иначе свежий логин
+# может не успеть доехать до реплики
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def mark_write():
+    """Отмечает запись в текущем запросе, если её направил другой роутер."""
+    _state.wrote = True
+
+
+@contextmanager
+def without_pin():
+    """Запись внутри блока не прикрепляет клиента к основной базе.
+
+    Нужен, когда view только выясняет базу для отложенной записи.
+    """
+    wrote = getattr(_state, 'wrote', False)
+    try:
+        yield
+    finally:
+        _state.wrote = wrote
+
+
+class PrimaryReplicaRouter:
+    """Отправляет чтение лент на реплики, а всю запись — на основную базу."""
+
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, 'replica', False)
+                and settings.DATABASE_REPLICAS
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        mark_write()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии основной базы, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Включает чтение с реплик для view из REPLICA_READ_VIEWS.
+
+    После любой записи в ответ ставится кука, и следующие
+    REPLICA_PIN_SECONDS секунд чтение этого клиента идёт с основной базы,
+    чтобы он сразу видел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replica = _state.wrote = False
+        try:
+            response = self.get_response(request)
+            if _state.wrote:
+                response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                    max_age=settings.REPLICA_PIN_SECONDS,
+                                    httponly=True)
+            return response
+        finally:
+            _state.replica = _state.wrote = False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.replica = (
+            request.resolver_match.view_name in settings.REPLICA_READ_VIEWS
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+        )
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from django.conf import settings
+
+_maintenance_lock = threading.Lock()
+_last_maintenance = time.monotonic()
+
+
+def apply_pragmas(cursor, pragmas):
+    """Выставляет PRAGMA на соединении, ключи и значения берутся из словаря."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def run_maintenance(cursor):
+    """Обновляет статистику планировщика и переносит WAL в основной файл."""
+    cursor.execute('PRAGMA optimize')
+    cursor.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+
+def maintenance_due():
+    global _last_maintenance
+    with _maintenance_lock:
+        now = time.monotonic()
+        if now - _last_maintenance < settings.SQLITE_MAINTENANCE_INTERVAL:
+            return False
+        _last_maintenance = now
+        return True
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: настраивает новое SQLite-соединение.
+
+    Соединение из пула уже настроено при создании, PRAGMA на нём не
+    повторяются. Django открывает соединение на каждый запрос, поэтому
+    здесь же раз в SQLITE_MAINTENANCE_INTERVAL секунд процесс запускает
+    обслуживание.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if not getattr(connection, 'pool_reused', False):
+            apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+        if maintenance_due():
+            run_maintenance(cursor)
@@ -0,0 +1,142 @@
+"""Исходящая почта через outbox.
+
+EMAIL_BACKEND = 'core.mail.OutboxBackend' только сохраняет письма
+в OutboxMessage и ставит задачу send_outbox, так что запрос не ждёт
+почтовый сервер. Задача забирает готовые письма пачками и отправляет
+каждую пачку через одно соединение настоящего бэкенда OUTBOX_BACKEND,
+не быстрее OUTBOX_RATE_LIMIT писем в секунду. Неудачное письмо
+повторяется с растущей паузой, после OUTBOX_MAX_ATTEMPTS попыток
+остаётся в статусе failed.
+"""
+import pickle
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from .models import OutboxMessage, Task
+from .tasks import retry_delay, task
+
+
+class OutboxBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            recipients = message.recipients()
+            if not recipients:
+                continue
+            # соединение не сериализуется, у отправителя будет своё
+            connection, message.connection = message.connection, None
+            try:
+                payload = pickle.dumps(message)
+            finally:
+                message.connection = connection
+            rows.append(OutboxMessage(subject=message.subject[:255],
+                                      recipients=', '.join(recipients),
+                                      payload=payload))
+        if rows:
+            OutboxMessage.objects.bulk_create(rows)
+            transaction.on_commit(schedule)
+        return len(rows)
+
+
+def schedule(run_at=None):
+    """Ставит send_outbox, если к этому сроку отправитель ещё не стоит."""
+    run_at = run_at or timezone.now()
+    if not Task.objects.filter(name=send_outbox.task_name,
+                               status=Task.QUEUED,
+                               run_at__lte=run_at).exists():
+        send_outbox.enqueue(run_at=run_at)
+
+
+def claim(limit):
+    now = timezone.now()
+    due = (Q(status=OutboxMessage.QUEUED, send_after__lte=now)
+           | Q(status=OutboxMessage.SENDING, locked_until__lt=now))
+    pks = list(OutboxMessage.objects.filter(due).order_by(
+        'send_after', 'pk'
+    ).values_list('pk', flat=True)[:limit])
+    if not pks:
+        return []
+    sender = uuid.uuid4().hex
+    OutboxMessage.objects.filter(due, pk__in=pks).update(
+        status=OutboxMessage.SENDING, sender=sender,
+        locked_until=now + timedelta(seconds=settings.TASK_LEASE),
+        attempts=F('attempts') + 1,
+    )
+    return list(OutboxMessage.objects.filter(
+        pk__in=pks, sender=sender
+    ).order_by('send_after', 'pk'))
+
+
+def failed(row, error):
+    message = f'{type(error).__name__}: {error}'
+    owned = OutboxMessage.objects.filter(pk=row.pk, sender=row.sender)
+    if row.attempts < settings.OUTBOX_MAX_ATTEMPTS:
+        owned.update(status=OutboxMessage.QUEUED, error=message,
+                     locked_until=None,
+                     send_after=timezone.now() + timedelta(
+                         seconds=retry_delay(row.attempts)
+                     ))
+    else:
+        owned.update(status=OutboxMessage.FAILED, error=message)
+
+
+def send_batch(batch_size=None):
+    """Отправляет одну пачку через одно соединение, возвращает
+    (отправлено, с ошибкой)."""
+    rows = claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not rows:
+        return 0, 0
+    rate = settings.OUTBOX_RATE_LIMIT
+    interval = 1 / rate if rate else 0
+    sent = errors = 0
+    connection = get_connection(settings.OUTBOX_BACKEND)
+    try:
+        connection.open()
+        for row in rows:
+            started = time.monotonic()
+            try:
+                message = pickle.loads(row.payload)
+                message.connection = connection
+                message.send()
+            except Exception as error:
+                failed(row, error)
+                errors += 1
+                # после ошибки SMTP-соединение может быть испорчено
+                connection.close()
+                connection.open()
+            else:
+                OutboxMessage.objects.filter(
+                    pk=row.pk, sender=row.sender
+                ).update(status=OutboxMessage.SENT, sent_at=timezone.now(),
+                         error='')
+                sent += 1
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        connection.close()
+    return sent, errors
+
+
+@task(name='core.send_outbox', priority=5)
+def send_outbox():
+    """Отправляет, пока есть готовые письма, и планирует себя
+    к сроку ближайшего отложенного."""
+    sent = errors = 0
+    while True:
+        batch_sent, batch_errors = send_batch()
+        if not batch_sent and not batch_errors:
+            break
+        sent, errors = sent + batch_sent, errors + batch_errors
+    next_attempt = OutboxMessage.objects.filter(
+        status=OutboxMessage.QUEUED
+    ).aggregate(at=Min('send_after'))['at']
+    if next_attempt is not None:
+        schedule(next_attempt)
+    return sent, errors
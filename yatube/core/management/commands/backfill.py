@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import backfill
+from core.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = ('Заполняет производные данные пачками по диапазонам pk '
+            'с сохранением прогресса; без имени показывает список.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='пауза между пачками, секунд')
+        parser.add_argument('--duty', type=float,
+                            help='доля времени под работу, например 0.5')
+        parser.add_argument('--max-chunks', type=int)
+        parser.add_argument('--restart', action='store_true',
+                            help='сбросить прогресс и начать с начала')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, name, **options):
+        if name is None:
+            self.list()
+            return
+        if name not in backfill.registry:
+            raise CommandError(f'Неизвестный backfill: {name}')
+        if options['duty'] is not None and not 0 < options['duty'] <= 1:
+            raise CommandError('--duty должен быть в (0, 1]')
+        job = backfill.registry[name]()
+        if options['restart'] and not options['dry_run']:
+            backfill.reset(job)
+        total = 0
+        for alias in job.databases():
+            chunks = backfill.run(
+                job, alias,
+                batch_size=options['batch_size'],
+                sleep=options['sleep'],
+                duty=options['duty'],
+                dry_run=options['dry_run'],
+                max_chunks=options['max_chunks'],
+            )
+            for chunk in chunks:
+                total += chunk.rows
+                self.stdout.write(
+                    f'{chunk.alias} ({chunk.start}, {chunk.end}]: '
+                    f'{chunk.rows} строк за {chunk.seconds * 1000:.1f} ms'
+                )
+        verb = 'Будет обработано' if options['dry_run'] else 'Обработано'
+        self.stdout.write(self.style.SUCCESS(f'{verb} строк: {total}'))
+
+    def list(self):
+        checkpoints = {}
+        for checkpoint in BackfillCheckpoint.objects.all():
+            checkpoints.setdefault(checkpoint.name, []).append(checkpoint)
+        for name, job in sorted(backfill.registry.items()):
+            self.stdout.write(f'{name}: {job.description}')
+            for checkpoint in checkpoints.get(name, []):
+                state = 'готов' if checkpoint.finished else 'в процессе'
+                self.stdout.write(
+                    f'  {checkpoint.alias}: pk до {checkpoint.last_pk}, '
+                    f'строк {checkpoint.rows}, {state}'
+                )
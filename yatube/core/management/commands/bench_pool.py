@@ -0,0 +1,108 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from core.benchmarks import save_results, summarize
+from core.db.pool import reset_pool
+from core.db.backends.sqlite3.base import DatabaseWrapper as PooledWrapper
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+'''
+READ = 'SELECT id, text FROM post ORDER BY pub_date DESC LIMIT 10'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает задержку «запроса» (открыть соединение, прочитать '
+            'ленту, закрыть) с пулом соединений и без него.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500,
+                            help='запросов на поток')
+        parser.add_argument('--queries', type=int, default=3,
+                            help='SQL-запросов на один запрос')
+        parser.add_argument('--pool-size', type=int,
+                            default=settings.DATABASE_POOL['MAX_SIZE'])
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            self.prepare(path)
+            for mode, wrapper in (('plain', DatabaseWrapper),
+                                  ('pooled', PooledWrapper)):
+                alias = f'bench_{mode}'
+                bench_pool = reset_pool(alias, MAX_SIZE=options['pool_size'])
+                results[mode] = self.run(wrapper, alias, path, options)
+                if mode == 'pooled':
+                    results[mode]['pool'] = bench_pool.snapshot()
+                reset_pool(alias)
+                row = results[mode]
+                self.stdout.write(
+                    f'{mode:<7} {row["rps"]:9.1f} запр/с  '
+                    f'p50 {row["p50_ms"]:.2f} ms  p95 {row["p95_ms"]:.2f} ms'
+                )
+        stats = results['pooled']['pool']
+        self.stdout.write(
+            f'пул: соединений {stats["created"]}, '
+            f'переиспользовано {stats["reused"]}, '
+            f'исчерпан {stats["exhausted"]} раз, '
+            f'ожидание max {stats["wait_max"] * 1000:.2f} ms'
+        )
+        path = save_results('pool', results)
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {path}'))
+
+    def prepare(self, path):
+        wrapper = DatabaseWrapper({**settings.DATABASES['default'],
+                                   'NAME': path}, 'bench_prepare')
+        with wrapper.cursor() as cursor:
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    cursor.execute(statement)
+            now = time.time()
+            cursor.executemany(
+                'INSERT INTO post (text, pub_date) VALUES (%s, %s)',
+                [('текст поста ' * 10, now - number)
+                 for number in range(1000)]
+            )
+        wrapper.close()
+
+    def run(self, wrapper_class, alias, path, options):
+        settings_dict = {**settings.DATABASES['default'], 'NAME': path}
+        latencies = []
+        lock = threading.Lock()
+
+        def worker():
+            # как и в Django, у каждого потока своя обёртка соединения
+            wrapper = wrapper_class(settings_dict, alias)
+            local = []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                with wrapper.cursor() as cursor:
+                    for _ in range(options['queries']):
+                        cursor.execute(READ)
+                        cursor.fetchall()
+                wrapper.close()
+                local.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=worker)
+                   for _ in range(options['threads'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(latencies, time.monotonic() - started)
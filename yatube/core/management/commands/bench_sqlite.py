@@ -0,0 +1,121 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import save_results, summarize
+from core.db.sqlite import apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    author_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+'''
+READ = 'SELECT id, author_id, text FROM post ORDER BY pub_date DESC LIMIT 10'
+WRITE = 'INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)'
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite при смешанной '
+            'нагрузке с настройками по умолчанию и с SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--timeout', type=float, default=0.1,
+                            help='таймаут блокировки в режиме по умолчанию')
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode, pragmas in (('default', {}),
+                              ('tuned', settings.SQLITE_PRAGMAS)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                results[mode] = self.run(path, pragmas, options)
+            row = results[mode]
+            self.stdout.write(
+                f'{mode:<8} чтений {row["reads_per_sec"]:9.1f}/с  '
+                f'записей {row["writes_per_sec"]:8.1f}/с  '
+                f'блокировок {row["locked"]:5d}  '
+                f'p99 чтения {row["read"]["p99_ms"]:.2f} ms'
+            )
+        path = save_results('sqlite', results)
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {path}'))
+
+    def connect(self, path, pragmas, timeout):
+        connection = sqlite3.connect(path, timeout=timeout,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        apply_pragmas(connection, pragmas)
+        return connection
+
+    def prepare(self, path, pragmas, rows):
+        connection = self.connect(path, pragmas, 5)
+        connection.executescript(SCHEMA)
+        now = time.time()
+        connection.execute('BEGIN')
+        connection.executemany(WRITE, (
+            (number % 100, 'текст поста ' * 10, now - number)
+            for number in range(rows)
+        ))
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run(self, path, pragmas, options):
+        timeout = (pragmas.get('busy_timeout', 0) / 1000
+                   or options['timeout'])
+        deadline = time.monotonic() + options['duration']
+        latencies = {'read': [], 'write': []}
+        locked = []
+        lock = threading.Lock()
+
+        def worker(kind):
+            connection = self.connect(path, pragmas, timeout)
+            rng = random.Random()
+            local, errors = [], 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == 'read':
+                        connection.execute(READ).fetchall()
+                    else:
+                        connection.execute(WRITE, (rng.randrange(100),
+                                                   'новый пост', time.time()))
+                except sqlite3.OperationalError:
+                    errors += 1
+                    continue
+                local.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                latencies[kind].extend(local)
+                locked.append(errors)
+
+        threads = [threading.Thread(target=worker, args=('read',))
+                   for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('write',))
+                    for _ in range(options['writers'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        return {
+            'read': summarize(latencies['read'], elapsed),
+            'write': summarize(latencies['write'], elapsed),
+            'reads_per_sec': len(latencies['read']) / elapsed,
+            'writes_per_sec': len(latencies['write']) / elapsed,
+            'locked': sum(locked),
+        }
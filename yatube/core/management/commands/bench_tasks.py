@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import save_results
+from core.models import Task
+from core.tasks import Worker, noop
+
+
+class Command(BaseCommand):
+    help = ('Меряет пропускную способность очереди задач: постановку '
+            'и выполнение пустых задач при разном числе потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--threads', type=int, nargs='+',
+                            default=[1, 4, 8])
+
+    def handle(self, *args, **options):
+        results = {}
+        for threads in options['threads']:
+            started = time.monotonic()
+            for number in range(options['tasks']):
+                noop.delay(number)
+            enqueued = time.monotonic() - started
+            worker = Worker(threads=threads, poll_interval=0.01,
+                            name=f'bench-{threads}')
+            started = time.monotonic()
+            stats = worker.run(burst=True)
+            elapsed = time.monotonic() - started
+            Task.objects.filter(name=noop.task_name).delete()
+            results[f'threads={threads}'] = row = {
+                'tasks': options['tasks'],
+                'done': stats['done'],
+                'enqueue_per_sec': options['tasks'] / enqueued,
+                'run_per_sec': stats['done'] / elapsed,
+            }
+            self.stdout.write(
+                f'{threads:>3} потоков: постановка '
+                f'{row["enqueue_per_sec"]:8.1f}/с, выполнение '
+                f'{row["run_per_sec"]:8.1f}/с'
+            )
+        path = save_results('tasks', results)
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {path}'))
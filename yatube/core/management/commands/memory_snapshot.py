@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import memory
+
+
+class Command(BaseCommand):
+    help = ('Снимки tracemalloc: список, самые большие строки, сравнение. '
+            'Снимки снимаются в работающем воркере на странице '
+            '/admin/memory/, а не в процессе этой команды.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['list', 'top', 'diff'])
+        parser.add_argument('names', nargs='*',
+                            help='снимок для top, два снимка для diff')
+        parser.add_argument('--group-by', default='lineno',
+                            choices=['lineno', 'filename', 'traceback'])
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, action, names, group_by, limit, **options):
+        if action == 'list':
+            for name in memory.list_snapshots():
+                self.stdout.write(name)
+            return
+        expected = 1 if action == 'top' else 2
+        if len(names) != expected:
+            raise CommandError(f'{action} ожидает снимков: {expected}')
+        try:
+            if action == 'top':
+                stats = memory.top_stats(names[0], group_by, limit)
+            else:
+                stats = memory.diff_snapshots(*names, group_by, limit)
+        except FileNotFoundError as error:
+            raise CommandError(f'Снимок не найден: {error}')
+        for stat in stats:
+            self.stdout.write(
+                f'{stat["location"]}: {stat["size"] / 1024:.1f} KiB '
+                f'({stat["size_diff"]:+d} B, {stat["count"]} блоков)'
+            )
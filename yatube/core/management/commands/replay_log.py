@@ -0,0 +1,55 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import save_results
+from core.replay import Replayer, read_log
+
+
+def account(value):
+    username, sep, password = value.partition(':')
+    if not sep:
+        raise ValueError(value)
+    return username, password
+
+
+class Command(BaseCommand):
+    help = ('Проигрывает журнал доступа против запущенного экземпляра '
+            'и считает задержки и ошибки по именам адресов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('logfile')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='ускорение относительно журнала, 0 — '
+                                 'без пауз')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--account', type=account, action='append',
+                            default=[], help='логин:пароль, можно несколько')
+        parser.add_argument('--views', nargs='*',
+                            help='проигрывать только эти имена адресов')
+        parser.add_argument('--limit', type=int)
+        parser.add_argument('--name', default='replay',
+                            help='префикс файла с результатами')
+
+    def handle(self, *args, **options):
+        try:
+            source = open(options['logfile'], encoding='utf-8',
+                          errors='replace')
+        except OSError as error:
+            raise CommandError(error)
+        replayer = Replayer(options['base_url'], options['account'],
+                            options['workers'], options['speed'])
+        with source:
+            entries = islice(read_log(source, options['views']),
+                             options['limit'])
+            report = replayer.run(entries)
+        for view_name, row in report.items():
+            self.stdout.write(
+                f'{view_name:<24} {row["count"]:6d} req  '
+                f'p50 {row["p50_ms"]:7.2f} ms  p95 {row["p95_ms"]:7.2f} ms  '
+                f'p99 {row["p99_ms"]:7.2f} ms  '
+                f'ошибок {row["error_rate"]:.1%}'
+            )
+        path = save_results(options['name'], {'views': report})
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {path}'))
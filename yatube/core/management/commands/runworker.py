@@ -0,0 +1,65 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.db.pool import close_pools
+from core.tasks import Worker, fail_abandoned, purge
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из таблицы Task: пул потоков '
+            'в каждом из --processes процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='потоков на процесс')
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--burst', action='store_true',
+                            help='выйти, когда готовые задачи кончатся')
+        parser.add_argument('--max-tasks', type=int,
+                            help='выйти после стольких задач на процесс')
+
+    def handle(self, *args, **options):
+        removed = purge()
+        if removed:
+            self.stdout.write(f'Удалено старых задач: {removed}')
+        failed = fail_abandoned()
+        if failed:
+            self.stdout.write(f'Брошенных задач без попыток: {failed}')
+        if options['processes'] <= 1:
+            stats = self.work(options)
+            self.stdout.write(f'Выполнено {stats["done"]}, '
+                              f'с ошибкой {stats["failed"]}')
+            return
+        # дочерние процессы не должны делить сокеты и файлы соединений;
+        # close_all() только возвращает их в пул, закрывает close_pools()
+        connections.close_all()
+        close_pools()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=self.work, args=(options,))
+                    for _ in range(options['processes'])]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+                child.join()
+
+    def work(self, options):
+        worker = Worker(threads=options['threads'])
+
+        def stop(signum, frame):
+            # текущие задачи доработают, новые браться не будут
+            worker.stop.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f'Воркер {worker.name}: '
+                          f'{options["threads"]} потоков')
+        return worker.run(burst=options['burst'],
+                          max_tasks=options['max_tasks'])
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.mail import send_outbox
+
+
+class Command(BaseCommand):
+    help = ('Отправляет накопившиеся в outbox письма без воркера, '
+            'например из cron или при локальной проверке.')
+
+    def handle(self, *args, **options):
+        sent, errors = send_outbox()
+        self.stdout.write(f'Отправлено {sent}, с ошибкой {errors}')
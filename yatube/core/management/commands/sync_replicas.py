@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную SQLite-базу в файлы реплик — локальная '
+            'замена настоящей репликации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='повторять копирование раз в N секунд')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены '
+                               '(YATUBE_SQLITE_REPLICAS).')
+        while True:
+            self.sync()
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self):
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                started = time.monotonic()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                # backup делает согласованный снимок даже во время записи
+                source.backup(target)
+                target.close()
+                self.stdout.write(
+                    f'{alias}: {(time.monotonic() - started) * 1000:.0f} ms'
+                )
+        finally:
+            source.close()
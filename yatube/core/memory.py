@@ -0,0 +1,175 @@
+import os
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+SNAPSHOT_SUFFIX = '.snapshot'
+
+# кадры самого профилировщика и импорта только шумят в статистике
+NOISE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def ensure_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+
+
+def start_tracing():
+    """Включает трассировку при старте воркера, если MEMORY_TRACE_ON_START.
+
+    Вызывается из wsgi.py: выделения, сделанные до старта трассировки,
+    в снимки не попадают, поэтому включать её по первому снимку поздно.
+    """
+    if settings.MEMORY_TRACE_ON_START:
+        ensure_tracing()
+    return tracemalloc.is_tracing()
+
+
+def stop_tracing():
+    """Выключает трассировку и освобождает её память.
+
+    Учёту запросов (MEMORY_PROFILE_REQUESTS) трассировка нужна всегда,
+    при нём она не выключается.
+    """
+    if settings.MEMORY_PROFILE_REQUESTS:
+        return False
+    tracemalloc.stop()
+    return True
+
+
+def take_snapshot():
+    """Снимает снимок памяти процесса и сохраняет его на диск."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError('Трассировка памяти в этом процессе не включена')
+    snapshot = tracemalloc.take_snapshot().filter_traces(NOISE_FILTERS)
+    directory = settings.MEMORY_SNAPSHOTS_DIR
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    name = f'{stamp}-{os.getpid()}{SNAPSHOT_SUFFIX}'
+    snapshot.dump(os.path.join(directory, name))
+    return name
+
+
+def list_snapshots():
+    directory = settings.MEMORY_SNAPSHOTS_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        (name for name in os.listdir(directory)
+         if name.endswith(SNAPSHOT_SUFFIX)),
+        reverse=True
+    )
+
+
+def snapshot_path(name):
+    """Путь к снимку по имени файла или None, если имя подозрительное."""
+    if os.path.basename(name) != name or not name.endswith(SNAPSHOT_SUFFIX):
+        return None
+    path = os.path.join(settings.MEMORY_SNAPSHOTS_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def load_snapshot(name):
+    path = snapshot_path(name)
+    if path is None:
+        raise FileNotFoundError(name)
+    return tracemalloc.Snapshot.load(path)
+
+
+def stat_row(stat):
+    frame = stat.traceback[0]
+    return {
+        'location': f'{frame.filename}:{frame.lineno}',
+        'size': stat.size,
+        'count': stat.count,
+        'size_diff': getattr(stat, 'size_diff', 0),
+        'count_diff': getattr(stat, 'count_diff', 0),
+    }
+
+
+def top_stats(name, group_by='lineno', limit=20):
+    stats = load_snapshot(name).statistics(group_by)
+    return [stat_row(stat) for stat in stats[:limit]]
+
+
+def diff_snapshots(old, new, group_by='lineno', limit=20):
+    """Строки, где память выросла или упала сильнее всего между снимками."""
+    stats = load_snapshot(new).compare_to(load_snapshot(old), group_by)
+    return [stat_row(stat) for stat in stats[:limit]]
+
+
+# имя view -> накопленная статистика выделений по запросам
+request_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record_request(view_name, delta, peak, lines):
+    with _stats_lock:
+        stats = request_stats.setdefault(view_name, {
+            'requests': 0, 'delta': 0, 'peak': 0, 'lines': Counter(),
+        })
+        stats['requests'] += 1
+        stats['delta'] += delta
+        stats['peak'] = max(stats['peak'], peak)
+        stats['lines'].update(lines)
+
+
+def request_report(limit=10):
+    """Сводка по view: средний прирост, пик и самые жадные строки."""
+    with _stats_lock:
+        return sorted((
+            {
+                'view': view_name,
+                'requests': stats['requests'],
+                'avg_delta': stats['delta'] // stats['requests'],
+                'peak': stats['peak'],
+                'lines': stats['lines'].most_common(limit),
+            }
+            for view_name, stats in request_stats.items()
+        ), key=lambda row: row['avg_delta'], reverse=True)
+
+
+class RequestMemoryMiddleware:
+    """Записывает прирост и пик памяти каждого view по строкам кода.
+
+    Снимок до и после запроса стоит дорого, поэтому режим включается
+    только настройкой MEMORY_PROFILE_REQUESTS. Пик считается по всему
+    процессу и в многопоточном сервере включает соседние запросы.
+    """
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_PROFILE_REQUESTS:
+            raise MiddlewareNotUsed
+        ensure_tracing()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        before = tracemalloc.take_snapshot().filter_traces(NOISE_FILTERS)
+        current, _ = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        response = view_func(request, *view_args, **view_kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        after_current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(NOISE_FILTERS)
+        lines = Counter()
+        for stat in after.compare_to(before, 'lineno'):
+            if stat.size_diff:
+                frame = stat.traceback[0]
+                lines[f'{frame.filename}:{frame.lineno}'] += stat.size_diff
+        record_request(request.resolver_match.view_name,
+                       after_current - current, peak - current, lines)
+        return response
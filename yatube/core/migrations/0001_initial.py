@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Backfill')),
+                ('alias', models.CharField(default='default', max_length=50, verbose_name='База')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='Последний обработанный pk')),
+                ('rows', models.BigIntegerField(default=0, verbose_name='Обработано строк')),
+                ('chunks', models.IntegerField(default=0, verbose_name='Пачек')),
+                ('finished', models.BooleanField(default=False, verbose_name='Завершён')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлён')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка backfill',
+                'verbose_name_plural': 'Контрольные точки backfill',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='backfillcheckpoint',
+            constraint=models.UniqueConstraint(fields=('name', 'alias'), name='unique_backfill_alias'),
+        ),
+    ]
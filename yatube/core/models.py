@@ -0,0 +1,101 @@
+from django.db import models
+from django.utils import timezone
+
+
+class BackfillCheckpoint(models.Model):
+    """Докуда дошёл backfill в одной базе."""
+    name = models.CharField('Backfill', max_length=100)
+    alias = models.CharField('База', max_length=50, default='default')
+    last_pk = models.BigIntegerField('Последний обработанный pk', default=0)
+    rows = models.BigIntegerField('Обработано строк', default=0)
+    chunks = models.IntegerField('Пачек', default=0)
+    finished = models.BooleanField('Завершён', default=False)
+    updated = models.DateTimeField('Обновлён', auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'alias'],
+                                    name='unique_backfill_alias')
+        ]
+        verbose_name = 'Контрольная точка backfill'
+        verbose_name_plural = 'Контрольные точки backfill'
+
+    def __str__(self):
+        return f'{self.name}@{self.alias}: {self.last_pk}'
+
+
+class Task(models.Model):
+    """Отложенный вызов зарегистрированной функции, см. core.tasks."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'готово'),
+        (FAILED, 'ошибка'),
+    ]
+    name = models.CharField('Задача', max_length=200)
+    params = models.TextField('Аргументы', default='{}')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    run_at = models.DateTimeField('Не раньше', default=timezone.now)
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Попыток максимум',
+                                                    default=5)
+    key = models.CharField('Ключ идемпотентности', max_length=200,
+                           unique=True, null=True, blank=True)
+    worker = models.CharField('Воркер', max_length=100, blank=True)
+    locked_until = models.DateTimeField('Занята до', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_ready_idx'),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class OutboxMessage(models.Model):
+    """Письмо, которое ещё предстоит отправить, см. core.mail."""
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'в очереди'),
+        (SENDING, 'отправляется'),
+        (SENT, 'отправлено'),
+        (FAILED, 'ошибка'),
+    ]
+    subject = models.CharField('Тема', max_length=255)
+    recipients = models.TextField('Получатели')
+    payload = models.BinaryField('Письмо')
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    send_after = models.DateTimeField('Не раньше', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    sender = models.CharField('Отправитель', max_length=100, blank=True)
+    locked_until = models.DateTimeField('Занято до', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after'],
+                         name='outbox_ready_idx'),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.utils.functional import cached_property
+
+
+def estimated_rows(model, using):
+    """Число строк таблицы из статистики планировщика, без COUNT(*).
+
+    SQLite кладёт его в sqlite_stat1 после ANALYZE или PRAGMA optimize,
+    PostgreSQL — в pg_class.reltuples. Нет статистики — None.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    try:
+        # savepoint, чтобы ошибка не сломала внешнюю транзакцию
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    # в sqlite_stat1 строка на каждый индекс, первое число в stat —
+    # строк в индексе
+    counts = [int(str(row[0]).split()[0]) for row in rows if row[0]]
+    return max(counts) if counts else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор для огромных таблиц.
+
+    Без фильтров берёт оценку из статистики, если она больше
+    ADMIN_COUNT_LIMIT. С фильтрами считает не дальше ADMIN_COUNT_LIMIT
+    строк, страницы за этим пределом недоступны.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimated_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
@@ -0,0 +1,249 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PROFILE_SUFFIX = '.folded'
+
+
+def frame_label(frame):
+    """Подпись кадра стека для свёрнутого формата (collapsed stacks)."""
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(settings.BASE_DIR):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    else:
+        filename = os.path.join(*filename.split(os.sep)[-2:])
+    label = f'{code.co_name} ({filename}:{code.co_firstlineno})'
+    return label.replace(';', ':')
+
+
+def collapse_stack(frame, root=None):
+    """Разворачивает стек от корня к листу и склеивает через `;`."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    if root:
+        labels.append(root)
+    return ';'.join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """Фоновый поток, который периодически снимает стеки других потоков.
+
+    `targets` возвращает словарь {id потока: корневая метка стека},
+    снятые стеки копятся в `stacks` как счётчик свёрнутых строк.
+    """
+
+    def __init__(self, targets, interval):
+        super().__init__(daemon=True, name='stack-sampler')
+        self.targets = targets
+        self.interval = interval
+        self.stacks = Counter()
+        self.lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def sample(self):
+        frames = sys._current_frames()
+        with self.lock:
+            for thread_id, root in list(self.targets().items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[collapse_stack(frame, root)] += 1
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def drain(self):
+        """Забирает накопленные стеки и обнуляет счётчик."""
+        with self.lock:
+            stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+
+def write_collapsed(path, stacks):
+    with open(path, 'w', encoding='utf-8') as output:
+        for stack, count in sorted(stacks.items()):
+            output.write(f'{stack} {count}\n')
+
+
+def rotate(directory, keep):
+    """Оставляет в каталоге только `keep` самых свежих профилей."""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.endswith(PROFILE_SUFFIX)
+    )
+    stale = names[:-keep] if keep else []
+    for name in stale:
+        os.remove(os.path.join(directory, name))
+
+
+def save_profile(view_name, stacks):
+    directory = settings.PROFILES_DIR
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    name = f'{stamp}__{view_name.replace(":", "-")}{PROFILE_SUFFIX}'
+    write_collapsed(os.path.join(directory, name), stacks)
+    rotate(directory, settings.PROFILES_KEEP)
+    return name
+
+
+def list_profiles():
+    """Сохранённые профили, сгруппированные по имени view, свежие первыми."""
+    directory = settings.PROFILES_DIR
+    if not os.path.isdir(directory):
+        return {}
+    profiles = {}
+    for name in sorted(os.listdir(directory), reverse=True):
+        if '__' not in name or not name.endswith(PROFILE_SUFFIX):
+            continue
+        stamp, view_name = name[:-len(PROFILE_SUFFIX)].split('__', 1)
+        profiles.setdefault(view_name, []).append({
+            'name': name,
+            'created': datetime.strptime(stamp, '%Y%m%d-%H%M%S-%f'),
+            'size': os.path.getsize(os.path.join(directory, name)),
+        })
+    return profiles
+
+
+def profile_path(name):
+    """Путь к профилю по имени файла или None, если имя подозрительное."""
+    if os.path.basename(name) != name or not name.endswith(PROFILE_SUFFIX):
+        return None
+    path = os.path.join(settings.PROFILES_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def wants_profile(request):
+    if (settings.PROFILING_PARAM not in request.GET
+            and settings.PROFILING_HEADER not in request.META):
+        return False
+    return request.user.is_staff
+
+
+class ProfilingMiddleware:
+    """Профилирует view по запросу сотрудника (?profile или X-Profile).
+
+    Для обычных запросов стоит две проверки словаря, семплер
+    запускается только когда профиль действительно запрошен.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not wants_profile(request):
+            return None
+        thread_id = threading.get_ident()
+        sampler = StackSampler(lambda: {thread_id: None},
+                               settings.PROFILING_INTERVAL)
+        started = time.monotonic()
+        sampler.start()
+        try:
+            response = view_func(request, *view_args, **view_kwargs)
+            if callable(getattr(response, 'render', None)):
+                response = response.render()
+        finally:
+            sampler.stop()
+        name = save_profile(request.resolver_match.view_name, sampler.stacks)
+        response['X-Profile'] = name
+        response['X-Profile-Duration'] = (
+            f'{(time.monotonic() - started) * 1000:.1f}ms'
+        )
+        return response
+
+
+# id потока -> имя view, которое он сейчас обрабатывает
+_active_views = {}
+_sampler = None
+
+
+class ContinuousSampler(StackSampler):
+    """Постоянный семплер потоков-обработчиков запросов.
+
+    Интервал подстраивается так, чтобы съём стеков занимал не больше
+    доли `overhead` процессорного времени. Накопленные стеки раз
+    в `flush_interval` секунд сбрасываются в файл с ротацией.
+    """
+
+    def __init__(self, interval, overhead, flush_interval, directory, keep):
+        super().__init__(_active_views.copy, interval)
+        self.base_interval = interval
+        self.overhead = overhead
+        self.flush_interval = flush_interval
+        self.directory = directory
+        self.keep = keep
+
+    def run(self):
+        flushed = time.monotonic()
+        while not self._stopped.wait(self.interval):
+            started = time.monotonic()
+            self.sample()
+            cost = time.monotonic() - started
+            self.interval = max(self.base_interval, cost / self.overhead)
+            if started - flushed >= self.flush_interval:
+                self.flush()
+                flushed = started
+
+    def flush(self):
+        stacks = self.drain()
+        if not stacks:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        name = f'{stamp}__sampler-{os.getpid()}{PROFILE_SUFFIX}'
+        write_collapsed(os.path.join(self.directory, name), stacks)
+        rotate(self.directory, self.keep)
+        return name
+
+
+def start_sampler():
+    """Запускает постоянный семплер, если он включён в настройках."""
+    global _sampler
+    if not settings.SAMPLER_ENABLED or _sampler is not None:
+        return _sampler
+    _sampler = ContinuousSampler(
+        interval=settings.SAMPLER_INTERVAL,
+        overhead=settings.SAMPLER_OVERHEAD,
+        flush_interval=settings.SAMPLER_FLUSH_INTERVAL,
+        directory=settings.SAMPLER_DIR,
+        keep=settings.SAMPLER_KEEP,
+    )
+    _sampler.start()
+    atexit.register(_sampler.flush)
+    return _sampler
+
+
+class SamplingMiddleware:
+    """Отмечает, какое view обрабатывает текущий поток, для семплера."""
+
+    def __init__(self, get_response):
+        if not settings.SAMPLER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            _active_views.pop(threading.get_ident(), None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _active_views[threading.get_ident()] = (
+            request.resolver_match.view_name
+        )
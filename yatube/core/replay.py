@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from django.conf import settings
+from django.urls import Resolver404, resolve, reverse
+
+from .benchmarks import summarize
+
+# common и combined форматы nginx/apache
+LOG_LINE = re.compile(
+    r'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) '
+)
+LOG_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+LogEntry = namedtuple('LogEntry', 'time method path status view_name')
+
+
+def parse_line(line):
+    """Разбирает строку журнала доступа, None для нераспознанных строк."""
+    match = LOG_LINE.match(line)
+    if match is None:
+        return None
+    path = match.group('path')
+    try:
+        view_name = resolve(urlsplit(path).path).view_name
+    except Resolver404:
+        view_name = None
+    return LogEntry(
+        time=datetime.strptime(match.group('time'), LOG_TIME_FORMAT),
+        method=match.group('method'),
+        path=path,
+        status=int(match.group('status')),
+        view_name=view_name,
+    )
+
+
+def read_log(lines, views=None):
+    """Записи журнала, которые соответствуют адресам проекта."""
+    for line in lines:
+        entry = parse_line(line)
+        if entry is None or entry.view_name is None:
+            continue
+        if views and entry.view_name not in views:
+            continue
+        yield entry
+
+
+class Replayer:
+    """Проигрывает записи журнала против запущенного экземпляра сайта.
+
+    Каждый поток пула держит две сессии: анонимную и залогиненную под
+    одним из `accounts` — её используют адреса из LOGIN_REQUIRED_VIEWS.
+    """
+
+    def __init__(self, base_url, accounts, workers, speed):
+        self.base_url = base_url
+        self.accounts = accounts
+        self.workers = workers
+        self.speed = speed
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.logins = 0
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.client_errors = defaultdict(int)
+
+    def session(self, authenticated):
+        if not hasattr(self.local, 'sessions'):
+            self.local.sessions = {False: requests.Session()}
+        if authenticated and True not in self.local.sessions:
+            self.local.sessions[True] = self.login()
+        return self.local.sessions[authenticated]
+
+    def login(self):
+        with self.lock:
+            username, password = self.accounts[
+                self.logins % len(self.accounts)
+            ]
+            self.logins += 1
+        session = requests.Session()
+        url = urljoin(self.base_url, reverse(settings.LOGIN_URL))
+        session.get(url)
+        session.post(url, data={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''),
+        }, headers={'Referer': url}, allow_redirects=False)
+        return session
+
+    def send(self, entry):
+        authenticated = entry.view_name in settings.LOGIN_REQUIRED_VIEWS
+        url = urljoin(self.base_url, entry.path)
+        started = time.perf_counter()
+        try:
+            session = self.session(authenticated and bool(self.accounts))
+            if entry.method == 'POST':
+                # тела запросов в журнале нет, шлём минимальную форму
+                response = session.post(url, data={
+                    'csrfmiddlewaretoken': session.cookies.get(
+                        'csrftoken', ''),
+                    'text': 'Повтор запроса из журнала',
+                }, headers={'Referer': url}, allow_redirects=False)
+            else:
+                response = session.request(entry.method, url,
+                                           allow_redirects=False)
+        except requests.RequestException:
+            status = None
+        else:
+            status = response.status_code
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies[entry.view_name].append(elapsed)
+            if status is None or status >= 500:
+                self.errors[entry.view_name] += 1
+            elif status >= 400:
+                self.client_errors[entry.view_name] += 1
+
+    def run(self, entries):
+        """Отправляет записи с исходными интервалами, делёнными на speed."""
+        started = time.monotonic()
+        first = None
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for entry in entries:
+                first = first or entry.time
+                if self.speed:
+                    offset = (entry.time - first).total_seconds()
+                    delay = offset / self.speed - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                pool.submit(self.send, entry)
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed):
+        report = {}
+        for view_name, latencies in sorted(self.latencies.items()):
+            row = summarize(latencies, elapsed)
+            row['errors'] = self.errors[view_name]
+            row['client_errors'] = self.client_errors[view_name]
+            row['error_rate'] = row['errors'] / len(latencies)
+            report[view_name] = row
+        return report
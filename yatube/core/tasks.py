@@ -0,0 +1,262 @@
+"""Очередь фоновых задач в таблице Task, без внешнего брокера.
+
+Задача — функция, зарегистрированная декоратором `task` в модуле
+tasks.py приложения (их находит CoreConfig.ready()). Аргументы
+сериализуются в JSON, поэтому передавать нужно id, а не объекты:
+
+    @task(priority=5)
+    def make_thumbnails(post_id):
+        ...
+
+    make_thumbnails.delay(post.pk)
+    make_thumbnails.enqueue(args=[post.pk], delay=60, key=f'thumbs:{pk}')
+
+Воркер (команда runworker) забирает готовые задачи по приоритету,
+помечая их своим именем и арендой до `locked_until`. Пока воркер жив,
+он продлевает аренду; задачу упавшего воркера после окончания аренды
+заберёт другой, поэтому задачи должны быть идемпотентными. Ошибка
+ведёт к повтору с экспоненциальной паузой, после max_attempts попыток
+задача остаётся в статусе failed.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=None):
+    """Регистрирует функцию как задачу и добавляет ей delay и enqueue."""
+    def decorate(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = func
+
+        def enqueue_task(args=(), kwargs=None, **options):
+            options.setdefault('priority', priority)
+            options.setdefault('max_attempts', max_attempts)
+            return enqueue(task_name, args, kwargs, **options)
+
+        func.task_name = task_name
+        func.enqueue = enqueue_task
+        func.delay = lambda *args, **kwargs: enqueue_task(args, kwargs)
+        return func
+
+    return decorate(func) if func is not None else decorate
+
+
+def enqueue(name, args=(), kwargs=None, *, priority=0, delay=None,
+            run_at=None, key=None, max_attempts=None):
+    """Ставит задачу в очередь; с тем же `key` вернёт уже поставленную."""
+    if name not in registry:
+        raise KeyError(f'Неизвестная задача: {name}')
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    fields = {
+        'name': name,
+        'params': json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        'priority': priority,
+        'run_at': run_at,
+        'max_attempts': max_attempts or settings.TASK_MAX_ATTEMPTS,
+        'key': key,
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    existing = Task.objects.filter(key=key).first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            return Task.objects.create(**fields)
+    except IntegrityError:
+        # ту же задачу одновременно поставил другой процесс
+        return Task.objects.get(key=key)
+
+
+def retry_delay(attempt):
+    """Пауза перед повтором: растёт вдвое, со случайным разбросом."""
+    delay = min(settings.TASK_RETRY_MAX_DELAY,
+                settings.TASK_RETRY_DELAY * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def abandoned(now):
+    """Задачи с истёкшей арендой: их воркер упал или завис."""
+    return Q(status=Task.RUNNING, locked_until__lt=now)
+
+
+def ready(now):
+    """Задачи, которые пора выполнить, и брошенные с запасом попыток.
+
+    Брошенная задача могла сама уронить воркер (память, segfault),
+    поэтому без лимита попыток её забирали бы снова и снова.
+    """
+    return (Q(status=Task.QUEUED, run_at__lte=now)
+            | abandoned(now) & Q(attempts__lt=F('max_attempts')))
+
+
+def fail_abandoned():
+    """Брошенные задачи без оставшихся попыток помечает упавшими."""
+    now = timezone.now()
+    return Task.objects.filter(
+        abandoned(now), attempts__gte=F('max_attempts')
+    ).update(status=Task.FAILED, finished=now,
+             error='Аренда истекла: воркер упал на последней попытке')
+
+
+def claim(worker, limit):
+    """Забирает до `limit` задач; гонку воркеров решает условие UPDATE."""
+    now = timezone.now()
+    candidates = list(Task.objects.filter(ready(now)).order_by(
+        '-priority', 'run_at', 'pk'
+    ).values_list('pk', flat=True)[:limit])
+    if not candidates:
+        return []
+    Task.objects.filter(ready(now), pk__in=candidates).update(
+        status=Task.RUNNING, worker=worker,
+        locked_until=now + timedelta(seconds=settings.TASK_LEASE),
+        attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(pk__in=candidates, worker=worker,
+                                    status=Task.RUNNING).order_by(
+        '-priority', 'run_at', 'pk'
+    ))
+
+
+def execute(task):
+    """Выполняет задачу в текущем потоке и записывает результат."""
+    close_old_connections()
+    started = time.monotonic()
+    try:
+        params = json.loads(task.params)
+        registry[task.name](*params['args'], **params['kwargs'])
+    except Exception as error:
+        logger.exception('Задача %s упала', task)
+        finish_failed(task, error)
+        return False
+    finally:
+        logger.debug('Задача %s: %.3f с', task, time.monotonic() - started)
+    Task.objects.filter(pk=task.pk, worker=task.worker).update(
+        status=Task.DONE, finished=timezone.now(), error=''
+    )
+    close_old_connections()
+    return True
+
+
+def finish_failed(task, error):
+    message = f'{type(error).__name__}: {error}'
+    owned = Task.objects.filter(pk=task.pk, worker=task.worker)
+    if task.name in registry and task.attempts < task.max_attempts:
+        owned.update(status=Task.QUEUED, error=message, locked_until=None,
+                     run_at=timezone.now() + timedelta(
+                         seconds=retry_delay(task.attempts)
+                     ))
+    else:
+        owned.update(status=Task.FAILED, error=message,
+                     finished=timezone.now())
+    close_old_connections()
+
+
+def purge(days=None):
+    """Удаляет выполненные задачи старше TASK_KEEP_DAYS дней."""
+    days = settings.TASK_KEEP_DAYS if days is None else days
+    return Task.objects.filter(
+        status=Task.DONE, finished__lt=timezone.now() - timedelta(days=days)
+    ).delete()[0]
+
+
+class Worker:
+    """Главный поток забирает задачи пачками, пул потоков их выполняет.
+
+    Забранные, но ещё не начатые задачи лежат в локальной очереди под
+    арендой воркера; при остановке они возвращаются в общую очередь.
+    """
+
+    def __init__(self, threads=1, poll_interval=None, batch_size=None,
+                 name=None):
+        self.threads = threads
+        self.poll_interval = (settings.TASK_POLL_INTERVAL
+                              if poll_interval is None else poll_interval)
+        self.batch_size = max(threads, batch_size or settings.TASK_BATCH_SIZE)
+        self.name = name or (f'{socket.gethostname()}-{os.getpid()}-'
+                             f'{uuid.uuid4().hex[:8]}')
+        self.stop = threading.Event()
+        self.stats = {'done': 0, 'failed': 0}
+        self.last_heartbeat = time.monotonic()
+
+    def heartbeat(self):
+        """Продлевает аренду задач, которые этот воркер ещё держит,
+        и закрывает брошенные другими без оставшихся попыток."""
+        if time.monotonic() - self.last_heartbeat < settings.TASK_LEASE / 3:
+            return
+        self.last_heartbeat = time.monotonic()
+        Task.objects.filter(worker=self.name, status=Task.RUNNING).update(
+            locked_until=timezone.now() + timedelta(
+                seconds=settings.TASK_LEASE
+            )
+        )
+        fail_abandoned()
+
+    def release(self, backlog):
+        Task.objects.filter(
+            pk__in=[task.pk for task in backlog], worker=self.name,
+            status=Task.RUNNING
+        ).update(status=Task.QUEUED, attempts=F('attempts') - 1,
+                 locked_until=None, worker='')
+
+    def collect(self, futures):
+        for future in futures:
+            self.stats['done' if future.result() else 'failed'] += 1
+
+    def run(self, burst=False, max_tasks=None):
+        """Работает до stop, а с `burst` — пока в очереди есть готовые."""
+        backlog = deque()
+        running = set()
+        taken = 0
+        with ThreadPoolExecutor(self.threads,
+                                thread_name_prefix='task') as pool:
+            while not self.stop.is_set():
+                limit = self.batch_size
+                if max_tasks is not None:
+                    limit = min(limit, max_tasks - taken)
+                if not backlog and limit > 0:
+                    backlog.extend(claim(self.name, limit))
+                    taken += len(backlog)
+                while backlog and len(running) < self.threads:
+                    running.add(pool.submit(execute, backlog.popleft()))
+                if not running:
+                    if burst or (max_tasks is not None
+                                 and taken >= max_tasks):
+                        break
+                    time.sleep(self.poll_interval)
+                else:
+                    done, running = wait(running, timeout=self.poll_interval,
+                                         return_when=FIRST_COMPLETED)
+                    self.collect(done)
+                self.heartbeat()
+            self.release(backlog)
+            done, _ = wait(running)
+            self.collect(done)
+        close_old_connections()
+        return self.stats
+
+
+@task(name='core.noop')
+def noop(*args, **kwargs):
+    """Пустая задача для bench_tasks."""
@@ -0,0 +1,47 @@
+"""Помощники для тестов нескольких баз."""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+
+from .db.pool import reset_pool
+
+
+class ExtraDatabasesMixin:
+    """Заводит на время класса дополнительные файловые SQLite-базы.
+
+    Тестовый раннер создаёт базы только для алиасов, которые были
+    в DATABASES при запуске, а шарды и реплики по умолчанию выключены.
+    Алиасы из `extra_databases` добавляются в connections и мигрируются
+    до setUpClass; их нужно перечислить и в `databases`.
+    """
+    extra_databases = ()
+
+    @classmethod
+    def setUpClass(cls):
+        cls.extra_databases_dir = tempfile.mkdtemp()
+        for alias in cls.extra_databases:
+            connections.databases[alias] = {
+                'ENGINE': settings.DATABASE_ENGINE,
+                'NAME': os.path.join(cls.extra_databases_dir,
+                                     f'{alias}.sqlite3'),
+            }
+            connections.ensure_defaults(alias)
+            connections.prepare_test_settings(alias)
+            call_command('migrate', database=alias, verbosity=0,
+                         interactive=False)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in cls.extra_databases:
+            connections[alias].close()
+            reset_pool(alias)
+            if hasattr(connections._connections, alias):
+                delattr(connections._connections, alias)
+            del connections.databases[alias]
+        shutil.rmtree(cls.extra_databases_dir, ignore_errors=True)
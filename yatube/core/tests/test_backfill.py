@@ -0,0 +1,73 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models.functions import Upper
+from django.test import SimpleTestCase, TestCase
+
+from posts.models import Post
+from .. import backfill
+from ..models import BackfillCheckpoint
+
+User = get_user_model()
+
+
+class UpperText(backfill.Backfill):
+    name = 'upper_text'
+    model = Post
+
+    def process(self, queryset):
+        return queryset.update(text=Upper('text'))
+
+
+@mock.patch.dict(backfill.registry, {'upper_text': UpperText})
+class BackfillCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'post {number}') for number in range(5)
+        )
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command('backfill', 'upper_text', '--batch-size', '2', *args,
+                     stdout=out)
+        return out.getvalue()
+
+    def upper_count(self):
+        texts = Post.objects.values_list('text', flat=True)
+        return sum(text.startswith('POST') for text in texts)
+
+    def test_dry_run_changes_nothing(self):
+        self.backfill('--dry-run')
+        self.assertEqual(self.upper_count(), 0)
+        self.assertFalse(BackfillCheckpoint.objects.exists())
+
+    def test_resumes_from_checkpoint(self):
+        self.backfill('--max-chunks', '1')
+        checkpoint = BackfillCheckpoint.objects.get(name='upper_text')
+        self.assertFalse(checkpoint.finished)
+        self.assertEqual(checkpoint.rows, 2)
+        output = self.backfill()
+        self.assertNotIn(f'(0, {checkpoint.last_pk}]', output)
+        checkpoint.refresh_from_db()
+        self.assertTrue(checkpoint.finished)
+        self.assertEqual(checkpoint.rows, 5)
+        self.assertEqual(self.upper_count(), 5)
+
+    def test_restart_and_listing(self):
+        self.backfill()
+        self.backfill('--restart')
+        self.assertEqual(BackfillCheckpoint.objects.get().rows, 5)
+        out = StringIO()
+        call_command('backfill', stdout=out)
+        self.assertIn('upper_text', out.getvalue())
+
+
+class ThrottleTests(SimpleTestCase):
+    def test_pause_after(self):
+        self.assertEqual(backfill.pause_after(0.2, 0.0, None), 0.0)
+        self.assertAlmostEqual(backfill.pause_after(0.2, 0.0, 0.5), 0.2)
+        self.assertEqual(backfill.pause_after(0.2, 1.0, 0.5), 1.0)
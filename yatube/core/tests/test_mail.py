@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..mail import send_outbox
+from ..models import OutboxMessage, Task
+from ..tasks import Worker
+
+User = get_user_model()
+
+OUTBOX = {
+    'EMAIL_BACKEND': 'core.mail.OutboxBackend',
+    'OUTBOX_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+    'OUTBOX_RATE_LIMIT': 0,
+}
+
+
+class FlakyBackend(EmailBackend):
+    """Не отправляет первые `failures` писем."""
+    opened = 0
+    failures = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('сервер недоступен')
+        return super().send_messages(messages)
+
+
+@override_settings(**OUTBOX)
+class OutboxTests(TestCase):
+    def test_messages_wait_in_outbox(self):
+        sent = mail.send_mail('Тема', 'Текст', 'from@yatube.ru',
+                              ['a@yatube.ru', 'b@yatube.ru'])
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox, [])
+        row = OutboxMessage.objects.get()
+        self.assertEqual(row.recipients, 'a@yatube.ru, b@yatube.ru')
+        self.assertEqual(send_outbox(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['a@yatube.ru', 'b@yatube.ru'])
+        row.refresh_from_db()
+        self.assertEqual(row.status, OutboxMessage.SENT)
+
+    @override_settings(OUTBOX_BACKEND='core.tests.test_mail.FlakyBackend')
+    def test_failed_message_is_retried_later(self):
+        FlakyBackend.opened, FlakyBackend.failures = 0, 1
+        for number in range(3):
+            mail.send_mail(f'Письмо {number}', 'Текст', None, ['a@yatube.ru'])
+        self.assertEqual(send_outbox(), (2, 1))
+        failed = OutboxMessage.objects.get(status=OutboxMessage.QUEUED)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('сервер недоступен', failed.error)
+        # после ошибки соединение открывается заново, а повтор отложен
+        self.assertEqual(FlakyBackend.opened, 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertTrue(Task.objects.filter(name='core.send_outbox',
+                                            run_at__gt=failed.created)
+                        .exists())
+
+
+@override_settings(**OUTBOX, TASK_POLL_INTERVAL=0.01)
+class PasswordResetTests(TransactionTestCase):
+    def test_reset_mail_sent_by_worker(self):
+        User.objects.create_user(username='forgetful', password='secret',
+                                 email='forgetful@yatube.ru')
+        response = self.client.post(reverse('users:password_reset_form'),
+                                    {'email': 'forgetful@yatube.ru'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Task.objects.get().name, 'core.send_outbox')
+        Worker().run(burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['forgetful@yatube.ru'])
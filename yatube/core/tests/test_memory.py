@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+import tracemalloc
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import memory
+
+TEMP_SNAPSHOTS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+INDEX = reverse('posts:index')
+MEMORY = reverse('core:memory_overview')
+DIFF = reverse('core:memory_diff')
+
+
+@override_settings(MEMORY_SNAPSHOTS_DIR=TEMP_SNAPSHOTS_DIR)
+class MemoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        tracemalloc.stop()
+        shutil.rmtree(TEMP_SNAPSHOTS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(MemoryTests.staff)
+
+    def test_take_and_diff_snapshots(self):
+        """Сотрудник снимает два снимка, сравнивает и скачивает их."""
+        self.staff_client.post(MEMORY, {'action': 'start'})
+        for _ in range(2):
+            response = self.staff_client.post(MEMORY, {'action': 'snapshot'})
+            self.assertRedirects(response, MEMORY)
+        new, old = memory.list_snapshots()[:2]
+        response = self.staff_client.get(DIFF, {'old': old, 'new': new})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('stats', response.context)
+        response = self.staff_client.get(
+            reverse('core:memory_download', args=[new])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        out = StringIO()
+        call_command('memory_snapshot', 'diff', old, new, stdout=out)
+        self.assertIn('KiB', out.getvalue())
+
+    def test_tracing_start_and_stop(self):
+        """Снимок без трассировки не снимается, а выключенная трассировка
+        не остаётся на воркере."""
+        tracemalloc.stop()
+        response = self.staff_client.post(MEMORY, {'action': 'snapshot'})
+        self.assertContains(response, 'не включена')
+        self.staff_client.post(MEMORY, {'action': 'start'})
+        self.assertTrue(tracemalloc.is_tracing())
+        self.staff_client.post(MEMORY, {'action': 'stop'})
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_tracing_on_start_setting(self):
+        tracemalloc.stop()
+        self.assertFalse(memory.start_tracing())
+        with override_settings(MEMORY_TRACE_ON_START=True):
+            self.assertTrue(memory.start_tracing())
+        tracemalloc.stop()
+
+    def test_unknown_snapshot(self):
+        response = self.staff_client.get(DIFF, {'old': 'x', 'new': 'y'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_pages_staff_only(self):
+        response = self.client.get(MEMORY)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    @override_settings(MEMORY_PROFILE_REQUESTS=True)
+    def test_request_mode_records_views(self):
+        """В режиме учёта запросов копится статистика по view."""
+        Client().get(INDEX)
+        cache.clear()
+        views = [row['view'] for row in memory.request_report()]
+        self.assertIn('posts:index', views)
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+
+from ..paginator import EstimatedCountPaginator, estimated_rows
+
+User = get_user_model()
+
+
+@override_settings(ADMIN_COUNT_LIMIT=3)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {number}') for number in range(5)
+        )
+
+    def test_filtered_count_is_capped(self):
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(text__startswith='Пост'), 2
+        )
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_unfiltered_count_uses_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_rows(Post, 'default'), 5)
+        with self.assertNumQueries(3):
+            # savepoint, чтение статистики, release
+            count = EstimatedCountPaginator(Post.objects.all(), 2).count
+        self.assertEqual(count, 5)
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..db.backends.sqlite3.base import DatabaseWrapper
+from ..db.pool import (ConnectionPool, PoolTimeout, close_pools, is_healthy,
+                       reset_pool)
+
+User = get_user_model()
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def connect(self):
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    def test_reuses_released_connection(self):
+        pool = ConnectionPool(max_size=2, max_lifetime=60, timeout=1)
+        connection, born = pool.acquire(self.connect, is_healthy)
+        pool.release(connection, born, reusable=True)
+        again, _ = pool.acquire(self.connect, is_healthy)
+        self.assertIs(again, connection)
+        stats = pool.snapshot()
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+
+    def test_unhealthy_and_expired_are_replaced(self):
+        pool = ConnectionPool(max_size=1, max_lifetime=60, timeout=1)
+        connection, born = pool.acquire(self.connect, is_healthy)
+        pool.release(connection, born, reusable=True)
+        connection.close()
+        fresh, born = pool.acquire(self.connect, is_healthy)
+        self.assertIsNot(fresh, connection)
+        pool.release(fresh, born - 120, reusable=True)
+        self.assertEqual(pool.snapshot()['size'], 0)
+        self.assertEqual(pool.snapshot()['discarded'], 2)
+
+    def test_exhausted_pool_waits_then_times_out(self):
+        pool = ConnectionPool(max_size=1, max_lifetime=60, timeout=0.05)
+        connection, born = pool.acquire(self.connect, is_healthy)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect, is_healthy)
+        timer = threading.Timer(
+            0.01, pool.release, (connection, born), {'reusable': True}
+        )
+        pool.timeout = 1
+        timer.start()
+        again, _ = pool.acquire(self.connect, is_healthy)
+        timer.join()
+        self.assertIs(again, connection)
+        self.assertEqual(pool.snapshot()['exhausted'], 2)
+
+
+class PooledWrapperTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        path = os.path.join(directory, 'pool.sqlite3')
+        self.addCleanup(os.remove, path)
+        self.settings_dict = {
+            'ENGINE': 'core.db.backends.sqlite3', 'NAME': path,
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0, 'OPTIONS': {}, 'TIME_ZONE': None,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+        }
+        self.pool = reset_pool('pool_test')
+        self.addCleanup(reset_pool, 'pool_test')
+
+    def test_close_returns_connection_to_pool(self):
+        wrapper = DatabaseWrapper(self.settings_dict, 'pool_test')
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertEqual(self.pool.snapshot()['idle'], 1)
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw)
+        wrapper.close()
+
+    def test_pragmas_applied_once_per_raw_connection(self):
+        """Соединение из пула не настраивается заново при каждой выдаче."""
+        wrapper = DatabaseWrapper(self.settings_dict, 'pool_test')
+        with patch('core.db.sqlite.apply_pragmas') as apply_pragmas:
+            for _ in range(3):
+                wrapper.ensure_connection()
+                wrapper.close()
+        self.assertEqual(apply_pragmas.call_count, 1)
+        self.assertEqual(self.pool.snapshot()['reused'], 2)
+
+    def test_close_pools_closes_idle_connections(self):
+        """Перед fork в пулах не остаётся соединений родителя."""
+        wrapper = DatabaseWrapper(self.settings_dict, 'pool_test')
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        with patch.dict('core.db.pool._pools', {'pool_test': self.pool},
+                        clear=True):
+            close_pools()
+            wrapper.ensure_connection()
+            self.assertIsNot(wrapper.connection, raw)
+            wrapper.close()
+            close_pools()
+        self.assertEqual(self.pool.snapshot()['idle'], 0)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            raw.execute('SELECT 1')
+
+    def test_connection_in_transaction_is_discarded(self):
+        wrapper = DatabaseWrapper(self.settings_dict, 'pool_test')
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False)
+        wrapper.close()
+        stats = self.pool.snapshot()
+        self.assertEqual((stats['idle'], stats['size']), (0, 0))
+
+
+class PoolOverviewTests(TestCase):
+    def test_staff_only(self):
+        url = reverse('core:pool_overview')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url)['Content-Type'],
+                         'application/json')
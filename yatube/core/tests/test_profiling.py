@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import threading
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..profiling import ContinuousSampler, _active_views, list_profiles
+
+TEMP_PROFILES_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+INDEX = reverse('posts:index')
+PROFILES = reverse('core:profile_list')
+
+
+@override_settings(PROFILES_DIR=TEMP_PROFILES_DIR)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_PROFILES_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILES_DIR, ignore_errors=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(ProfilingTests.staff)
+        self.user_client = Client()
+        self.user_client.force_login(ProfilingTests.user)
+
+    def tearDown(self):
+        # главная кэширует ленту, не оставляем пустую страницу другим тестам
+        cache.clear()
+
+    def test_staff_gets_profile(self):
+        """Сотрудник с ?profile получает сохранённый профиль."""
+        response = self.staff_client.get(INDEX, {'profile': ''})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        name = response['X-Profile']
+        self.assertTrue(
+            os.path.isfile(os.path.join(TEMP_PROFILES_DIR, name))
+        )
+        self.assertIn('posts-index', list_profiles())
+
+    def test_header_triggers_profile(self):
+        response = self.staff_client.get(INDEX, HTTP_X_PROFILE='1')
+        self.assertTrue(response.has_header('X-Profile'))
+
+    def test_regular_requests_not_profiled(self):
+        """Обычные запросы и запросы не-сотрудников не профилируются."""
+        for client, data in ((self.staff_client, {}),
+                             (self.user_client, {'profile': ''})):
+            with self.subTest(data=data):
+                response = client.get(INDEX, data)
+                self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(list_profiles(), {})
+
+    def test_profile_pages_staff_only(self):
+        name = self.staff_client.get(INDEX, {'profile': ''})['X-Profile']
+        download = reverse('core:profile_download', args=[name])
+        response = self.staff_client.get(PROFILES)
+        self.assertContains(response, download)
+        response = self.staff_client.get(download)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        for url in (PROFILES, download):
+            with self.subTest(url=url):
+                response = self.user_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_download_unknown_profile(self):
+        url = reverse('core:profile_download', args=['missing.folded'])
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class ContinuousSamplerTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.sampler = ContinuousSampler(
+            interval=0.01, overhead=0.01, flush_interval=60,
+            directory=self.directory, keep=2,
+        )
+
+    def test_samples_request_threads_by_view(self):
+        """Стеки потоков-обработчиков группируются по имени view."""
+        release = threading.Event()
+        worker = threading.Thread(target=release.wait)
+        worker.start()
+        _active_views[worker.ident] = 'posts:index'
+        try:
+            self.sampler.sample()
+        finally:
+            _active_views.pop(worker.ident)
+            release.set()
+            worker.join()
+        stacks = list(self.sampler.stacks)
+        self.assertEqual(len(stacks), 1)
+        self.assertTrue(stacks[0].startswith('posts:index;'))
+
+    def test_flush_rotates_files(self):
+        for _ in range(3):
+            self.sampler.stacks['posts:index;view'] += 1
+            self.sampler.flush()
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertIsNone(self.sampler.flush())
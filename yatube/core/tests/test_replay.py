@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from posts.models import Post
+from ..replay import Replayer, parse_line, read_log
+
+User = get_user_model()
+
+LOG = [
+    '127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 512',
+    '127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET /follow/ HTTP/1.1" '
+    '200 512 "-" "Mozilla/5.0"',
+    '127.0.0.1 - - [19/Oct/2026:10:00:01 +0000] "GET /posts/{id}/?x=1 '
+    'HTTP/1.1" 200 512',
+    '127.0.0.1 - - [19/Oct/2026:10:00:01 +0000] "POST /posts/{id}/comment/ '
+    'HTTP/1.1" 302 0',
+    '127.0.0.1 - - [19/Oct/2026:10:00:01 +0000] "GET /static/x.css '
+    'HTTP/1.1" 200 10',
+    'мусор',
+]
+
+
+class ParseLogTests(SimpleTestCase):
+    def test_parse_line_maps_url_names(self):
+        entries = list(read_log(line.format(id=1) for line in LOG))
+        self.assertEqual(
+            [entry.view_name for entry in entries],
+            ['posts:index', 'posts:follow_index', 'posts:post_detail',
+             'posts:add_comment']
+        )
+        self.assertEqual(entries[3].method, 'POST')
+        self.assertEqual(entries[2].path, '/posts/1/?x=1')
+
+    def test_unknown_lines(self):
+        self.assertIsNone(parse_line('мусор'))
+        self.assertIsNone(parse_line(LOG[4]).view_name)
+
+
+class ReplayTests(LiveServerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='replay',
+                                             password='replay-pass')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_replay_with_login(self):
+        """Закрытые адреса проигрываются от залогиненной сессии."""
+        entries = read_log(line.format(id=self.post.id) for line in LOG)
+        replayer = Replayer(self.live_server_url,
+                            [('replay', 'replay-pass')], workers=2, speed=0)
+        report = replayer.run(entries)
+        self.assertEqual(set(report), {
+            'posts:index', 'posts:follow_index', 'posts:post_detail',
+            'posts:add_comment',
+        })
+        for row in report.values():
+            self.assertEqual(row['errors'], 0)
+            self.assertEqual(row['client_errors'], 0)
+        self.assertEqual(self.post.comments.count(), 1)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..db.routers import PrimaryReplicaRouter, _state
+
+User = get_user_model()
+
+INDEX = reverse('posts:index')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.addCleanup(setattr, _state, 'replica', False)
+
+    def test_reads_go_to_replica_only_when_enabled(self):
+        _state.replica = False
+        self.assertIsNone(self.router.db_for_read(Post))
+        _state.replica = True
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(
+            self.router.allow_migrate('replica1', 'posts')
+        )
+
+
+class ReplicaMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент получает куку и читает с основной базы."""
+        response = self.client.get(INDEX)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            {'text': 'Комментарий'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertFalse(_state.wrote)
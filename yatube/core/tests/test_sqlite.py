@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from ..db.sqlite import apply_pragmas
+
+
+class SQLitePragmaTests(TestCase):
+    def test_connection_configured(self):
+        """Новые соединения получают PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0],
+                             settings.SQLITE_PRAGMAS['cache_size'])
+
+
+class ApplyPragmasTests(SimpleTestCase):
+    def test_file_database_switches_to_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'test.sqlite3'))
+            apply_pragmas(db, settings.SQLITE_PRAGMAS)
+            mode = db.execute('PRAGMA journal_mode').fetchone()[0]
+            synchronous = db.execute('PRAGMA synchronous').fetchone()[0]
+            db.close()
+        self.assertEqual(mode, 'wal')
+        # 1 — NORMAL
+        self.assertEqual(synchronous, 1)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from ..tasks import claim, enqueue, execute, fail_abandoned, task, Worker
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('бум')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key(self):
+        first = record.enqueue(args=[1], key='once')
+        second = record.enqueue(args=[2], key='once')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_claim_by_priority_and_schedule(self):
+        low = record.delay('low')
+        high = record.enqueue(args=['high'], priority=5)
+        record.enqueue(args=['later'], delay=3600)
+        claimed = claim('w1', 10)
+        self.assertEqual([item.pk for item in claimed], [high.pk, low.pk])
+        self.assertEqual(claim('w2', 10), [])
+        for item in claimed:
+            self.assertTrue(execute(item))
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Task.objects.filter(status=Task.DONE).count(), 2)
+
+    def test_retry_with_backoff_then_fail(self):
+        item = explode.delay()
+        self.assertFalse(execute(claim('w1', 1)[0]))
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (Task.QUEUED, 1))
+        self.assertGreater(item.run_at, timezone.now())
+        self.assertIn('бум', item.error)
+        Task.objects.filter(pk=item.pk).update(run_at=timezone.now())
+        execute(claim('w1', 1)[0])
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (Task.FAILED, 2))
+
+    def test_expired_lease_is_reclaimed(self):
+        record.delay('x')
+        claim('dead', 1)
+        self.assertEqual(claim('alive', 1), [])
+        Task.objects.update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        item = claim('alive', 1)[0]
+        self.assertEqual(item.attempts, 2)
+        self.assertTrue(execute(item))
+
+    def test_task_killing_worker_fails_after_max_attempts(self):
+        """Задачу, после которой воркер каждый раз умирает, перестают
+        забирать на последней попытке."""
+        explode.delay()
+        for worker in ('w1', 'w2'):
+            self.assertEqual(len(claim(worker, 1)), 1)
+            Task.objects.update(
+                locked_until=timezone.now() - timedelta(seconds=1)
+            )
+        self.assertEqual(claim('w3', 1), [])
+        self.assertEqual(fail_abandoned(), 1)
+        item = Task.objects.get()
+        self.assertEqual((item.status, item.attempts), (Task.FAILED, 2))
+        self.assertIn('Аренда истекла', item.error)
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
+
+
+@override_settings(TASK_POLL_INTERVAL=0.01)
+class WorkerTests(TransactionTestCase):
+    def test_burst_runs_everything(self):
+        calls.clear()
+        for number in range(20):
+            record.delay(number)
+        stats = Worker(threads=4).run(burst=True)
+        self.assertEqual(stats, {'done': 20, 'failed': 0})
+        self.assertEqual(sorted(calls), list(range(20)))
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
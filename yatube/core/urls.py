@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:name>/', views.profile_download,
+         name='profile_download'),
+    path('memory/', views.memory_overview, name='memory_overview'),
+    path('memory/diff/', views.memory_diff, name='memory_diff'),
+    path('memory/<str:name>/', views.memory_download,
+         name='memory_download'),
+    path('pool/', views.pool_overview, name='pool_overview'),
+]
@@ -1,4 +1,12 @@
-from django.shortcuts import render
+import tracemalloc
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import redirect, render
+
+from . import memory
+from .db.pool import pool_stats
+from .profiling import list_profiles, profile_path
 
 
 def page_not_found(request, exception):
@@ -15,3 +23,73 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def profile_list(request):
+    return render(request, 'core/profiles.html',
+                  {'profiles': list_profiles()})
+
+
+@staff_member_required
+def profile_download(request, name):
+    path = profile_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
+
+def memory_context(**extra):
+    return {
+        'snapshots': memory.list_snapshots(),
+        'requests': memory.request_report(),
+        'tracing': tracemalloc.is_tracing(),
+        **extra,
+    }
+
+
+@staff_member_required
+def memory_overview(request):
+    """Снимки памяти этого воркера; трассировку можно включить
+    и выключить, не перезапуская его."""
+    if request.method == 'POST':
+        action = request.POST.get('action', 'snapshot')
+        if action == 'start':
+            memory.ensure_tracing()
+        elif action == 'stop':
+            if not memory.stop_tracing():
+                return render(request, 'core/memory.html', memory_context(
+                    error='Трассировку держит MEMORY_PROFILE_REQUESTS'
+                ))
+        else:
+            try:
+                memory.take_snapshot()
+            except RuntimeError as error:
+                return render(request, 'core/memory.html',
+                              memory_context(error=error))
+        return redirect('core:memory_overview')
+    return render(request, 'core/memory.html', memory_context())
+
+
+@staff_member_required
+def memory_diff(request):
+    old, new = request.GET.get('old', ''), request.GET.get('new', '')
+    try:
+        stats = memory.diff_snapshots(old, new)
+    except FileNotFoundError:
+        raise Http404
+    context = memory_context(old=old, new=new, stats=stats)
+    return render(request, 'core/memory.html', context)
+
+
+@staff_member_required
+def memory_download(request, name):
+    path = memory.snapshot_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
+
+@staff_member_required
+def pool_overview(request):
+    return JsonResponse(pool_stats())
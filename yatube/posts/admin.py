@@ -1,21 +1,175 @@
+import json
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers, widgets
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
+
+from core.paginator import EstimatedCountPaginator
+
+from . import moderation
+from .models import Group, ModerationJob, Post, Comment, Follow
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без COUNT(*) по всей таблице и без выпадающих списков
+    пользователей и постов на миллионы строк."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def start_job(modeladmin, request, action, **params):
+    job = ModerationJob.objects.create(action=action,
+                                       params=json.dumps(params),
+                                       created_by=request.user)
+    moderation.start(job)
+    modeladmin.message_user(request, format_html(
+        'Задача <a href="{}">{}</a> создана, прогресс — на её странице.',
+        reverse('admin:posts_moderationjob_change', args=[job.pk]), job
+    ))
+
+
+def selected_authors(queryset):
+    return list(queryset.order_by().values_list(
+        'author_id', flat=True
+    ).distinct())
 
-from .models import Group, Post, Comment, Follow
 
+def purge_authors(modeladmin, request, queryset):
+    start_job(modeladmin, request, 'purge_authors',
+              authors=selected_authors(queryset))
 
-class PostAdmin(admin.ModelAdmin):
+
+purge_authors.short_description = ('Удалить все посты, комментарии '
+                                   'и подписки авторов выбранных записей')
+
+
+class MoveToGroupForm(forms.Form):
+    """Группа для переноса: поле id с поиском во всплывающем окне,
+    а не список всех групп."""
+    group = forms.ModelChoiceField(Group.objects.all(), label='Группа')
+
+    def __init__(self, *args, admin_site, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].widget = widgets.ForeignKeyRawIdWidget(
+            Post._meta.get_field('group').remote_field, admin_site
+        )
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'group')
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
     list_editable = ('group',)
+    raw_id_fields = ('author',)
+    actions = ['delete_posts', 'delete_author_posts', 'move_to_group',
+               purge_authors]
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            # list_editable строит форму на каждую строку, а групп мало:
+            # читаем их один раз на запрос
+            if not hasattr(request, 'group_choices'):
+                request.group_choices = list(field.choices)
+            field.choices = request.group_choices
+        return field
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # штатное удаление грузит в память все посты и их комментарии
+        actions.pop('delete_selected', None)
+        return actions
+
+    def move_to_group(self, request, queryset):
+        """Сначала страница выбора группы, после неё — фоновая задача."""
+        form = MoveToGroupForm(request.POST if 'apply' in request.POST
+                               else None, admin_site=self.admin_site)
+        if form.is_valid():
+            start_job(self, request, 'move_posts',
+                      group=form.cleaned_data['group'].pk,
+                      posts=list(queryset.values_list('pk', flat=True)))
+            return None
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Перенос постов в группу',
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/posts/move_to_group.html',
+                                context)
+
+    move_to_group.short_description = 'Перенести выбранные посты в группу'
+
+    def delete_posts(self, request, queryset):
+        start_job(self, request, 'delete_posts',
+                  posts=list(queryset.values_list('pk', flat=True)))
+
+    delete_posts.short_description = 'Удалить выбранные посты в фоне'
+
+    def delete_author_posts(self, request, queryset):
+        start_job(self, request, 'delete_author_posts',
+                  authors=selected_authors(queryset))
+
+    delete_author_posts.short_description = ('Удалить все посты авторов '
+                                             'выбранных постов')
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'slug', 'title', 'description')
 
 
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    date_hierarchy = 'created'
+    raw_id_fields = ('post', 'author')
+    actions = ['delete_author_comments', purge_authors]
+
+    def delete_author_comments(self, request, queryset):
+        start_job(self, request, 'delete_author_comments',
+                  authors=selected_authors(queryset))
+
+    delete_author_comments.short_description = ('Удалить все комментарии '
+                                                'авторов выбранных')
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'action', 'status', 'progress', 'created_by',
+                    'created', 'finished')
+    list_filter = ('status', 'action')
+    readonly_fields = ('action', 'params', 'status', 'progress', 'error',
+                       'created_by', 'created', 'finished')
+    exclude = ('total', 'done')
+
+    def progress(self, job):
+        if not job.total:
+            return f'{job.done}'
+        return f'{job.done} из {job.total} ({job.done * 100 // job.total}%)'
+
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
@@ -0,0 +1,88 @@
+"""Горячие и архивные посты.
+
+Команда archive_posts переносит посты старше ARCHIVE_AFTER_DAYS вместе
+с комментариями в ArchivedPost и ArchivedComment, которые лежат в базе
+ARCHIVE_DATABASE. Ленты читают только горячую таблицу, а страница поста
+и профиль автора при необходимости дочитывают архив.
+"""
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .models import ArchivedPost
+from .sharding import get_post_or_404
+
+
+class ChainedList:
+    """Несколько отсортированных querysets подряд для Paginator.
+
+    Каждый следующий queryset целиком старше предыдущего, поэтому
+    страницы собираются без слияния, а в архив запрос идёт только когда
+    страница до него дошла.
+    """
+    ordered = True
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self.counts = {}
+
+    def count_of(self, index):
+        if index not in self.counts:
+            self.counts[index] = self.querysets[index].count()
+        return self.counts[index]
+
+    def count(self):
+        return sum(self.count_of(index)
+                   for index in range(len(self.querysets)))
+
+    def __len__(self):
+        return self.count()
+
+    def replace(self, querysets):
+        return ChainedList(*querysets)
+
+    def head(self, size):
+        """Первые `size` строк без подсчёта частей."""
+        items = []
+        for queryset in self.querysets:
+            items.extend(queryset[:size - len(items)])
+            if len(items) >= size:
+                break
+        return items
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        items = []
+        for number, queryset in enumerate(self.querysets):
+            size = self.count_of(number)
+            if start < size and stop > 0:
+                items.extend(queryset[max(start, 0):min(stop, size)])
+            start, stop = start - size, stop - size
+            if stop <= 0:
+                break
+        return items
+
+
+def archived_posts():
+    return ArchivedPost.objects.using(settings.ARCHIVE_DATABASE)
+
+
+def author_posts(author):
+    return ChainedList(
+        author.posts.select_related('author', 'group'),
+        archived_posts().filter(author=author).select_related(
+            'author', 'group'
+        ),
+    )
+
+
+def get_post_or_archived(post_id, queryset=None):
+    """Горячий пост, а если его нет — архивный."""
+    try:
+        return get_post_or_404(post_id, queryset)
+    except Http404:
+        return get_object_or_404(
+            archived_posts().select_related('author', 'group'), pk=post_id
+        )
@@ -0,0 +1,25 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.backfill import Backfill, register
+
+from .models import Post
+
+
+def recount_comments(queryset):
+    """Пересчитывает comment_count для постов queryset, и архивных тоже."""
+    comments = queryset.model._meta.get_field('comments').related_model
+    counts = comments.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post'
+    ).annotate(total=Count('pk')).values('total')
+    return queryset.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+@register
+class PostCommentCount(Backfill):
+    name = 'post_comment_count'
+    model = Post
+    description = 'счётчик комментариев поста'
+
+    def process(self, queryset):
+        return recount_comments(queryset)
@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from .following import followed_authors
+from .utils import feed_cache_version
+
+
+def feed_cache(request):
+    """Версия кеша лент для {% cache %}, в кеш ходит только по требованию."""
+    return {'feed_version': SimpleLazyObject(feed_cache_version)}
+
+
+def following(request):
+    """Подписки пользователя для `{% if author.pk in followed_authors %}`."""
+    return {'followed_authors': SimpleLazyObject(
+        lambda: followed_authors(request.user)
+    )}
@@ -0,0 +1,69 @@
+"""Keyset-пагинация от новых к старым по (дата, id).
+
+Курсор — последняя показанная строка, закодированная как
+`<микросекунды>-<id>`. Следующая страница берёт строки строго старше
+неё, поэтому глубина прокрутки не влияет на стоимость запроса, в отличие
+от OFFSET.
+"""
+from datetime import datetime, timezone
+
+from django.db.models import Q
+
+
+def row_key(row, field):
+    """(дата, id) строки: модели или словаря из values()."""
+    if isinstance(row, dict):
+        return row[field], row['id']
+    return getattr(row, field), row.pk
+
+
+def encode_cursor(row, field):
+    moment, pk = row_key(row, field)
+    return f'{round(moment.timestamp() * 1_000_000)}-{pk}'
+
+
+# id больше не влезет в INTEGER SQLite
+MAX_ID = 2 ** 63 - 1
+
+
+def decode_cursor(value):
+    """(дата, id) из курсора; ValueError для испорченного значения."""
+    stamp, pk = value.split('-')
+    try:
+        moment = datetime.fromtimestamp(int(stamp) / 1_000_000,
+                                        timezone.utc)
+    except (OverflowError, OSError) as error:
+        # слишком далёкая дата: OSError от платформы или переполнение
+        raise ValueError(f'Дата курсора вне диапазона: {stamp}') from error
+    pk = int(pk)
+    if pk > MAX_ID:
+        raise ValueError(f'Id курсора вне диапазона: {pk}')
+    return moment, pk
+
+
+def after_cursor(queryset, cursor, field):
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        moment, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': moment}) | Q(**{field: moment, 'pk__lt': pk})
+        )
+    return queryset
+
+
+def keyset_page(source, cursor, size, field):
+    """Строки после курсора и курсор следующей страницы или None.
+
+    Кроме queryset принимает составные ленты (MergedFeed, ChainedList):
+    курсор применяется к каждой их части.
+    """
+    if hasattr(source, 'querysets'):
+        source = source.replace([after_cursor(queryset, cursor, field)
+                                 for queryset in source.querysets])
+        items = source.head(size + 1)
+    else:
+        items = list(after_cursor(source, cursor, field)[:size + 1])
+    if len(items) <= size:
+        return items, None
+    items = items[:size]
+    return items, encode_cursor(items[-1], field)
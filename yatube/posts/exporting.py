@@ -0,0 +1,131 @@
+"""Потоковая выгрузка постов и комментариев в NDJSON или CSV.
+
+Строки читаются keyset-пачками по pk через values(), поэтому память не
+зависит от объёма выгрузки. Формат записей совпадает с тем, что
+принимает import_data, включая архивные посты и комментарии.
+"""
+import csv
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+
+from .archive import archived_posts
+from .models import ArchivedComment, Comment, Post
+
+POST_FIELDS = ['id', 'author', 'group', 'text', 'pub_date', 'image']
+COMMENT_FIELDS = ['id', 'post', 'author', 'text', 'created']
+KINDS = ('posts', 'comments', 'all')
+
+
+def keyset(queryset, batch_size=1000):
+    """Обходит queryset по возрастанию pk пачками без OFFSET."""
+    last = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last is not None:
+            batch = batch.filter(pk__gt=last)
+        rows = list(batch[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]['id']
+
+
+def post_sources(author=None):
+    aliases = settings.POST_SHARDS or ['default']
+    sources = [Post.objects.using(alias) for alias in aliases]
+    sources.append(archived_posts())
+    if author is not None:
+        sources = [queryset.filter(author=author) for queryset in sources]
+    return sources
+
+
+def comment_sources(author=None):
+    aliases = settings.POST_SHARDS or ['default']
+    sources = [Comment.objects.using(alias) for alias in aliases]
+    sources.append(ArchivedComment.objects.using(settings.ARCHIVE_DATABASE))
+    if author is not None:
+        sources = [queryset.filter(author=author) for queryset in sources]
+    return sources
+
+
+def image_hash(name):
+    digest = hashlib.sha256()
+    try:
+        with default_storage.open(name) as image:
+            for chunk in image.chunks():
+                digest.update(chunk)
+    except OSError:
+        return ''
+    return digest.hexdigest()
+
+
+def post_rows(author=None, images=False, batch_size=1000):
+    for queryset in post_sources(author):
+        rows = queryset.values('id', 'text', 'pub_date', 'image',
+                               author_name=F('author__username'),
+                               group_slug=F('group__slug'))
+        for row in keyset(rows, batch_size):
+            record = {
+                'type': 'post',
+                'id': row['id'],
+                'author': row['author_name'],
+                'group': row['group_slug'] or '',
+                'text': row['text'],
+                'pub_date': row['pub_date'].isoformat(),
+                'image': row['image'],
+            }
+            if images:
+                record['image_sha256'] = (image_hash(row['image'])
+                                          if row['image'] else '')
+            yield record
+
+
+def comment_rows(author=None, batch_size=1000):
+    for queryset in comment_sources(author):
+        rows = queryset.values('id', 'post_id', 'text', 'created',
+                               author_name=F('author__username'))
+        for row in keyset(rows, batch_size):
+            yield {
+                'type': 'comment',
+                'id': row['id'],
+                'post': row['post_id'],
+                'author': row['author_name'],
+                'text': row['text'],
+                'created': row['created'].isoformat(),
+            }
+
+
+def export_rows(kind, author=None, images=False, batch_size=1000):
+    if kind in ('posts', 'all'):
+        yield from post_rows(author, images, batch_size)
+    if kind in ('comments', 'all'):
+        yield from comment_rows(author, batch_size)
+
+
+def fields_for(kind, images=False):
+    if kind == 'posts':
+        return POST_FIELDS + (['image_sha256'] if images else [])
+    return COMMENT_FIELDS
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файл для csv.writer, который просто возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.DictWriter(Echo(), fieldnames=fields, extrasaction='ignore')
+    yield writer.writerow(dict(zip(fields, fields)))
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,81 @@
+"""На кого подписан пользователь: отсортированный массив id в кеше.
+
+Список подписок грузится одним запросом и лежит в кеше байтами
+array('q'). Проверка «подписан ли» — бинарный поиск, так что страница
+с любым числом авторов проверяется без запросов к базе. После коммита
+подписки или отписки ключ удаляется и массив перечитывается заново.
+Кеш по умолчанию свой у каждого процесса, поэтому другие процессы
+и подписки в обход сигналов видят изменения через
+FOLLOWING_CACHE_SECONDS. Решать по нему, писать ли в базу, нельзя.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+
+def cache_key(user_id):
+    return f'following:{user_id}'
+
+
+def find(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index, index < len(ids) and ids[index] == author_id
+
+
+class FollowedAuthors:
+    """Множество id авторов для `author_id in followed_authors`."""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def __contains__(self, author_id):
+        return find(self.ids, author_id)[1]
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def cached_ids(user_id):
+    data = cache.get(cache_key(user_id))
+    if data is None:
+        return None
+    ids = array('q')
+    ids.frombytes(data)
+    return ids
+
+
+def store(user_id, ids):
+    cache.set(cache_key(user_id), ids.tobytes(),
+              settings.FOLLOWING_CACHE_SECONDS)
+
+
+def followed_ids(user_id):
+    ids = cached_ids(user_id)
+    if ids is None:
+        ids = array('q', Follow.objects.filter(user_id=user_id).order_by(
+            'author_id'
+        ).values_list('author_id', flat=True))
+        store(user_id, ids)
+    return ids
+
+
+def followed_authors(user):
+    """Подписки пользователя, не больше одного чтения кеша на объект."""
+    if not user.is_authenticated:
+        return FollowedAuthors(array('q'))
+    if not hasattr(user, '_followed_authors'):
+        user._followed_authors = FollowedAuthors(followed_ids(user.pk))
+    return user._followed_authors
+
+
+def invalidate(user_id):
+    """Сбрасывает закешированный массив после коммита транзакции."""
+    transaction.on_commit(lambda: cache.delete(cache_key(user_id)))
@@ -0,0 +1,353 @@
+"""Массовый импорт пользователей, групп, постов, комментариев и подписок.
+
+Одна запись — один JSON-объект в строке NDJSON или строка CSV:
+
+    {"type": "user", "username": "leo", "email": "", "first_name": "",
+     "last_name": "", "password": "<хеш или пусто>", "date_joined": "..."}
+    {"type": "group", "slug": "cats", "title": "Коты", "description": ""}
+    {"type": "post", "id": 17, "author": "leo", "group": "cats",
+     "text": "...", "pub_date": "2019-05-01T10:00:00+00:00", "image": ""}
+    {"type": "comment", "id": 90, "post": 17, "author": "leo",
+     "text": "...", "created": "..."}
+    {"type": "follow", "user": "leo", "author": "tolstoy"}
+
+Пользователи и группы ссылаются по username и slug, посты и комментарии
+сохраняют исходные id, поэтому повторный прогон того же файла ничего не
+дублирует. Записи копятся в буферах по типам и пишутся bulk_create
+пачками, ссылки разрешаются через словари в памяти.
+"""
+import csv
+import json
+import time
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .backfills import recount_comments
+from .following import invalidate as invalidate_following
+from .models import Comment, Follow, Group, Post, ShardSequence
+from .recommendations import follows_changed
+from .sharding import (locate_posts, next_id, sharding_enabled,
+                       shard_for_author)
+from .signals import mirror_aliases
+from .utils import preserve_auto_now_add
+
+User = get_user_model()
+
+TYPES = ('user', 'group', 'post', 'comment', 'follow')
+REQUIRED = {
+    'user': ('username',),
+    'group': ('slug', 'title'),
+    'post': ('author', 'text'),
+    'comment': ('post', 'author', 'text'),
+    'follow': ('user', 'author'),
+}
+# что надо записать раньше, чтобы разрешились ссылки
+DEPENDS = {
+    'post': ('user', 'group'),
+    'comment': ('post', 'user'),
+    'follow': ('user',),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as error:
+                yield number, RowError(f'не JSON: {error}')
+
+
+def read_csv(lines, record_type):
+    for number, row in enumerate(csv.DictReader(lines), 2):
+        row.setdefault('type', record_type)
+        yield number, row
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = parse_datetime(str(value))
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise RowError(f'не дата: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def parse_id(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field}: ожидается число, получено {value!r}')
+
+
+def validate(record):
+    """Проверяет запись и приводит поля к нужным типам."""
+    if not isinstance(record, dict):
+        raise RowError('запись должна быть объектом')
+    record_type = record.get('type')
+    if record_type not in TYPES:
+        raise RowError(f'неизвестный type: {record_type!r}')
+    missing = [field for field in REQUIRED[record_type]
+               if record.get(field) in (None, '')]
+    if missing:
+        raise RowError(f'нет полей: {", ".join(missing)}')
+    if record_type in ('post', 'comment') and not str(record['text']).strip():
+        raise RowError('пустой текст')
+    for field in ('id', 'post'):
+        if record.get(field) not in (None, ''):
+            record[field] = parse_id(record[field], field)
+        else:
+            record.pop(field, None)
+    for field in ('date_joined', 'pub_date', 'created'):
+        if record.get(field):
+            record[field] = parse_date(record[field])
+    return record_type, record
+
+
+class Importer:
+    def __init__(self, batch_size=1000, stderr=None, max_errors=100):
+        self.batch_size = batch_size
+        self.stderr = stderr
+        self.max_errors = max_errors
+        self.buffers = {record_type: [] for record_type in TYPES}
+        self.users = {}
+        self.groups = {}
+        self.posts = {}
+        self.written = {record_type: 0 for record_type in TYPES}
+        self.errors = 0
+        self.top_id = 0
+        self.now = timezone.now()
+
+    def error(self, number, message):
+        self.errors += 1
+        if self.stderr is not None and self.errors <= self.max_errors:
+            self.stderr.write(f'строка {number}: {message}')
+
+    def run(self, rows):
+        started = time.monotonic()
+        for number, record in rows:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                record_type, record = validate(record)
+            except RowError as error:
+                self.error(number, error)
+                continue
+            record['_line'] = number
+            self.buffers[record_type].append(record)
+            if len(self.buffers[record_type]) >= self.batch_size:
+                self.flush(record_type)
+        for record_type in TYPES:
+            self.flush(record_type)
+        if sharding_enabled() and self.top_id:
+            self.bump_sequence()
+        elapsed = time.monotonic() - started
+        total = sum(self.written.values())
+        return {
+            'written': self.written,
+            'errors': self.errors,
+            'seconds': elapsed,
+            'rows_per_sec': total / elapsed if elapsed else 0.0,
+        }
+
+    def flush(self, record_type):
+        for dependency in DEPENDS.get(record_type, ()):
+            self.flush(dependency)
+        batch, self.buffers[record_type] = self.buffers[record_type], []
+        if batch:
+            getattr(self, f'write_{record_type}s')(batch)
+
+    def resolve(self, model, field, cache, keys):
+        """Дочитывает в словарь ссылки на уже существующие строки."""
+        unknown = {key for key in keys if key not in cache}
+        if unknown:
+            cache.update(model.objects.filter(
+                **{f'{field}__in': unknown}
+            ).values_list(field, 'pk'))
+
+    def mirror(self, model, objects):
+        for alias in mirror_aliases():
+            model._base_manager.using(alias).bulk_create(
+                objects, ignore_conflicts=True
+            )
+
+    def write_users(self, batch):
+        names = [record['username'] for record in batch]
+        self.resolve(User, 'username', self.users, names)
+        new = {}
+        for record in batch:
+            if record['username'] in self.users:
+                continue
+            new[record['username']] = User(
+                username=record['username'],
+                email=record.get('email') or '',
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                password=record.get('password') or make_password(None),
+                date_joined=record.get('date_joined') or self.now,
+            )
+        with transaction.atomic():
+            User.objects.bulk_create(new.values())
+        # bulk_create в SQLite не возвращает id, дочитываем одним запросом
+        self.resolve(User, 'username', self.users, new)
+        for user in new.values():
+            user.pk = self.users[user.username]
+        self.mirror(User, list(new.values()))
+        self.written['user'] += len(new)
+
+    def write_groups(self, batch):
+        slugs = [record['slug'] for record in batch]
+        self.resolve(Group, 'slug', self.groups, slugs)
+        new = {
+            record['slug']: Group(slug=record['slug'], title=record['title'],
+                                  description=record.get('description', ''))
+            for record in batch if record['slug'] not in self.groups
+        }
+        with transaction.atomic():
+            Group.objects.bulk_create(new.values())
+        self.resolve(Group, 'slug', self.groups, new)
+        for group in new.values():
+            group.pk = self.groups[group.slug]
+        self.mirror(Group, list(new.values()))
+        self.written['group'] += len(new)
+
+    def user_id(self, record, field='author'):
+        user_id = self.users.get(record[field])
+        if user_id is None:
+            self.error(record['_line'],
+                       f'нет пользователя {record[field]!r}')
+        return user_id
+
+    def row_id(self, record):
+        """Исходный id, а в шардах без него — id из общего счётчика."""
+        row_id = record.get('id')
+        if row_id is None:
+            return next_id() if sharding_enabled() else None
+        self.top_id = max(self.top_id, row_id)
+        return row_id
+
+    def write_posts(self, batch):
+        self.resolve(User, 'username', self.users,
+                     [record['author'] for record in batch])
+        self.resolve(Group, 'slug', self.groups,
+                     [record['group'] for record in batch
+                      if record.get('group')])
+        by_alias = {}
+        for record in batch:
+            author_id = self.user_id(record)
+            group_id = self.groups.get(record.get('group'))
+            if author_id is None:
+                continue
+            if record.get('group') and group_id is None:
+                self.error(record['_line'],
+                           f'нет группы {record["group"]!r}')
+                continue
+            post = Post(
+                pk=self.row_id(record), author_id=author_id, group_id=group_id,
+                text=record['text'], image=record.get('image') or '',
+                pub_date=record.get('pub_date') or self.now,
+            )
+            alias = shard_for_author(author_id)
+            if post.pk is not None:
+                self.posts[post.pk] = alias
+            by_alias.setdefault(alias, []).append(post)
+        self.written['post'] += self.insert(Post, by_alias, 'pub_date')
+
+    def post_alias(self, post_ids):
+        self.posts.update(locate_posts(
+            {pk for pk in post_ids if pk not in self.posts}
+        ))
+
+    def write_comments(self, batch):
+        self.resolve(User, 'username', self.users,
+                     [record['author'] for record in batch])
+        self.post_alias([record['post'] for record in batch])
+        by_alias = {}
+        for record in batch:
+            author_id = self.user_id(record)
+            alias = self.posts.get(record['post'])
+            if author_id is None:
+                continue
+            if alias is None:
+                self.error(record['_line'], f'нет поста {record["post"]}')
+                continue
+            by_alias.setdefault(alias, []).append(Comment(
+                pk=self.row_id(record), post_id=record['post'],
+                author_id=author_id, text=record['text'],
+                created=record.get('created') or self.now,
+            ))
+        self.written['comment'] += self.insert(Comment, by_alias, 'created')
+        # bulk_create не шлёт сигналы, счётчики постов пачки считаем здесь
+        for alias, comments in by_alias.items():
+            recount_comments(Post.objects.using(alias).filter(
+                pk__in={comment.post_id for comment in comments}
+            ))
+
+    def write_follows(self, batch):
+        self.resolve(User, 'username', self.users,
+                     [name for record in batch
+                      for name in (record['user'], record['author'])])
+        follows = []
+        for record in batch:
+            user_id = self.user_id(record, 'user')
+            author_id = self.user_id(record)
+            if user_id is None or author_id is None:
+                continue
+            if user_id == author_id:
+                self.error(record['_line'], 'подписка на самого себя')
+                continue
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+        self.written['follow'] += self.insert(Follow, {'default': follows},
+                                              key='user_id')
+        # bulk_create не шлёт сигналы, кеш подписок и рекомендации тоже здесь
+        authors = {}
+        for follow in follows:
+            authors.setdefault(follow.user_id, []).append(follow.author_id)
+        for user_id, author_ids in authors.items():
+            invalidate_following(user_id)
+            follows_changed(user_id, author_ids)
+
+    def insert(self, model, by_alias, date_field=None, key='pk'):
+        """Пишет пачки, возвращает число действительно вставленных строк.
+
+        ignore_conflicts молча пропускает дубли, поэтому вставленные
+        считаются по строкам с ключами пачки до и после вставки.
+        """
+        dates = [model._meta.get_field(date_field)] if date_field else []
+        written = 0
+        with preserve_auto_now_add(*dates):
+            for alias, objects in by_alias.items():
+                keys = {getattr(obj, key) for obj in objects}
+                # строки без id конфликтовать не с чем
+                written += sum(1 for obj in objects
+                               if getattr(obj, key) is None)
+                existing = model.objects.using(alias).filter(
+                    **{f'{key}__in': keys - {None}}
+                )
+                with transaction.atomic(using=alias):
+                    before = existing.count()
+                    model.objects.using(alias).bulk_create(
+                        objects, ignore_conflicts=True
+                    )
+                    written += existing.count() - before
+        return written
+
+    def bump_sequence(self):
+        """Id из файла не должны совпасть с будущими id из ShardSequence."""
+        if not ShardSequence.objects.filter(pk__gte=self.top_id).exists():
+            ShardSequence.objects.create(pk=self.top_id)
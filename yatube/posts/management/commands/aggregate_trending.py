@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import aggregate, schedule
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает активность групп и авторов за окно '
+            'TRENDING_WINDOW. С --schedule ставит в очередь задач '
+            'периодический пересчёт, который выполняет runworker.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedule', action='store_true',
+                            help='не считать сейчас, а запустить '
+                                 'пересчёт раз в TRENDING_INTERVAL')
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            task = schedule()
+            self.stdout.write(f'Пересчёт запланирован на {task.run_at}')
+            return
+        groups, authors = aggregate()
+        self.stdout.write(f'Групп: {groups}, авторов: {authors}')
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from posts.backfills import recount_comments
+from posts.models import ArchivedComment, ArchivedPost, Comment, Group, Post
+from posts.utils import raw_delete
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты старше ARCHIVE_AFTER_DAYS с комментариями '
+            'в архив пачками: сначала копия, затем удаление из горячей '
+            'таблицы, так что прерванный прогон можно повторить.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0,
+                            help='пауза между пачками, секунд')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        target = settings.ARCHIVE_DATABASE
+        total = 0
+        for alias in settings.POST_SHARDS or ['default']:
+            old = Post.objects.using(alias).filter(pub_date__lt=cutoff)
+            if options['dry_run']:
+                count = old.count()
+                self.stdout.write(f'{alias}: к архивации {count}')
+                total += count
+                continue
+            while True:
+                ids = list(old.order_by('pk').values_list(
+                    'pk', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                started = time.monotonic()
+                self.move(alias, target, ids)
+                total += len(ids)
+                self.stdout.write(
+                    f'{alias}: {len(ids)} постов за '
+                    f'{time.monotonic() - started:.2f} с'
+                )
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'В архиве: +{total}'))
+
+    def move(self, source, target, ids):
+        posts = list(Post.objects.using(source).filter(pk__in=ids))
+        comments = list(Comment.objects.using(source).filter(
+            post_id__in=ids
+        ))
+        if source != target:
+            self.copy_reference(source, target, posts, comments)
+        self.archive(target, posts, comments)
+        with transaction.atomic(using=source):
+            # пустой UPDATE блокирует посты пачки: в PostgreSQL строки,
+            # в SQLite всю базу на запись, и новых комментариев к ним
+            # до конца транзакции не появится
+            Post.objects.using(source).filter(pk__in=ids).update(
+                comment_count=F('comment_count')
+            )
+            late = list(Comment.objects.using(source).filter(
+                post_id__in=ids
+            ).exclude(pk__in=[comment.pk for comment in comments]))
+            if late:
+                # написаны после копии, без них удаление потеряло бы данные
+                if source != target:
+                    self.copy_reference(source, target, [], late)
+                self.archive(target, [], late)
+                recount_comments(ArchivedPost.objects.using(target).filter(
+                    pk__in={comment.post_id for comment in late}
+                ))
+            raw_delete(Comment.objects.using(source).filter(post_id__in=ids))
+            raw_delete(Post.objects.using(source).filter(pk__in=ids))
+
+    def archive(self, target, posts, comments):
+        """Копирует в архив, уже скопированные строки пропускаются."""
+        with transaction.atomic(using=target):
+            ArchivedPost.objects.using(target).bulk_create([
+                ArchivedPost(id=post.pk, text=post.text,
+                             pub_date=post.pub_date,
+                             author_id=post.author_id,
+                             group_id=post.group_id, image=post.image.name,
+                             comment_count=post.comment_count)
+                for post in posts
+            ], ignore_conflicts=True)
+            ArchivedComment.objects.using(target).bulk_create([
+                ArchivedComment(id=comment.pk, post_id=comment.post_id,
+                                author_id=comment.author_id,
+                                text=comment.text, created=comment.created)
+                for comment in comments
+            ], ignore_conflicts=True)
+
+    def copy_reference(self, source, target, posts, comments):
+        """Авторы и группы пачки должны быть и в базе архива."""
+        user_ids = {post.author_id for post in posts}
+        user_ids |= {comment.author_id for comment in comments}
+        group_ids = {post.group_id for post in posts} - {None}
+        for model, pks in ((User, user_ids), (Group, group_ids)):
+            rows = list(model._base_manager.using(source).filter(
+                pk__in=pks
+            ))
+            model._base_manager.using(target).bulk_create(
+                rows, ignore_conflicts=True
+            )
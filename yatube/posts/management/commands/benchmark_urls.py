@@ -0,0 +1,98 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmarks import (compare_rows, load_results, save_results,
+                             summarize)
+from posts import urls
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# эти адреса меняют данные даже при GET, в замеры их не берём
+SKIP = {'add_comment', 'profile_follow', 'profile_unfollow'}
+
+
+def sample_kwargs():
+    """Аргументы для адресов: самые «тяжёлые» группа, автор и пост."""
+    group = Group.objects.annotate(
+        total=Count('posts')).order_by('-total').first()
+    author = User.objects.annotate(
+        total=Count('posts')).order_by('-total').first()
+    post = Post.objects.annotate(
+        total=Count('comments')).order_by('-total').first()
+    if not (group and author and post):
+        raise CommandError('Нет данных, сначала запустите seed_data.')
+    return {
+        'slug': group.slug,
+        'username': author.username,
+        'post_id': post.id,
+    }, post.author
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку, число запросов к БД и пропускную '
+            'способность для всех адресов posts/urls.py.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--name', default='urls',
+                            help='префикс файла с результатами')
+        parser.add_argument('--compare',
+                            help='JSON прошлого прогона для сравнения')
+
+    def handle(self, *args, **options):
+        values, user = sample_kwargs()
+        client = Client()
+        client.force_login(user)
+        results = {}
+        for pattern in urls.urlpatterns:
+            if pattern.name in SKIP:
+                continue
+            kwargs = {key: values[key]
+                      for key in pattern.pattern.converters}
+            url = reverse(f'{urls.app_name}:{pattern.name}', kwargs=kwargs)
+            results[pattern.name] = self.measure(
+                client, url, options['iterations'], options['warmup']
+            )
+            row = results[pattern.name]
+            self.stdout.write(
+                f'{pattern.name:<16} p50 {row["p50_ms"]:7.2f} ms  '
+                f'p95 {row["p95_ms"]:7.2f} ms  p99 {row["p99_ms"]:7.2f} ms  '
+                f'{row["queries"]:3d} SQL  {row["rps"]:7.1f} rps'
+            )
+        path = save_results(options['name'], {
+            'iterations': options['iterations'],
+            'urls': results,
+        })
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {path}'))
+        if options['compare']:
+            old = load_results(options['compare'])['urls']
+            for name, key, before, after, change in compare_rows(old,
+                                                                 results):
+                self.stdout.write(f'{name:<16} {key}: {before:.2f} -> '
+                                  f'{after:.2f} ({change:+.1f}%)')
+
+    def measure(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        latencies = []
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                request_started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - request_started)
+            elapsed = time.perf_counter() - started
+        summary = summarize(latencies, elapsed)
+        summary['url'] = url
+        summary['status'] = response.status_code
+        summary['queries'] = len(queries) // max(iterations, 1)
+        return summary
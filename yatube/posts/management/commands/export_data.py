@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import (KINDS, csv_lines, export_rows, fields_for,
+                             ndjson_lines)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты и комментарии в NDJSON или CSV '
+            'в формате import_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=KINDS, default='all')
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            default='ndjson')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--images', action='store_true',
+                            help='добавить sha256 картинок')
+        parser.add_argument('--output', default='-',
+                            help="файл или '-' для stdout")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, **options):
+        kind = options['type']
+        if options['format'] == 'csv' and kind == 'all':
+            raise CommandError('CSV выгружает один тип: --type posts '
+                               'или --type comments.')
+        author = None
+        if options['author']:
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(f'Нет пользователя {options["author"]}')
+        rows = export_rows(kind, author, options['images'],
+                           options['batch_size'])
+        if options['format'] == 'csv':
+            lines = csv_lines(rows, fields_for(kind, options['images']))
+        else:
+            lines = ndjson_lines(rows)
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
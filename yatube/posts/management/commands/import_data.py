@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import TYPES, Importer, read_csv, read_ndjson
+
+
+class Command(BaseCommand):
+    help = ('Импортирует пользователей, группы, посты, комментарии и '
+            'подписки из NDJSON или CSV потоково, пачками bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="файл или '-' для stdin")
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            default='ndjson')
+        parser.add_argument('--type', choices=TYPES,
+                            help='тип записей для CSV без колонки type')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='сколько ошибок показать')
+
+    def handle(self, path, **options):
+        if options['format'] == 'csv' and not options['type']:
+            raise CommandError('Для CSV нужен --type.')
+        try:
+            source = (sys.stdin if path == '-'
+                      else open(path, encoding='utf-8', newline=''))
+        except OSError as error:
+            raise CommandError(error)
+        importer = Importer(options['batch_size'], stderr=self.stderr,
+                            max_errors=options['max_errors'])
+        with source:
+            if options['format'] == 'csv':
+                rows = read_csv(source, options['type'])
+            else:
+                rows = read_ndjson(source)
+            report = importer.run(rows)
+        for record_type, count in report['written'].items():
+            self.stdout.write(f'{record_type}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано за {report["seconds"]:.1f} с, '
+            f'{report["rows_per_sec"]:.0f} строк/с, '
+            f'ошибок: {report["errors"]}'
+        ))
@@ -0,0 +1,212 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from posts.backfills import recount_comments
+from posts.models import AuthorShard, Comment, Group, Post, ShardSequence
+from posts.sharding import assignment_key, hashed_shard, shard_for_author
+from posts.utils import preserve_auto_now_add, raw_delete
+
+User = get_user_model()
+
+# поля, которые пользователи меняют у существующих строк
+CONTENT_FIELDS = {
+    Post: ('text', 'group_id', 'image'),
+    Comment: ('text',),
+}
+
+
+class Command(BaseCommand):
+    help = ('Переносит авторов между шардами без остановки сайта: '
+            'копия, переключение привязки, докопирование, удаление.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', nargs='*', type=int, default=[],
+                            help='id авторов для переноса')
+        parser.add_argument('--to', help='целевой шард для --authors')
+        parser.add_argument('--rebalance', action='store_true',
+                            help='перенести всех авторов в шард по хешу '
+                                 'и снять явные привязки')
+        parser.add_argument('--pin', action='store_true',
+                            help='закрепить авторов за текущими шардами '
+                                 'перед сменой POST_SHARDS')
+        parser.add_argument('--sync-reference', action='store_true',
+                            help='скопировать пользователей и группы '
+                                 'во все шарды и поднять счётчик id '
+                                 'выше уже занятых')
+        parser.add_argument('--grace', type=float,
+                            default=settings.SHARD_ASSIGNMENT_TTL,
+                            help='пауза после переключения, пока другие '
+                                 'процессы забывают старую привязку')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not settings.POST_SHARDS:
+            raise CommandError('Шарды не настроены (YATUBE_POST_SHARDS).')
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        if options['sync_reference']:
+            self.sync_reference()
+            self.sync_sequence()
+        if options['pin']:
+            self.pin()
+            return
+        moves = self.plan(options)
+        for author_id, (source, target) in moves.items():
+            self.stdout.write(f'автор {author_id}: {source} -> {target}')
+        if self.dry_run or not moves:
+            return
+
+        copied = {author_id: self.copy(author_id, source, target)
+                  for author_id, (source, target) in moves.items()}
+        for author_id, (source, target) in moves.items():
+            self.switch(author_id, target, keep=not options['rebalance'])
+        time.sleep(options['grace'])
+        for author_id, (source, target) in moves.items():
+            # за время паузы старый шард могли успеть поправить
+            self.copy(author_id, source, target, copied[author_id])
+            Post.objects.using(source).filter(author_id=author_id).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено авторов: {len(moves)}'
+        ))
+
+    def locations(self):
+        """Автор -> базы, где сейчас лежат его посты."""
+        found = {}
+        for alias in ['default', *settings.POST_SHARDS]:
+            author_ids = Post.objects.using(alias).values_list(
+                'author_id', flat=True).distinct()
+            for author_id in author_ids:
+                found.setdefault(author_id, set()).add(alias)
+        return found
+
+    def plan(self, options):
+        moves = {}
+        for author_id, aliases in self.locations().items():
+            if options['rebalance']:
+                target = hashed_shard(author_id)
+            elif author_id in options['authors']:
+                target = options['to'] or shard_for_author(author_id)
+            else:
+                continue
+            if target not in settings.POST_SHARDS:
+                raise CommandError(f'Неизвестный шард: {target}')
+            for source in aliases - {target}:
+                # у автора может быть несколько источников, хватит одного
+                # за проход, остальные уйдут следующим запуском
+                moves[author_id] = (source, target)
+                break
+        return moves
+
+    def copy(self, author_id, source, target, seen=None):
+        """Копирует посты автора и комментарии к ним.
+
+        Возвращает отпечатки содержимого скопированных строк. Повторный
+        проход с ними переносит только изменения источника с прошлого
+        прохода: новые строки вставляет, правленые обновляет, а удалённые
+        удаляет и в цели. Строки, которые цель получила сама после
+        переключения, при этом не трогаются.
+        """
+        seen = seen or {Post: {}, Comment: {}}
+        posts = Post.objects.using(source).filter(author_id=author_id)
+        comments = Comment.objects.using(source).filter(
+            post__author_id=author_id
+        )
+        dates = (Post._meta.get_field('pub_date'),
+                 Comment._meta.get_field('created'))
+        with preserve_auto_now_add(*dates):
+            for queryset in (posts, comments):
+                model = queryset.model
+                known = seen[model]
+                present = set()
+                batch = []
+                for obj in queryset.order_by('pk').iterator():
+                    present.add(obj.pk)
+                    digest = self.digest(obj)
+                    if obj.pk not in known:
+                        batch.append(obj)
+                    elif known[obj.pk] != digest:
+                        model.objects.using(target).filter(
+                            pk=obj.pk
+                        ).update(**{name: getattr(obj, name)
+                                    for name in CONTENT_FIELDS[model]})
+                    known[obj.pk] = digest
+                    if len(batch) >= self.batch_size:
+                        self.insert(model, target, batch)
+                        batch = []
+                self.insert(model, target, batch)
+                gone = set(known) - present
+                if gone:
+                    self.remove(model, target, gone)
+                    for pk in gone:
+                        del known[pk]
+        recount_comments(Post.objects.using(target).filter(
+            author_id=author_id
+        ))
+        return seen
+
+    def digest(self, obj):
+        return hash(tuple(str(getattr(obj, name))
+                          for name in CONTENT_FIELDS[type(obj)]))
+
+    def remove(self, model, alias, pks):
+        """Удаляет из цели строки, удалённые в источнике."""
+        with transaction.atomic(using=alias):
+            if model is Post:
+                raw_delete(Comment.objects.using(alias).filter(
+                    post_id__in=pks
+                ))
+            raw_delete(model.objects.using(alias).filter(pk__in=pks))
+
+    def insert(self, model, alias, batch):
+        if batch:
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).bulk_create(
+                    batch, ignore_conflicts=True
+                )
+
+    def switch(self, author_id, target, keep):
+        if keep:
+            AuthorShard.objects.update_or_create(
+                author_id=author_id, defaults={'alias': target}
+            )
+        else:
+            AuthorShard.objects.filter(author_id=author_id).delete()
+        cache.delete(assignment_key(author_id))
+
+    def pin(self):
+        for author_id, aliases in self.locations().items():
+            alias = sorted(aliases)[0]
+            self.stdout.write(f'автор {author_id} закреплён за {alias}')
+            if not self.dry_run:
+                AuthorShard.objects.update_or_create(
+                    author_id=author_id, defaults={'alias': alias}
+                )
+
+    def sync_reference(self):
+        for model in (User, Group):
+            rows = list(model.objects.all())
+            for alias in settings.POST_SHARDS:
+                self.stdout.write(f'{alias}: {model.__name__} ×{len(rows)}')
+                if not self.dry_run:
+                    model.objects.using(alias).bulk_create(
+                        rows, batch_size=self.batch_size,
+                        ignore_conflicts=True
+                    )
+
+    def sync_sequence(self):
+        """Новые id не должны совпасть с id, выданными до шардирования."""
+        top = max(
+            model.objects.using(alias).aggregate(top=Max('pk'))['top'] or 0
+            for model in (Post, Comment)
+            for alias in ['default', *settings.POST_SHARDS]
+        )
+        current = ShardSequence.objects.aggregate(top=Max('pk'))['top']
+        if top > (current or 0) and not self.dry_run:
+            ShardSequence.objects.create(pk=top)
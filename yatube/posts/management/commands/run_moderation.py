@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ModerationJob
+from posts.moderation import run_job
+
+
+class Command(BaseCommand):
+    help = ('Выполняет задачи модерации из очереди и дорабатывает '
+            'прерванные, например после перезапуска сервера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, nargs='*', default=[],
+                            help='id задач; по умолчанию все '
+                                 'незавершённые')
+
+    def handle(self, *args, **options):
+        jobs = ModerationJob.objects.filter(
+            status__in=[ModerationJob.QUEUED, ModerationJob.RUNNING]
+        )
+        if options['job']:
+            jobs = ModerationJob.objects.filter(pk__in=options['job'])
+        for job in jobs.order_by('created'):
+            run_job(job)
+            self.stdout.write(f'{job}: {job.get_status_display()}, '
+                              f'{job.done} из {job.total}')
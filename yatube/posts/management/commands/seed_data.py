@@ -0,0 +1,183 @@
+import os
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts.backfills import recount_comments
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import preserve_auto_now_add
+
+User = get_user_model()
+
+USER_PREFIX = 'seed_user_'
+GROUP_PREFIX = 'seed-group-'
+SEED_PASSWORD = 'seed-password'
+WORDS = (
+    'пост лента автор группа подписка комментарий картинка новость день '
+    'город кофе код django python тест сеть друг фото утро вечер море '
+    'книга кино музыка проект работа идея вопрос ответ'
+).split()
+
+
+def zipf_weights(count, alpha):
+    """Накопленные веса степенного закона: первые элементы популярнее."""
+    return list(accumulate(1 / (rank + 1) ** alpha for rank in range(count)))
+
+
+def make_text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу детерминированным синтетическим набором данных '
+            'для нагрузочных тестов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=3000)
+        parser.add_argument('--follows', type=int, default=10,
+                            help='среднее число подписок на пользователя')
+        parser.add_argument('--image-share', type=float, default=0.2)
+        parser.add_argument('--images', type=int, default=5,
+                            help='сколько разных картинок сгенерировать')
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--alpha', type=float, default=1.2,
+                            help='показатель степенного закона популярности')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true',
+                            help='удалить ранее засеянные данные')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now().replace(microsecond=0)
+        seeded = User.objects.filter(username__startswith=USER_PREFIX)
+        if options['clear']:
+            seeded.delete()
+            Group.objects.filter(slug__startswith=GROUP_PREFIX).delete()
+        elif seeded.exists():
+            raise CommandError('Данные уже засеяны, используйте --clear.')
+
+        started = time.monotonic()
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            group_ids = self.create_groups(options['groups'])
+            images = self.create_images(options['images'])
+            posts = self.create_posts(
+                options['posts'], user_ids, group_ids, images,
+                options['image_share'], options['days'], options['alpha']
+            )
+            self.create_comments(options['comments'], user_ids, posts,
+                                 options['alpha'])
+            self.create_follows(user_ids, options['follows'],
+                                options['alpha'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
+
+    def create_users(self, count):
+        password = make_password(SEED_PASSWORD)
+        User.objects.bulk_create((
+            User(username=f'{USER_PREFIX}{number}', password=password,
+                 first_name=make_text(self.rng, 1, 1))
+            for number in range(count)
+        ), batch_size=self.batch_size)
+        # порядок id совпадает с порядком популярности авторов
+        return list(User.objects.filter(
+            username__startswith=USER_PREFIX
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_groups(self, count):
+        Group.objects.bulk_create((
+            Group(title=make_text(self.rng, 1, 3),
+                  slug=f'{GROUP_PREFIX}{number}',
+                  description=make_text(self.rng, 5, 20))
+            for number in range(count)
+        ), batch_size=self.batch_size)
+        return list(Group.objects.filter(
+            slug__startswith=GROUP_PREFIX
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_images(self, count):
+        names = []
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'posts'),
+                    exist_ok=True)
+        for number in range(count):
+            name = f'posts/seed-{number}.jpg'
+            path = os.path.join(settings.MEDIA_ROOT, name)
+            if not os.path.exists(path):
+                color = tuple(self.rng.randrange(256) for _ in range(3))
+                Image.new('RGB', (640, 480), color).save(path, 'JPEG')
+            names.append(name)
+        return names
+
+    def create_posts(self, count, user_ids, group_ids, images, image_share,
+                     days, alpha):
+        weights = zipf_weights(len(user_ids), alpha)
+        authors = self.rng.choices(user_ids, cum_weights=weights, k=count)
+        span = timedelta(days=days).total_seconds()
+        posts = []
+        for author_id in authors:
+            has_group = group_ids and self.rng.random() < 0.7
+            has_image = images and self.rng.random() < image_share
+            posts.append(Post(
+                author_id=author_id,
+                group_id=self.rng.choice(group_ids) if has_group else None,
+                image=self.rng.choice(images) if has_image else '',
+                text=make_text(self.rng, 5, 60),
+                pub_date=self.now - timedelta(
+                    seconds=self.rng.uniform(0, span)
+                ),
+            ))
+        with preserve_auto_now_add(Post._meta.get_field('pub_date')):
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        return list(Post.objects.filter(
+            author_id__in=user_ids
+        ).order_by('id').values_list('id', 'pub_date'))
+
+    def create_comments(self, count, user_ids, posts, alpha):
+        if not posts:
+            return
+        weights = zipf_weights(len(posts), alpha)
+        targets = self.rng.choices(posts, cum_weights=weights, k=count)
+        comments = []
+        for post_id, pub_date in targets:
+            delay = self.rng.expovariate(1 / 3600)
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=self.rng.choice(user_ids),
+                text=make_text(self.rng, 2, 30),
+                created=min(self.now, pub_date + timedelta(seconds=delay)),
+            ))
+        with preserve_auto_now_add(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments,
+                                        batch_size=self.batch_size)
+        recount_comments(Post.objects.all())
+
+    def create_follows(self, user_ids, mean, alpha):
+        """Граф подписок со степенным распределением входящих степеней."""
+        if len(user_ids) < 2:
+            return
+        weights = zipf_weights(len(user_ids), alpha)
+        follows = []
+        for user_id in user_ids:
+            degree = min(len(user_ids) - 1,
+                         int(self.rng.expovariate(1 / mean)) + 1)
+            authors = set(self.rng.choices(user_ids, cum_weights=weights,
+                                           k=degree))
+            authors.discard(user_id)
+            follows.extend(Follow(user_id=user_id, author_id=author_id)
+                           for author_id in sorted(authors))
+        Follow.objects.bulk_create(follows, batch_size=self.batch_size)
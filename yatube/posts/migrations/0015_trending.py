@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_post_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата подписки'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='AuthorActivity',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментариев к постам')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Новых подписчиков')),
+                ('score', models.FloatField(db_index=True, default=0, verbose_name='Активность')),
+                ('computed', models.DateTimeField(verbose_name='Посчитано')),
+            ],
+            options={
+                'verbose_name': 'Активность автора',
+                'verbose_name_plural': 'Активность авторов',
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('authors', models.PositiveIntegerField(default=0, verbose_name='Авторов')),
+                ('score', models.FloatField(db_index=True, default=0, verbose_name='Активность')),
+                ('computed', models.DateTimeField(verbose_name='Посчитано')),
+            ],
+            options={
+                'verbose_name': 'Активность группы',
+                'verbose_name_plural': 'Активность групп',
+                'ordering': ['-score'],
+            },
+        ),
+    ]
@@ -22,7 +22,7 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
-    pub_date = models.DateTimeField(auto_now_add=True,
+    pub_date = models.DateTimeField(auto_now_add=True, db_index=True,
                                     verbose_name='Дата публикации')
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
@@ -37,6 +37,13 @@ class Post(models.Model):
     image = models.ImageField('Картинка',
                               upload_to='posts/',
                               blank=True)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0,
+                                                editable=False)
+    view_count = models.PositiveIntegerField('Просмотров', default=0,
+                                             editable=False)
+    # ключ сортировки затухающего счёта просмотров, см. posts.popularity
+    popularity = models.FloatField('Популярность', null=True, blank=True,
+                                   db_index=True, editable=False)
 
     class Meta:
         ordering = ['-pub_date']
@@ -60,11 +67,16 @@ class Comment(models.Model):
                             help_text='Добавьте комментарий')
     created = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата публикования'
     )
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -77,6 +89,8 @@ class Follow(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                verbose_name='На кого подписка',
                                related_name='following')
+    created = models.DateTimeField('Дата подписки', auto_now_add=True,
+                                   db_index=True)
 
     class Meta:
         constraints = [
@@ -84,3 +98,191 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_follow'
             )
         ]
+
+
+class AuthorShard(models.Model):
+    """Явная привязка автора к шарду, важнее хеша от author_id."""
+    author = models.OneToOneField(User, on_delete=models.CASCADE,
+                                  verbose_name='Автор',
+                                  related_name='shard')
+    alias = models.CharField('Шард', max_length=50)
+
+    class Meta:
+        verbose_name = 'Шард автора'
+        verbose_name_plural = 'Шарды авторов'
+
+    def __str__(self):
+        return f'{self.author_id} -> {self.alias}'
+
+
+class ShardSequence(models.Model):
+    """Счётчик глобально уникальных id для постов и комментариев в шардах."""
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, вынесенный из горячей таблицы командой archive_posts.
+
+    id совпадает с id исходного поста, чтобы адреса не менялись.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='archived_posts')
+    group = models.ForeignKey(Group,
+                              on_delete=models.SET_NULL,
+                              blank=True, null=True,
+                              related_name='archived_posts',
+                              verbose_name='Группа')
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0,
+                                                editable=False)
+    archived_at = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost,
+                             on_delete=models.CASCADE,
+                             verbose_name='Пост',
+                             related_name='comments')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='archived_comments')
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикования')
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='archived_comment_post_idx'),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ModerationJob(models.Model):
+    """Фоновая массовая операция из админки и её прогресс."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'готово'),
+        (FAILED, 'ошибка'),
+    ]
+    ACTIONS = [
+        ('delete_posts', 'удаление постов'),
+        ('move_posts', 'перенос постов в группу'),
+        ('delete_author_posts', 'удаление постов авторов'),
+        ('delete_author_comments', 'удаление комментариев авторов'),
+        ('purge_authors', 'очистка всего содержимого авторов'),
+    ]
+    action = models.CharField('Действие', max_length=50, choices=ACTIONS)
+    params = models.TextField('Параметры', default='{}')
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    total = models.PositiveIntegerField('Всего строк', default=0)
+    done = models.PositiveIntegerField('Обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL,
+                                   null=True, blank=True,
+                                   verbose_name='Запустил',
+                                   related_name='+')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Задача модерации'
+        verbose_name_plural = 'Задачи модерации'
+
+    def __str__(self):
+        return f'{self.get_action_display()} #{self.pk}'
+
+
+class GroupActivity(models.Model):
+    """Активность группы за окно TRENDING_WINDOW, см. posts.trending."""
+    group = models.OneToOneField(Group, on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name='activity',
+                                 verbose_name='Группа')
+    posts = models.PositiveIntegerField('Постов', default=0)
+    comments = models.PositiveIntegerField('Комментариев', default=0)
+    authors = models.PositiveIntegerField('Авторов', default=0)
+    score = models.FloatField('Активность', default=0, db_index=True)
+    computed = models.DateTimeField('Посчитано')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Активность группы'
+        verbose_name_plural = 'Активность групп'
+
+    def __str__(self):
+        return f'{self.group_id}: {self.score}'
+
+
+class AuthorActivity(models.Model):
+    """Активность автора за окно TRENDING_WINDOW, см. posts.trending."""
+    author = models.OneToOneField(User, on_delete=models.CASCADE,
+                                  primary_key=True,
+                                  related_name='activity',
+                                  verbose_name='Автор')
+    posts = models.PositiveIntegerField('Постов', default=0)
+    comments = models.PositiveIntegerField('Комментариев к постам',
+                                           default=0)
+    followers = models.PositiveIntegerField('Новых подписчиков', default=0)
+    score = models.FloatField('Активность', default=0, db_index=True)
+    computed = models.DateTimeField('Посчитано')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Активность автора'
+        verbose_name_plural = 'Активность авторов'
+
+    def __str__(self):
+        return f'{self.author_id}: {self.score}'
+
+
+class Recommendation(models.Model):
+    """Автор, на которого стоит подписаться, см. posts.recommendations."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             verbose_name='Пользователь',
+                             related_name='recommendations')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='+')
+    score = models.PositiveIntegerField('Подписан из подписок')
+    computed = models.DateTimeField('Посчитано', db_index=True)
+
+    class Meta:
+        ordering = ['-score', 'author']
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_recommendation'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score'],
+                         name='recommendation_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
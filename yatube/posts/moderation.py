@@ -0,0 +1,179 @@
+"""Массовые действия модерации порциями и в фоне.
+
+Админка создаёт ModerationJob и ставит её в очередь фоновых задач
+(core.tasks), прерванные задачи дорабатывает команда run_moderation.
+Каждая порция — своя транзакция в одной базе: объекты не грузятся
+в память целиком, как при штатном удалении из админки, а прогресс
+виден в списке задач.
+Посты и комментарии удаляются без сигналов, поэтому счётчики
+комментариев, картинки и кеш лент обновляются здесь же.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+
+from .backfills import recount_comments
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                     ModerationJob, Post)
+from .utils import invalidate_feed_cache, raw_delete
+
+logger = logging.getLogger(__name__)
+
+
+def post_aliases():
+    return settings.POST_SHARDS or ['default']
+
+
+def sources(model, archived_model, **filters):
+    """Querysets модели во всех шардах и её архивной пары в архиве."""
+    querysets = [model.objects.using(alias).filter(**filters)
+                 for alias in post_aliases()]
+    querysets.append(archived_model.objects.using(
+        settings.ARCHIVE_DATABASE
+    ).filter(**filters))
+    return querysets
+
+
+def image_in_use(name):
+    """Ссылается ли на файл ещё какой-нибудь пост, в том числе архивный.
+
+    Один файл бывает у многих постов: seed_data и import_data берут
+    готовые пути, reshard копирует строки между шардами.
+    """
+    return any(queryset.exists()
+               for queryset in sources(Post, ArchivedPost, image=name))
+
+
+def delete_posts(queryset, batch_size):
+    """Удаляет посты с комментариями, картинками и их миниатюрами."""
+    alias = queryset.db
+    comments = queryset.model._meta.get_field('comments').related_model
+    while True:
+        rows = list(queryset.order_by('pk').values_list(
+            'pk', 'image'
+        )[:batch_size])
+        if not rows:
+            return
+        pks = [pk for pk, _ in rows]
+        with transaction.atomic(using=alias):
+            raw_delete(comments.objects.using(alias).filter(post_id__in=pks))
+            raw_delete(queryset.model.objects.using(alias).filter(pk__in=pks))
+        for _, image in rows:
+            if image:
+                delete_thumbnails(image, delete_file=False)
+                if not image_in_use(image):
+                    default_storage.delete(image)
+        yield len(rows)
+
+
+def delete_comments(queryset, batch_size):
+    """Удаляет комментарии и пересчитывает счётчики их постов."""
+    alias = queryset.db
+    posts = queryset.model._meta.get_field('post').related_model
+    while True:
+        rows = list(queryset.order_by('pk').values_list(
+            'pk', 'post_id'
+        )[:batch_size])
+        if not rows:
+            return
+        with transaction.atomic(using=alias):
+            raw_delete(queryset.model.objects.using(alias).filter(
+                pk__in=[pk for pk, _ in rows]
+            ))
+            recount_comments(posts.objects.using(alias).filter(
+                pk__in={post_id for _, post_id in rows}
+            ))
+        yield len(rows)
+
+
+def delete_follows(queryset, batch_size):
+    while True:
+        pks = list(queryset.order_by('pk').values_list(
+            'pk', flat=True
+        )[:batch_size])
+        if not pks:
+            return
+        Follow.objects.filter(pk__in=pks).delete()
+        yield len(pks)
+
+
+def move_posts(post_ids, group_id, batch_size):
+    for start in range(0, len(post_ids), batch_size):
+        chunk = post_ids[start:start + batch_size]
+        for alias in post_aliases():
+            Post.objects.using(alias).filter(pk__in=chunk).update(
+                group_id=group_id
+            )
+        yield len(chunk)
+
+
+def plan(job):
+    """Генераторы порций задачи и общее число строк."""
+    params = json.loads(job.params)
+    authors = params.get('authors', [])
+    steps = []
+    if job.action == 'move_posts':
+        chunks = move_posts(params['posts'], params['group'],
+                            settings.MODERATION_BATCH_SIZE)
+        return [chunks], len(params['posts'])
+    if job.action == 'delete_posts':
+        steps += [(queryset, delete_posts) for queryset in
+                  sources(Post, ArchivedPost, pk__in=params['posts'])]
+    if job.action in ('delete_author_posts', 'purge_authors'):
+        steps += [(queryset, delete_posts) for queryset in
+                  sources(Post, ArchivedPost, author_id__in=authors)]
+    if job.action in ('delete_author_comments', 'purge_authors'):
+        steps += [(queryset, delete_comments) for queryset in
+                  sources(Comment, ArchivedComment, author_id__in=authors)]
+    if job.action == 'purge_authors':
+        follows = Follow.objects.filter(Q(user_id__in=authors)
+                                        | Q(author_id__in=authors))
+        steps.append((follows, delete_follows))
+    total = sum(queryset.count() for queryset, _ in steps)
+    return [handler(queryset, settings.MODERATION_BATCH_SIZE)
+            for queryset, handler in steps], total
+
+
+def run_job(job):
+    """Выполняет задачу, после каждой порции сохраняя прогресс.
+
+    Повторный запуск прерванной задачи продолжает с оставшихся строк,
+    прогресс при этом считается заново.
+    """
+    job.status = ModerationJob.RUNNING
+    job.done = 0
+    job.error = ''
+    job.save(update_fields=['status', 'done', 'error'])
+    try:
+        steps, job.total = plan(job)
+        job.save(update_fields=['total'])
+        for chunks in steps:
+            for count in chunks:
+                job.done += count
+                job.save(update_fields=['done'])
+        job.status = ModerationJob.DONE
+    except Exception as error:
+        logger.exception('Задача модерации %s упала', job.pk)
+        job.status = ModerationJob.FAILED
+        job.error = repr(error)
+    finally:
+        # даже после ошибки часть строк уже изменена
+        invalidate_feed_cache()
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished'])
+    return job
+
+
+def start(job):
+    """Ставит задачу в очередь или, без MODERATION_BACKGROUND, выполняет."""
+    if not settings.MODERATION_BACKGROUND:
+        return run_job(job)
+    from .tasks import run_moderation
+    run_moderation.enqueue(args=[job.pk], key=f'moderation:{job.pk}')
+    return job
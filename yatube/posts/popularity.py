@@ -0,0 +1,153 @@
+"""Счётчик просмотров постов и рейтинг популярности.
+
+Просмотр не пишет в базу: record_view копит приращения в памяти
+процесса, а flush раз в VIEWS_FLUSH_INTERVAL секунд или при
+VIEWS_FLUSH_SIZE постах в буфере записывает их одним UPDATE на пачку.
+
+Популярность — число просмотров, которое затухает вдвое за
+POPULARITY_HALF_LIFE секунд. В Post.popularity лежит ln(счёт) + λ·t на
+момент последнего обновления: порядок по этому полю совпадает с порядком
+по счёту, затухшему к любому общему моменту, поэтому при сбросе
+пересчитываются только просмотренные посты, а остальные не трогаются.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, router, transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+
+from core.db.routers import without_pin
+
+from .models import Post
+from .utils import feed_cache_version
+
+logger = logging.getLogger(__name__)
+
+POPULAR_CACHE_KEY = 'popular_posts'
+# по 5 параметров SQL на пост, держимся ниже лимита SQLite
+UPDATE_CHUNK = 150
+
+_lock = threading.Lock()
+_buffer = Counter()
+_last_flush = time.monotonic()
+
+
+def record_view(post):
+    # пост мог прийти с реплики, а писать нужно в его основную базу;
+    # сам просмотр не должен уводить чтение клиента с реплик
+    with without_pin():
+        alias = router.db_for_write(Post, instance=post)
+    with _lock:
+        _buffer[alias, post.pk] += 1
+        due = (len(_buffer) >= settings.VIEWS_FLUSH_SIZE
+               or time.monotonic() - _last_flush
+               >= settings.VIEWS_FLUSH_INTERVAL)
+    if due:
+        flush()
+
+
+def bump(rank, views, now):
+    """Новое значение popularity после `views` просмотров в момент `now`."""
+    moment = now * math.log(2) / settings.POPULARITY_HALF_LIFE
+    score = views
+    if rank is not None:
+        score += math.exp(rank - moment)
+    return math.log(score) + moment
+
+
+def write(alias, views, now):
+    ranks = dict(Post.objects.using(alias).filter(
+        pk__in=views
+    ).values_list('pk', 'popularity'))
+    if not ranks:
+        return
+    Post.objects.using(alias).filter(pk__in=ranks).update(
+        view_count=F('view_count') + Case(
+            *[When(pk=pk, then=Value(views[pk])) for pk in ranks],
+            output_field=IntegerField()
+        ),
+        popularity=Case(
+            *[When(pk=pk, then=Value(bump(rank, views[pk], now)))
+              for pk, rank in ranks.items()],
+            output_field=FloatField()
+        ),
+    )
+
+
+def flush():
+    """Пишет накопленные просмотры, возвращает число записанных."""
+    global _last_flush
+    with _lock:
+        pending = dict(_buffer)
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    by_alias = {}
+    for (alias, pk), views in pending.items():
+        by_alias.setdefault(alias, {})[pk] = views
+    chunks = []
+    for alias, views in by_alias.items():
+        pks = list(views)
+        for start in range(0, len(pks), UPDATE_CHUNK):
+            chunk = pks[start:start + UPDATE_CHUNK]
+            chunks.append((alias, {pk: views[pk] for pk in chunk}))
+    now = time.time()
+    written = 0
+    for number, (alias, views) in enumerate(chunks):
+        try:
+            with transaction.atomic(using=alias):
+                write(alias, views, now)
+        except DatabaseError:
+            # незаписанное вернётся в буфер до следующего сброса
+            logger.exception('Не удалось записать просмотры')
+            with _lock:
+                for rest_alias, rest in chunks[number:]:
+                    _buffer.update({(rest_alias, pk): count
+                                    for pk, count in rest.items()})
+            break
+        written += sum(views.values())
+    return written
+
+
+atexit.register(flush)
+
+
+def popular_ids():
+    """(id, база) самых популярных постов, кешируются на
+    POPULAR_CACHE_SECONDS."""
+    # версия лент меняется после массовых удалений модерации
+    key = f'{POPULAR_CACHE_KEY}:{feed_cache_version()}'
+    ids = cache.get(key)
+    if ids is None:
+        rows = []
+        for alias in settings.POST_SHARDS or ['default']:
+            rows += [
+                (rank, pk, alias)
+                for rank, pk in Post.objects.using(alias).filter(
+                    popularity__isnull=False
+                ).order_by('-popularity').values_list(
+                    'popularity', 'pk'
+                )[:settings.POPULAR_LIMIT]
+            ]
+        rows.sort(reverse=True)
+        ids = [(pk, alias) for _, pk, alias in rows[:settings.POPULAR_LIMIT]]
+        cache.set(key, ids, settings.POPULAR_CACHE_SECONDS)
+    return ids
+
+
+def popular_posts(ids):
+    """Посты в порядке `ids`, по запросу на базу."""
+    by_alias = {}
+    for pk, alias in ids:
+        by_alias.setdefault(alias, []).append(pk)
+    found = {}
+    for alias, pks in by_alias.items():
+        found.update(Post.objects.using(alias).select_related(
+            'author', 'group'
+        ).in_bulk(pks))
+    return [found[pk] for pk, _ in ids if pk in found]
@@ -0,0 +1,155 @@
+"""Рекомендации подписок: авторы, на которых подписаны ваши подписки.
+
+Вес кандидата — число ваших подписок, подписанных на него, то есть
+размер пересечения ваших подписок с его подписчиками. Запросом к Follow
+на каждую страницу это не посчитать, поэтому команда
+build_recommendations загружает весь граф подписок в массивы CSR и
+пишет RECOMMEND_TOP_K лучших авторов каждого пользователя
+в Recommendation. Когда пользователь подписывается или отписывается,
+его строки пересчитываются задачей refresh_recommendations одним
+запросом по его подпискам; изменения копятся RECOMMEND_REFRESH_DELAY
+секунд. Рекомендации подписчиков этого пользователя обновит только
+следующий полный пересчёт.
+"""
+import heapq
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Follow, Recommendation
+
+
+class FollowGraph:
+    """Граф подписок в CSR на плотных номерах пользователей.
+
+    ids[i] — id пользователя с номером i, номера его подписок лежат
+    в indices[indptr[i]:indptr[i + 1]] по возрастанию.
+    """
+
+    def __init__(self, ids, indptr, indices):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def load(cls, chunk_size=10000):
+        users, authors = array('q'), array('q')
+        pairs = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id'
+        ).iterator(chunk_size=chunk_size)
+        for user_id, author_id in pairs:
+            users.append(user_id)
+            authors.append(author_id)
+        ids = array('q', sorted(set(users).union(authors)))
+        number = {pk: index for index, pk in enumerate(ids)}
+        indptr = array('q', bytes(8 * (len(ids) + 1)))
+        for user_id in users:
+            indptr[number[user_id] + 1] += 1
+        for index in range(len(ids)):
+            indptr[index + 1] += indptr[index]
+        # пары отсортированы по пользователю, так что строки уже подряд
+        indices = array('q', [number[author_id] for author_id in authors])
+        return cls(ids, indptr, indices)
+
+    def following(self, index):
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def top(self, index, k):
+        """[(вес, номер автора)] лучших k кандидатов для номера index."""
+        followed = self.following(index)
+        counts = Counter()
+        for author in followed:
+            counts.update(self.following(author))
+        seen = set(followed)
+        seen.add(index)
+        # при равном весе выше автор с меньшим id, как в refresh_user
+        best = heapq.nlargest(k, ((count, -author)
+                                  for author, count in counts.items()
+                                  if author not in seen))
+        return [(count, -author) for count, author in best]
+
+
+def save(rows, user_ids):
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(rows)
+
+
+def rebuild(k=None, batch_size=None):
+    """Полный пересчёт, возвращает число пользователей с рекомендациями."""
+    k = k or settings.RECOMMEND_TOP_K
+    batch_size = batch_size or settings.RECOMMEND_BATCH_SIZE
+    graph = FollowGraph.load()
+    now = timezone.now()
+    rows, user_ids, total = [], [], 0
+    for index, user_id in enumerate(graph.ids):
+        best = graph.top(index, k)
+        if not best:
+            continue
+        user_ids.append(user_id)
+        rows += [Recommendation(user_id=user_id, author_id=graph.ids[author],
+                                score=score, computed=now)
+                 for score, author in best]
+        if len(user_ids) >= batch_size:
+            save(rows, user_ids)
+            total += len(user_ids)
+            rows, user_ids = [], []
+    if user_ids:
+        save(rows, user_ids)
+        total += len(user_ids)
+    # у кого кандидатов не осталось; строки refresh_user новее и уцелеют
+    Recommendation.objects.filter(computed__lt=now).delete()
+    return total
+
+
+def refresh_user(user_id, k=None):
+    """Пересчёт одного пользователя запросом к Follow."""
+    followed = Follow.objects.filter(user_id=user_id).values('author_id')
+    best = Follow.objects.filter(user_id__in=followed).exclude(
+        author_id__in=followed
+    ).exclude(author_id=user_id).order_by().values('author_id').annotate(
+        score=Count('pk')
+    ).order_by('-score', 'author_id').values_list(
+        'author_id', 'score'
+    )[:k or settings.RECOMMEND_TOP_K]
+    now = timezone.now()
+    save([Recommendation(user_id=user_id, author_id=author_id, score=score,
+                         computed=now)
+          for author_id, score in best], [user_id])
+
+
+def follows_changed(user_id, followed=()):
+    """Вызывается после изменения подписок пользователя.
+
+    Новые подписки сразу убираются из рекомендаций, а пересчёт
+    ставится в очередь после коммита, один на RECOMMEND_REFRESH_DELAY
+    секунд.
+    """
+    if followed:
+        Recommendation.objects.filter(user_id=user_id,
+                                      author_id__in=followed).delete()
+    transaction.on_commit(lambda: schedule_refresh(user_id))
+
+
+def schedule_refresh(user_id):
+    from .tasks import refresh_recommendations
+    delay = settings.RECOMMEND_REFRESH_DELAY
+    slot = (int(time.time()) // delay + 1) * delay
+    return refresh_recommendations.enqueue(
+        args=[user_id],
+        run_at=datetime.fromtimestamp(slot, tz=timezone.utc),
+        key=f'recommendations:{user_id}:{slot}',
+    )
+
+
+def recommended_authors(user, exclude=None, limit=None):
+    recommendations = user.recommendations.select_related('author')
+    if exclude is not None:
+        recommendations = recommendations.exclude(author=exclude)
+    return recommendations[:limit or settings.RECOMMEND_SHOWN]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.db.routers import mark_write
+
+from . import sharding
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+POST_FIELD = Comment._meta.get_field('post')
+ARCHIVE_MODELS = (ArchivedPost, ArchivedComment)
+
+
+class ArchiveRouter:
+    """Архивные посты и комментарии живут в ARCHIVE_DATABASE."""
+
+    def db_for_read(self, model, **hints):
+        if model in ARCHIVE_MODELS:
+            return settings.ARCHIVE_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # пользователи и группы зеркалируются и в отдельный архив
+        if isinstance(obj1, ARCHIVE_MODELS) or isinstance(obj2,
+                                                          ARCHIVE_MODELS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'posts' and model_name in ('archivedpost',
+                                                   'archivedcomment'):
+            return db == settings.ARCHIVE_DATABASE
+        return None
+
+
+class ShardRouter:
+    """Направляет посты и комментарии в шард их автора.
+
+    Запросы без подсказки-экземпляра (Post.objects.filter(...)) роутер
+    не угадывает, для них есть функции из posts.sharding.
+    """
+
+    def shard_for(self, model, instance):
+        if (isinstance(instance, (Post, Comment))
+                and not instance._state.adding):
+            return instance._state.db
+        if isinstance(instance, Post) and instance.author_id:
+            return sharding.shard_for_author(instance.author_id)
+        if isinstance(instance, Comment) and POST_FIELD.is_cached(instance):
+            # комментарий пишется туда же, где лежит его пост
+            return instance.post._state.db
+        if isinstance(instance, User) and model is Post:
+            return sharding.shard_for_author(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if not sharding.sharding_enabled() or model not in (Post, Comment):
+            return None
+        return self.shard_for(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        if not sharding.sharding_enabled() or model not in (Post, Comment):
+            return None
+        alias = self.shard_for(model, hints.get('instance'))
+        if alias is not None:
+            mark_write()
+        return alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # пользователи и группы есть в каждом шарде
+        if sharding.sharding_enabled():
+            return True
+        return None
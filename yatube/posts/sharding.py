@@ -0,0 +1,142 @@
+"""Шардирование постов и комментариев по автору.
+
+Посты автора и все комментарии к ним живут в одном шарде из
+POST_SHARDS. Шард выбирается по явной привязке AuthorShard, а без неё —
+по стабильному хешу author_id. Пользователи и группы зеркалируются во все
+шарды, чтобы работали внешние ключи и select_related. Подписки, привязки
+и счётчик id остаются в основной базе. Пока POST_SHARDS пуст, функции
+модуля возвращают обычные querysets.
+"""
+import hashlib
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .cursors import row_key
+from .models import AuthorShard, Post, ShardSequence
+
+
+def sharding_enabled():
+    return bool(settings.POST_SHARDS)
+
+
+def hashed_shard(author_id, shards=None):
+    """Стабильный между процессами и перезапусками выбор шарда."""
+    shards = shards or settings.POST_SHARDS
+    digest = hashlib.md5(str(author_id).encode()).digest()
+    return shards[int.from_bytes(digest[:8], 'big') % len(shards)]
+
+
+def assignment_key(author_id):
+    return f'author_shard:{author_id}'
+
+
+def shard_for_author(author_id):
+    if not sharding_enabled():
+        return 'default'
+    alias = cache.get(assignment_key(author_id))
+    if alias is None:
+        alias = AuthorShard.objects.filter(
+            author_id=author_id
+        ).values_list('alias', flat=True).first()
+        alias = alias or hashed_shard(author_id)
+        cache.set(assignment_key(author_id), alias,
+                  settings.SHARD_ASSIGNMENT_TTL)
+    return alias
+
+
+def next_id():
+    """Глобально уникальный id: автоинкремент в каждом шарде свой."""
+    return ShardSequence.objects.create().pk
+
+
+class MergedFeed:
+    """Лента из нескольких шардов для Paginator.
+
+    Каждый queryset уже отсортирован по убыванию даты, страница
+    собирается k-путевым слиянием первых `stop` строк каждого шарда.
+    """
+    ordered = True
+
+    def __init__(self, querysets, date_field='pub_date'):
+        self.querysets = querysets
+        self.date_field = date_field
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def replace(self, querysets):
+        return MergedFeed(querysets, self.date_field)
+
+    def head(self, size):
+        return self[:size]
+
+    def sort_key(self, obj):
+        return row_key(obj, self.date_field)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        parts = [list(queryset[:stop]) for queryset in self.querysets]
+        merged = heapq.merge(*parts, key=self.sort_key, reverse=True)
+        return list(islice(merged, start, stop))
+
+
+def feed(queryset):
+    """Queryset ленты или его слияние по всем шардам."""
+    if not sharding_enabled():
+        return queryset
+    return MergedFeed([queryset.using(alias)
+                       for alias in settings.POST_SHARDS])
+
+
+def posts_by_authors(author_ids):
+    """Посты заданных авторов, запрос идёт только в их шарды."""
+    posts = Post.objects.select_related('author', 'group')
+    if not sharding_enabled():
+        return posts.filter(author_id__in=author_ids)
+    by_shard = {}
+    for author_id in author_ids:
+        by_shard.setdefault(shard_for_author(author_id), []).append(
+            author_id
+        )
+    return MergedFeed([
+        posts.using(alias).filter(author_id__in=ids)
+        for alias, ids in by_shard.items()
+    ])
+
+
+def locate_posts(post_ids):
+    """Словарь id поста -> база, где он лежит; ненайденных нет в ответе."""
+    found, unknown = {}, set(post_ids)
+    for alias in settings.POST_SHARDS or ['default']:
+        if not unknown:
+            break
+        pks = set(Post.objects.using(alias).filter(
+            pk__in=unknown
+        ).values_list('pk', flat=True))
+        found.update(dict.fromkeys(pks, alias))
+        unknown -= pks
+    return found
+
+
+def get_post_or_404(post_id, queryset=None):
+    """Пост по id: без шардов — обычный запрос, с шардами — поиск по всем."""
+    queryset = queryset if queryset is not None else Post.objects.all()
+    if not sharding_enabled():
+        try:
+            return queryset.get(pk=post_id)
+        except Post.DoesNotExist:
+            raise Http404
+    for alias in settings.POST_SHARDS:
+        post = queryset.using(alias).filter(pk=post_id).first()
+        if post is not None:
+            return post
+    raise Http404
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Comment, Follow, Group, Post
+from .following import invalidate as invalidate_following
+from .recommendations import follows_changed
+from .sharding import next_id, sharding_enabled
+from .tasks import make_thumbnails
+
+User = get_user_model()
+
+
+def mirror_aliases():
+    """Базы, где нужны копии пользователей и групп."""
+    aliases = list(settings.POST_SHARDS)
+    if settings.ARCHIVE_DATABASE != 'default':
+        aliases.append(settings.ARCHIVE_DATABASE)
+    return aliases
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def mirror_reference(sender, instance, using, **kwargs):
+    """Копия пользователя или группы во всех шардах и в архиве."""
+    if using != 'default':
+        return
+    values = {field.attname: getattr(instance, field.attname)
+              for field in sender._meta.concrete_fields}
+    for alias in mirror_aliases():
+        manager = sender._base_manager.using(alias)
+        if not manager.filter(pk=instance.pk).update(**values):
+            manager.bulk_create([sender(**values)])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def delete_reference(sender, instance, using, **kwargs):
+    """Удаление из шардов, каскадом уходят и посты автора."""
+    if using != 'default':
+        return
+    for alias in mirror_aliases():
+        sender._base_manager.using(alias).filter(pk=instance.pk).delete()
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def assign_shard_id(sender, instance, **kwargs):
+    """Id нового поста или комментария берётся из общего счётчика."""
+    if sharding_enabled() and instance.pk is None:
+        instance.pk = next_id()
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, using, **kwargs):
+    if created:
+        Post.objects.using(using).filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, using, **kwargs):
+    Post.objects.using(using).filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, **kwargs):
+    """Миниатюры новой картинки готовит воркер, а не первый читатель."""
+    if instance.image:
+        key = f'thumbnails:{instance.pk}:{instance.image.name}'
+        transaction.on_commit(
+            lambda: make_thumbnails.enqueue(args=[instance.pk], key=key)
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(sender, instance, created, **kwargs):
+    if created:
+        invalidate_following(instance.user_id)
+        follows_changed(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_removed(sender, instance, **kwargs):
+    invalidate_following(instance.user_id)
+    follows_changed(instance.user_id)
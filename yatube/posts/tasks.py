@@ -0,0 +1,48 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .models import ModerationJob, Post
+from .moderation import run_job
+from .recommendations import refresh_user
+from .sharding import locate_posts
+from .trending import aggregate, schedule
+
+# те же размеры и опции, что у {% thumbnail %} в шаблонах постов
+THUMBNAILS = [
+    ('300x200', {'crop': 'center', 'upscale': True}),
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+
+
+@task(priority=-10)
+def make_thumbnails(post_id):
+    """Готовит миниатюры заранее, чтобы лента не резала картинки сама."""
+    alias = locate_posts([post_id]).get(post_id)
+    if alias is None:
+        return
+    post = Post.objects.using(alias).get(pk=post_id)
+    if not post.image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+@task(priority=10, max_attempts=3)
+def run_moderation(job_id):
+    job = ModerationJob.objects.filter(pk=job_id).first()
+    if job is not None and job.status != ModerationJob.DONE:
+        run_job(job)
+
+
+@task(priority=-5)
+def aggregate_trending():
+    """Пересчитывает активность групп и авторов и ставит себя снова."""
+    # следующий запуск ставится до пересчёта, чтобы ошибка не оборвала цепочку
+    schedule()
+    aggregate()
+
+
+@task(priority=-5)
+def refresh_recommendations(user_id):
+    refresh_user(user_id)
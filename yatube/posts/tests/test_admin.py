@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', '', 'password')
+        cls.groups = [Group.objects.create(title=f'Группа {number}',
+                                           slug=f'group-{number}',
+                                           description='')
+                      for number in range(3)]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for number in range(count):
+            author = User.objects.create_user(
+                username=f'user{User.objects.count()}'
+            )
+            post = Post.objects.create(author=author, text='Текст',
+                                       group=self.groups[number % 3])
+            Comment.objects.create(post=post, author=author, text='Ответ')
+            Follow.objects.create(user=author, author=self.admin)
+
+    def queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк на странице."""
+        for model in ('post', 'comment', 'follow'):
+            self.add_rows(2)
+            few = self.queries(model)
+            self.add_rows(8)
+            self.assertEqual(self.queries(model), few, model)
+
+    def test_change_form_has_no_user_or_post_select(self):
+        self.add_rows(1)
+        comment = Comment.objects.get()
+        response = self.client.get(
+            reverse('admin:posts_comment_change', args=[comment.pk])
+        )
+        self.assertContains(response, 'vForeignKeyRawIdAdminField', count=2)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..management.commands.archive_posts import Command as ArchiveCommand
+from ..models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+class LateCommentCommand(ArchiveCommand):
+    """Комментарий приходит между копией пачки и её удалением."""
+
+    def archive(self, target, posts, comments):
+        super().archive(target, posts, comments)
+        for post in posts:
+            Comment.objects.create(post=post, author=post.author,
+                                   text=f'Поздний к {post.pk}')
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='veteran')
+        now = timezone.now()
+        for days in (0, 1, 400, 500, 600):
+            post = Post.objects.create(author=cls.user, text=f'{days} дней')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=days)
+            )
+        cls.old = Post.objects.get(text='500 дней')
+        Comment.objects.create(post=cls.old, author=cls.user,
+                               text='Старый комментарий')
+
+    def setUp(self):
+        self.client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def archive(self, *extra):
+        call_command('archive_posts', '--days', '365', '--batch-size', '2',
+                     *extra, stdout=StringIO())
+
+    def test_old_posts_move_with_comments(self):
+        self.archive('--dry-run')
+        self.assertEqual(Post.objects.count(), 5)
+        self.archive()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        comment = ArchivedComment.objects.get()
+        self.assertEqual(comment.post_id, self.old.pk)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedPost.objects.get(pk=self.old.pk).pub_date,
+                         self.old.pub_date)
+
+    def test_late_comments_are_archived(self):
+        call_command(LateCommentCommand(), '--days', '365',
+                     '--batch-size', '2', stdout=StringIO())
+        self.assertFalse(Comment.objects.filter(
+            post__pub_date__lt=timezone.now() - timedelta(days=365)
+        ).exists())
+        self.assertEqual(ArchivedComment.objects.filter(
+            text__startswith='Поздний'
+        ).count(), 3)
+        self.assertEqual(
+            ArchivedPost.objects.get(pk=self.old.pk).comment_count, 2
+        )
+        # удаление без сигналов не трогает счётчики оставшихся постов
+        self.assertEqual(Post.objects.filter(comment_count=0).count(), 2)
+
+    def test_post_detail_falls_through_to_archive(self):
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotIn('form', response.context)
+
+    def test_profile_chains_hot_and_archived(self):
+        self.archive()
+        response = self.client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        texts = [post.text for post in response.context['page_obj']]
+        self.assertEqual(texts, ['0 дней', '1 дней', '400 дней',
+                                 '500 дней', '600 дней'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
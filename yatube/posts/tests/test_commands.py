@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.benchmarks import load_results
+from ..models import Comment, Follow, Group, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_BENCHMARKS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SEED = ['--users', '20', '--groups', '3', '--posts', '60',
+        '--comments', '80', '--follows', '4', '--images', '2']
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   BENCHMARKS_DIR=TEMP_BENCHMARKS_DIR)
+class SeedAndBenchmarkTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_BENCHMARKS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def tearDown(self):
+        cache.clear()
+
+    def seed(self, *extra):
+        call_command('seed_data', *SEED, *extra, stdout=StringIO())
+        posts = Post.objects.order_by('id')
+        return list(posts.values_list('text', flat=True))
+
+    def test_seed_data(self):
+        """Заданные объёмы создаются, а --clear с тем же seed воспроизводим."""
+        texts = self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(len(texts), 60)
+        self.assertEqual(Comment.objects.count(), 80)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertEqual(self.seed('--clear'), texts)
+
+    def test_benchmark_urls(self):
+        self.seed()
+        out = StringIO()
+        call_command('benchmark_urls', '--iterations', '2', '--warmup', '0',
+                     stdout=out)
+        path = os.path.join(TEMP_BENCHMARKS_DIR,
+                            os.listdir(TEMP_BENCHMARKS_DIR)[0])
+        results = load_results(path)['urls']
+        self.assertIn('index', results)
+        self.assertNotIn('profile_follow', results)
+        self.assertEqual(results['post_detail']['status'], 200)
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'rps'):
+            with self.subTest(key=key):
+                self.assertIn(key, results['index'])
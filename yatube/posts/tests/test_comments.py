@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(author=cls.user, text='Вирусный пост')
+        for number in range(7):
+            Comment.objects.create(post=cls.post, author=cls.user,
+                                   text=f'Комментарий {number}')
+        # одинаковое время не должно ломать курсор
+        Comment.objects.update(created=cls.post.pub_date)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_counter_follows_comments(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 7)
+        Comment.objects.filter(text='Комментарий 0').get().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 6)
+
+    def test_backfill_recounts(self):
+        Post.objects.update(comment_count=0)
+        call_command('backfill', 'post_comment_count', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 7)
+
+    def test_pages_cover_all_comments_once(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        seen = [comment.pk for comment in response.context['comments']]
+        cursor = response.context['next_cursor']
+        fragment_url = reverse('posts:post_comments', args=[self.post.pk])
+        while cursor:
+            response = self.client.get(fragment_url, {'cursor': cursor})
+            self.assertNotContains(response, '<html')
+            seen += [comment.pk for comment in response.context['comments']]
+            cursor = response.context['next_cursor']
+        self.assertEqual(
+            seen, list(Comment.objects.order_by('-created', '-pk')
+                       .values_list('pk', flat=True))
+        )
+
+    def test_bad_cursor(self):
+        for cursor in ('мусор', '99999999999999999999999-1', '9' * 400 + '-1',
+                       '1-' + '9' * 30):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:post_comments', args=[self.post.pk]),
+                    {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(VIEWS_FLUSH_INTERVAL=3600)
+    def test_detail_does_not_count_comments(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        cursor = self.client.get(url).context['next_cursor']
+        with self.assertNumQueries(3):
+            # пост с автором, страница комментариев с авторами и число
+            # постов автора; COUNT(*) по комментариям нет
+            response = self.client.get(url, {'cursor': cursor})
+        self.assertContains(response, 'Комментариев: 7')
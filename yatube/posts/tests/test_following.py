@@ -0,0 +1,84 @@
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from ..following import cache_key, followed_authors, followed_ids, store
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class FollowingCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(4)]
+        for author in cls.authors[2:]:
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.post = Post.objects.create(author=cls.authors[0], text='Пост')
+        for author in cls.authors:
+            Comment.objects.create(post=cls.post, author=author,
+                                   text=f'От {author.username}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_loaded_once_as_sorted_array(self):
+        with self.assertNumQueries(1):
+            ids = followed_ids(self.reader.pk)
+            followed_ids(self.reader.pk)
+        self.assertEqual(list(ids),
+                         sorted(author.pk for author in self.authors[2:]))
+        with self.assertNumQueries(0):
+            following = followed_authors(self.reader)
+            self.assertEqual([author.pk in following
+                              for author in self.authors],
+                             [False, False, True, True])
+
+    def test_follow_written_when_cache_disagrees(self):
+        # кеш другого процесса мог устареть: он не решает, писать ли
+        store(self.reader.pk, array('q', [self.authors[0].pk]))
+        self.client.get(reverse('posts:profile_follow',
+                                args=[self.authors[0].username]))
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.authors[0]
+        ).exists())
+
+    def test_comments_marked_without_query_per_author(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.get(url)
+        self.assertIsNotNone(cache.get(cache_key(self.reader.pk)))
+        response = self.client.get(url)
+        self.assertContains(response, 'вы подписаны', count=2)
+
+
+class FollowingInvalidationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [User.objects.create_user(username=f'author{number}')
+                        for number in range(2)]
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_and_unfollow_reset_cache_after_commit(self):
+        followed_ids(self.reader.pk)
+        self.client.get(reverse('posts:profile_follow',
+                                args=[self.authors[0].username]))
+        self.assertIsNone(cache.get(cache_key(self.reader.pk)))
+        self.assertEqual(list(followed_ids(self.reader.pk)),
+                         sorted(author.pk for author in self.authors))
+        self.client.get(reverse('posts:profile_unfollow',
+                                args=[self.authors[1].username]))
+        self.assertEqual(list(followed_ids(self.reader.pk)),
+                         [self.authors[0].pk])
+        response = self.client.get(reverse('posts:profile',
+                                           args=[self.authors[0].username]))
+        self.assertTrue(response.context['following'])
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import ArchivedPost, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='scroller')
+        cls.group = Group.objects.create(title='Лента', slug='feed',
+                                         description='')
+        for number in range(23):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост номер {number}')
+        cls.oldest = Post.objects.order_by('pub_date').first().pub_date
+        ArchivedPost.objects.create(
+            id=1000, author=cls.author, text='Пост из архива',
+            pub_date=cls.oldest - timedelta(days=400)
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def scroll(self, url):
+        """Все записи ленты, начиная со второй страницы, как их
+        подгружает скрипт."""
+        response = self.client.get(url, {'page': 2})
+        texts = [post.text for post in response.context['posts']]
+        while response.context['next_cursor']:
+            self.assertNotContains(response, '<html')
+            response = self.client.get(
+                url, {'cursor': response.context['next_cursor']}
+            )
+            texts += [post.text for post in response.context['posts']]
+        return texts
+
+    def expected(self, extra=()):
+        texts = list(Post.objects.order_by('-pub_date', '-pk')
+                     .values_list('text', flat=True))
+        return texts[10:] + list(extra)
+
+    def test_index_group_and_follow(self):
+        for name, args in (('posts:index_fragment', []),
+                           ('posts:group_fragment', [self.group.slug]),
+                           ('posts:follow_fragment', [])):
+            with self.subTest(name=name):
+                self.assertEqual(self.scroll(reverse(name, args=args)),
+                                 self.expected())
+
+    def test_profile_reaches_archive(self):
+        url = reverse('posts:profile_fragment', args=['scroller'])
+        self.assertEqual(self.scroll(url), self.expected(['Пост из архива']))
+
+    def test_fragment_is_lighter_than_page(self):
+        page = self.client.get(reverse('posts:index'), {'page': 2})
+        fragment = self.client.get(reverse('posts:index_fragment'),
+                                   {'page': 2})
+        self.assertContains(page, 'data-fragment')
+        self.assertLess(len(fragment.content), len(page.content))
+
+    def test_bad_cursor_and_guest(self):
+        response = self.client.get(reverse('posts:index_fragment'),
+                                   {'cursor': '1-2-3'})
+        self.assertEqual(response.status_code, 404)
+        self.client.logout()
+        response = self.client.get(reverse('posts:follow_fragment'))
+        self.assertEqual(response.status_code, 302)
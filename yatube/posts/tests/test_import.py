@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+
+from ..following import followed_ids
+from ..importing import Importer
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+RECORDS = [
+    {'type': 'post', 'id': 10, 'author': 'leo', 'group': 'classics',
+     'text': 'Первый', 'pub_date': '2015-03-01T12:00:00+00:00'},
+    {'type': 'user', 'username': 'leo', 'first_name': 'Лев'},
+    {'type': 'user', 'username': 'anna'},
+    {'type': 'group', 'slug': 'classics', 'title': 'Классика'},
+    {'type': 'comment', 'id': 20, 'post': 10, 'author': 'anna',
+     'text': 'Отлично', 'created': '2015-03-02T08:00:00'},
+    {'type': 'comment', 'post': 999, 'author': 'anna', 'text': 'Куда?'},
+    {'type': 'follow', 'user': 'anna', 'author': 'leo'},
+    {'type': 'post', 'author': 'nobody', 'text': 'Сирота'},
+    {'type': 'post', 'author': 'leo', 'text': ''},
+]
+
+
+class ImportDataTests(TestCase):
+    def write(self, content, suffix):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as output:
+            output.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_data(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_data', path, '--batch-size', '2', *args,
+                     stdout=out, stderr=err)
+        self.report = out.getvalue()
+        return err.getvalue()
+
+    def test_ndjson_import(self):
+        lines = [json.dumps(record, ensure_ascii=False)
+                 for record in RECORDS]
+        path = self.write('\n'.join(lines + ['{битая строка']), '.ndjson')
+        errors = self.import_data(path)
+        for message in ('строка 6', 'строка 8', 'строка 9', 'строка 10'):
+            with self.subTest(message=message):
+                self.assertIn(message, errors)
+
+        post = Post.objects.get(pk=10)
+        self.assertEqual(post.author.first_name, 'Лев')
+        self.assertEqual(post.group, Group.objects.get(slug='classics'))
+        self.assertEqual(post.pub_date,
+                         datetime(2015, 3, 1, 12, tzinfo=timezone.utc))
+        comment = Comment.objects.get()
+        self.assertEqual((comment.pk, comment.post_id), (20, 10))
+        self.assertEqual(comment.created.year, 2015)
+        self.assertTrue(Follow.objects.filter(user__username='anna',
+                                              author__username='leo'))
+        anna = User.objects.get(username='anna')
+        self.assertFalse(anna.has_usable_password())
+
+        self.import_data(path)
+        # повторный прогон ничего не вставляет и так и пишет
+        for record_type in ('user', 'group', 'post', 'comment', 'follow'):
+            self.assertIn(f'{record_type}: 0', self.report)
+        self.assertEqual(
+            (User.objects.count(), Post.objects.count(),
+             Comment.objects.count(), Follow.objects.count()),
+            (2, 1, 1, 1)
+        )
+
+    def test_csv_posts(self):
+        User.objects.create_user(username='leo')
+        path = self.write(
+            'id,author,text,pub_date\n'
+            '1,leo,"Текст, с запятой",2014-01-01T00:00:00Z\n'
+            ',leo,Без id,\n'
+            'x,leo,Плохой id,\n', '.csv'
+        )
+        errors = self.import_data(path, '--format', 'csv', '--type', 'post')
+        self.assertIn('строка 4', errors)
+        self.assertEqual(Post.objects.get(pk=1).text, 'Текст, с запятой')
+        self.assertEqual(Post.objects.count(), 2)
+
+
+class ImportFollowsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.anna = User.objects.create_user(username='anna')
+        self.leo = User.objects.create_user(username='leo')
+
+    def test_imported_follows_reset_cache(self):
+        self.assertEqual(list(followed_ids(self.anna.pk)), [])
+        rows = enumerate([{'type': 'follow', 'user': 'anna',
+                           'author': 'leo'}], 1)
+        report = Importer().run(rows)
+        self.assertEqual(report['written']['follow'], 1)
+        self.assertEqual(list(followed_ids(self.anna.pk)), [self.leo.pk])
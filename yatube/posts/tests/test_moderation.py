@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import claim, execute
+
+from ..models import Comment, Follow, Group, ModerationJob, Post
+from ..popularity import popular_ids
+from ..utils import feed_cache_version
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MODERATION_BACKGROUND=False,
+                   MODERATION_BATCH_SIZE=2)
+class ModerationActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', '', 'password')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Карантин', slug='quarantine',
+                                         description='')
+        cls.spam = [Post.objects.create(author=cls.spammer,
+                                        text=f'Спам {number}')
+                    for number in range(5)]
+        cls.post = Post.objects.create(author=cls.reader, text='Честный')
+        Comment.objects.create(post=cls.post, author=cls.spammer,
+                               text='Купите')
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Нет')
+        Comment.objects.create(post=cls.spam[0], author=cls.reader,
+                               text='Это спам')
+        Follow.objects.create(user=cls.spammer, author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.spammer)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def tearDown(self):
+        cache.clear()
+
+    def act(self, model, action, objects):
+        return self.client.post(reverse(f'admin:posts_{model}_changelist'), {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [obj.pk for obj in objects],
+        })
+
+    def test_purge_authors(self):
+        image = self.spam[1]
+        image.image = SimpleUploadedFile('spam.gif', SMALL_GIF,
+                                         content_type='image/gif')
+        image.save()
+        image_path = os.path.join(TEMP_MEDIA_ROOT, image.image.name)
+        self.assertTrue(os.path.exists(image_path))
+        version = feed_cache_version()
+
+        self.act('post', 'purge_authors', self.spam[:1])
+
+        job = ModerationJob.objects.get()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        # 5 постов, комментарий на чужом посту и 2 подписки
+        self.assertEqual((job.done, job.total), (8, 8))
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.filter(text='Купите').exists())
+        self.assertFalse(Comment.objects.filter(text='Это спам').exists())
+        self.assertFalse(Follow.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        # больше ни у кого этой картинки нет, файл удаляется
+        self.assertFalse(os.path.exists(image_path))
+        self.assertGreater(feed_cache_version(), version)
+
+    def test_shared_image_kept_while_referenced(self):
+        post = self.spam[0]
+        post.image = SimpleUploadedFile('shared.gif', SMALL_GIF,
+                                        content_type='image/gif')
+        post.save()
+        Post.objects.filter(pk=self.post.pk).update(image=post.image.name)
+        image_path = os.path.join(TEMP_MEDIA_ROOT, post.image.name)
+
+        self.act('post', 'delete_posts', [post])
+        self.assertTrue(os.path.exists(image_path))
+        self.act('post', 'delete_posts', [self.post])
+        self.assertFalse(os.path.exists(image_path))
+
+    def test_move_to_group(self):
+        """Действие сначала спрашивает группу, список групп не грузится."""
+        response = self.act('post', 'move_to_group', self.spam[:3])
+        self.assertTemplateUsed(response, 'admin/posts/move_to_group.html')
+        self.assertEqual(response.context['count'], 3)
+        self.assertEqual(self.group.posts.count(), 0)
+        response = self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'move_to_group',
+            'apply': '1',
+            'group': self.group.pk,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in self.spam[:3]],
+        })
+        self.assertRedirects(response,
+                             reverse('admin:posts_post_changelist'))
+        self.assertEqual(self.group.posts.count(), 3)
+
+    def test_deletion_invalidates_popular_list(self):
+        Post.objects.filter(author=self.spammer).update(popularity=1.0)
+        self.assertEqual(len(popular_ids()), 5)
+        self.act('post', 'delete_posts', self.spam[:2])
+        self.assertEqual({pk for pk, _ in popular_ids()},
+                         {post.pk for post in self.spam[2:]})
+
+    def test_delete_author_comments(self):
+        self.act('comment', 'delete_author_comments',
+                 Comment.objects.filter(author=self.reader)[:1])
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Купите']
+        )
+        self.spam[0].refresh_from_db()
+        self.assertEqual(self.spam[0].comment_count, 0)
+
+    def test_default_delete_is_replaced(self):
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        actions = dict(response.context['action_form'].fields['action']
+                       .choices)
+        self.assertNotIn('delete_selected', actions)
+        self.assertIn('delete_posts', actions)
+        self.assertIn('move_to_group', actions)
+
+    @override_settings(MODERATION_BACKGROUND=True)
+    def test_background_job_goes_to_queue(self):
+        self.act('post', 'delete_posts', self.spam[:2])
+        job = ModerationJob.objects.get()
+        self.assertEqual(job.status, ModerationJob.QUEUED)
+        task = Task.objects.get(key=f'moderation:{job.pk}')
+        self.assertTrue(execute(claim('test', 1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.done), (ModerationJob.DONE, 2))
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 3)
+        self.assertEqual(task.name, 'posts.tasks.run_moderation')
@@ -0,0 +1,120 @@
+import math
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import ExtraDatabasesMixin
+
+from .. import popularity
+from ..models import Post
+
+User = get_user_model()
+HALF_LIFE = settings.POPULARITY_HALF_LIFE
+
+
+@override_settings(VIEWS_FLUSH_INTERVAL=3600, VIEWS_FLUSH_SIZE=1000)
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = [Post.objects.create(author=cls.author, text=f'Пост {n}')
+                     for n in range(3)]
+
+    def setUp(self):
+        # просмотры из других тестов попали бы в посты с теми же id
+        popularity._buffer.clear()
+        self.client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def view(self, post, times=1):
+        for _ in range(times):
+            self.client.get(reverse('posts:post_detail', args=[post.pk]))
+
+    def test_views_are_buffered_then_flushed(self):
+        with self.assertNumQueries(0):
+            popularity.record_view(self.posts[0])
+        self.view(self.posts[0], 2)
+        self.view(self.posts[1])
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].view_count, 0)
+        # SELECT и UPDATE на все посты пачки плюс savepoint и release
+        with self.assertNumQueries(4):
+            self.assertEqual(popularity.flush(), 4)
+        counts = dict(Post.objects.values_list('pk', 'view_count'))
+        self.assertEqual(counts, {self.posts[0].pk: 3, self.posts[1].pk: 1,
+                                  self.posts[2].pk: 0})
+
+    @override_settings(VIEWS_FLUSH_SIZE=2)
+    def test_buffer_size_triggers_flush(self):
+        self.view(self.posts[0])
+        self.view(self.posts[1])
+        self.assertEqual(
+            Post.objects.filter(view_count=1).count(), 2
+        )
+
+    def test_popular_feed_order(self):
+        self.view(self.posts[2], 3)
+        self.view(self.posts[0], 1)
+        popularity.flush()
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.posts[2], self.posts[0]])
+        # список кешируется: новые просмотры видны после истечения кеша
+        self.view(self.posts[0], 5)
+        popularity.flush()
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(response.context['page_obj'][0], self.posts[2])
+        cache.clear()
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(response.context['page_obj'][0], self.posts[0])
+
+
+REPLICA = 'test_replica1'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], VIEWS_FLUSH_INTERVAL=3600,
+                   VIEWS_FLUSH_SIZE=1000)
+class ReplicaViewCounterTests(ExtraDatabasesMixin, TestCase):
+    extra_databases = [REPLICA]
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        # реплика — копия основной базы
+        cls.author.save(using=REPLICA)
+        cls.post.save(using=REPLICA)
+
+    def setUp(self):
+        popularity._buffer.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_views_read_from_replica_are_written_to_primary(self):
+        response = Client().get(reverse('posts:post_detail',
+                                        args=[self.post.pk]))
+        self.assertEqual(response.context['post']._state.db, REPLICA)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(popularity.flush(), 1)
+        self.assertEqual(Post.objects.using('default').get().view_count, 1)
+        self.assertEqual(Post.objects.using(REPLICA).get().view_count, 0)
+
+
+class DecayTests(TestCase):
+    def test_old_views_weigh_less(self):
+        # 4 просмотра две полужизни назад весят как один сейчас
+        self.assertAlmostEqual(popularity.bump(None, 4, 0),
+                               popularity.bump(None, 1, 2 * HALF_LIFE))
+
+    def test_incremental_update(self):
+        rank = popularity.bump(None, 1, 0)
+        rank = popularity.bump(rank, 1, HALF_LIFE)
+        moment = math.log(2)
+        self.assertAlmostEqual(rank, math.log(1.5) + moment)
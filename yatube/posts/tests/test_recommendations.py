@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Recommendation
+from ..recommendations import FollowGraph, rebuild, refresh_user
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in ('ann', 'ben', 'cat', 'dan', 'eve', 'fay')}
+        edges = [
+            ('ann', 'ben'), ('ann', 'cat'),
+            ('ben', 'dan'), ('ben', 'eve'), ('ben', 'cat'),
+            ('cat', 'dan'), ('cat', 'ann'),
+            ('dan', 'fay'),
+        ]
+        for user, author in edges:
+            Follow.objects.create(user=cls.users[user],
+                                  author=cls.users[author])
+
+    def recommended(self, name):
+        return list(Recommendation.objects.filter(
+            user=self.users[name]
+        ).values_list('author__username', 'score'))
+
+    def test_graph_is_csr(self):
+        graph = FollowGraph.load()
+        self.assertEqual(len(graph.indptr), len(graph.ids) + 1)
+        self.assertEqual(len(graph.indices), Follow.objects.count())
+        ben = graph.ids.index(self.users['ben'].pk)
+        self.assertEqual(
+            sorted(graph.ids[author] for author in graph.following(ben)),
+            sorted(user.pk for user in [self.users['cat'],
+                                        self.users['dan'],
+                                        self.users['eve']])
+        )
+
+    def test_rebuild_ranks_friends_of_friends(self):
+        self.assertEqual(rebuild(), 3)
+        # ben и cat оба подписаны на dan, eve — только ben,
+        # а на ben и cat ann уже подписана
+        self.assertEqual(self.recommended('ann'), [('dan', 2), ('eve', 1)])
+        self.assertEqual(self.recommended('ben'), [('ann', 1), ('fay', 1)])
+        self.assertEqual(self.recommended('dan'), [])
+
+    def test_refresh_user_matches_rebuild(self):
+        rebuild()
+        expected = {name: self.recommended(name) for name in self.users}
+        Recommendation.objects.all().delete()
+        for user in self.users.values():
+            refresh_user(user.pk)
+        self.assertEqual(
+            {name: self.recommended(name) for name in self.users}, expected
+        )
+
+    def test_follow_drops_recommendation(self):
+        rebuild()
+        client = Client()
+        client.force_login(self.users['ann'])
+        client.get(reverse('posts:profile_follow', args=['dan']))
+        self.assertEqual(self.recommended('ann'), [('eve', 1)])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['recommendations']],
+            [self.users['eve']]
+        )
+
+    def test_rebuild_removes_stale_rows(self):
+        rebuild()
+        Follow.objects.filter(user=self.users['dan']).delete()
+        Follow.objects.filter(author=self.users['dan']).delete()
+        Follow.objects.filter(user=self.users['cat']).delete()
+        self.assertEqual(rebuild(), 1)
+        self.assertEqual(self.recommended('ann'), [('eve', 1)])
+        self.assertEqual(self.recommended('ben'), [])
+        self.assertEqual(self.recommended('cat'), [])
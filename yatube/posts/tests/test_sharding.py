@@ -0,0 +1,175 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.testing import ExtraDatabasesMixin
+
+from ..models import AuthorShard, Comment, Post
+from ..routers import ShardRouter
+from ..sharding import (MergedFeed, get_post_or_404, hashed_shard,
+                        posts_by_authors, shard_for_author)
+
+User = get_user_model()
+
+SHARDS = ['shard1', 'shard2', 'shard3']
+# файловые базы, которые заводит ExtraDatabasesMixin
+DB_SHARDS = ['test_shard1', 'test_shard2']
+NOW = datetime(2026, 10, 19)
+
+
+class FakeQuerySet(list):
+    def count(self):
+        return len(self)
+
+
+def make_posts(*hours):
+    return FakeQuerySet(
+        SimpleNamespace(pk=hour, pub_date=NOW - timedelta(hours=hour))
+        for hour in sorted(hours)
+    )
+
+
+class ShardingTests(SimpleTestCase):
+    def test_hashed_shard_is_stable_and_spread(self):
+        """Хеш не зависит от процесса и раскладывает авторов равномерно."""
+        self.assertEqual(hashed_shard(42, SHARDS), hashed_shard(42, SHARDS))
+        spread = Counter(hashed_shard(author_id, SHARDS)
+                         for author_id in range(3000))
+        self.assertEqual(set(spread), set(SHARDS))
+        self.assertGreater(min(spread.values()), 800)
+
+    def test_disabled_sharding_uses_default(self):
+        self.assertEqual(shard_for_author(1), 'default')
+
+    @override_settings(POST_SHARDS=SHARDS)
+    def test_hashed_shard_reads_settings(self):
+        self.assertIn(hashed_shard(7), SHARDS)
+
+    def test_merged_feed_pages(self):
+        """Страницы собираются слиянием шардов по убыванию даты."""
+        feed = MergedFeed([make_posts(1, 4, 5), make_posts(2, 3, 6, 7)])
+        self.assertEqual(feed.count(), 7)
+        self.assertEqual([post.pk for post in feed[0:3]], [1, 2, 3])
+        self.assertEqual([post.pk for post in feed[3:6]], [4, 5, 6])
+        self.assertEqual(feed[6].pk, 7)
+
+
+@override_settings(POST_SHARDS=DB_SHARDS)
+class ShardedDatabaseTests(ExtraDatabasesMixin, TestCase):
+    extra_databases = DB_SHARDS
+    databases = {'default', *DB_SHARDS}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create_user(username='first')
+        cls.second = User.objects.create_user(username='second')
+        AuthorShard.objects.create(author=cls.first, alias=DB_SHARDS[0])
+        AuthorShard.objects.create(author=cls.second, alias=DB_SHARDS[1])
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def save(self, obj):
+        # как во view: без экземпляра-подсказки роутер шард не выберет
+        obj.save()
+        return obj
+
+    def posts_in(self, alias, author):
+        return set(Post.objects.using(alias).filter(
+            author=author
+        ).values_list('pk', flat=True))
+
+    def test_router_writes_to_author_shard(self):
+        """Пост пишется в шард автора, комментарий — к своему посту."""
+        post = self.save(Post(author=self.first, text='Первый'))
+        comment = self.save(Comment(post=post, author=self.second,
+                                    text='Ответ'))
+        self.assertEqual(post._state.db, DB_SHARDS[0])
+        self.assertEqual(comment._state.db, DB_SHARDS[0])
+        self.assertEqual(self.posts_in(DB_SHARDS[1], self.first), set())
+        self.assertEqual(self.posts_in('default', self.first), set())
+        post = Post.objects.using(DB_SHARDS[0]).get(pk=post.pk)
+        self.assertEqual(post.comment_count, 1)
+        router = ShardRouter()
+        self.assertEqual(router.db_for_read(Comment, instance=comment),
+                         DB_SHARDS[0])
+        self.assertEqual(router.db_for_write(Post, instance=self.second),
+                         DB_SHARDS[1])
+        self.assertTrue(router.allow_relation(post, self.second))
+
+    def test_get_post_or_404_searches_all_shards(self):
+        post = self.save(Post(author=self.second, text='Второй'))
+        found = get_post_or_404(post.pk)
+        self.assertEqual((found.pk, found._state.db), (post.pk, DB_SHARDS[1]))
+        with self.assertRaises(Http404):
+            get_post_or_404(post.pk + 1000)
+
+    def test_posts_by_authors_merges_shards(self):
+        posts = [self.save(Post(author=author, text=str(number)))
+                 for number, author in enumerate(
+                     [self.first, self.second, self.first])]
+        for hours, post in enumerate(posts):
+            Post.objects.using(post._state.db).filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(hours=hours)
+            )
+        merged = posts_by_authors([self.first.pk, self.second.pk])
+        self.assertEqual(merged.count(), 3)
+        self.assertEqual([post.pk for post in merged[0:3]],
+                         [post.pk for post in posts])
+        only_second = posts_by_authors([self.second.pk])
+        self.assertEqual([post.pk for post in only_second[0:3]],
+                         [posts[1].pk])
+
+    def test_reshard_moves_author(self):
+        """Копия, переключение, пауза, докопирование и удаление."""
+        post = self.save(Post(author=self.first, text='Переезд'))
+        early = self.save(Comment(post=post, author=self.second,
+                                  text='Раз'))
+        self.save(Comment(post=post, author=self.first, text='Два'))
+
+        def write_during_grace(seconds):
+            # процесс со старой привязкой успел поправить старый шард
+            Comment.objects.using(DB_SHARDS[0]).create(
+                post_id=post.pk, author=self.second, text='Поздний'
+            )
+            Post.objects.using(DB_SHARDS[0]).filter(pk=post.pk).update(
+                text='Переезд, правка'
+            )
+            Comment.objects.using(DB_SHARDS[0]).get(pk=early.pk).delete()
+            # а процесс с новой привязкой — уже новый шард
+            Comment.objects.using(DB_SHARDS[1]).create(
+                post_id=post.pk, author=self.second, text='Новый'
+            )
+
+        with patch('posts.management.commands.reshard.time.sleep',
+                   write_during_grace):
+            call_command('reshard', '--authors', str(self.first.pk),
+                         '--to', DB_SHARDS[1], '--grace', '0',
+                         stdout=StringIO())
+        self.assertEqual(self.posts_in(DB_SHARDS[0], self.first), set())
+        self.assertEqual(self.posts_in(DB_SHARDS[1], self.first), {post.pk})
+        self.assertEqual(
+            set(Comment.objects.using(DB_SHARDS[1]).filter(
+                post_id=post.pk
+            ).values_list('text', flat=True)),
+            {'Два', 'Поздний', 'Новый'}
+        )
+        moved = Post.objects.using(DB_SHARDS[1]).get(pk=post.pk)
+        self.assertEqual((moved.text, moved.comment_count),
+                         ('Переезд, правка', 3))
+        self.assertFalse(Comment.objects.using(DB_SHARDS[0]).exists())
+        self.assertEqual(AuthorShard.objects.get(author=self.first).alias,
+                         DB_SHARDS[1])
+        self.assertEqual(get_post_or_404(post.pk)._state.db, DB_SHARDS[1])
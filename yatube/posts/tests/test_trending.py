@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+
+from ..models import (AuthorActivity, Comment, Follow, Group, GroupActivity,
+                      Post)
+from ..tasks import aggregate_trending
+from ..trending import aggregate
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice')
+        cls.bob = User.objects.create_user(username='bob')
+        cls.busy = Group.objects.create(title='Шумная', slug='busy',
+                                        description='Много постов')
+        cls.quiet = Group.objects.create(title='Тихая', slug='quiet',
+                                         description='Пусто')
+        cls.old = Group.objects.create(title='Старая', slug='old',
+                                       description='Было давно')
+        first = Post.objects.create(author=cls.alice, group=cls.busy,
+                                    text='Раз')
+        Post.objects.create(author=cls.alice, group=cls.busy, text='Два')
+        Post.objects.create(author=cls.bob, group=cls.busy, text='Три')
+        stale = Post.objects.create(author=cls.bob, group=cls.old,
+                                    text='Давно')
+        Post.objects.filter(pk=stale.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        Comment.objects.create(post=first, author=cls.bob, text='Ага')
+        Follow.objects.create(user=cls.bob, author=cls.alice)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_aggregate_counts_window(self):
+        self.assertEqual(aggregate(), (1, 2))
+        busy = GroupActivity.objects.get(group=self.busy)
+        self.assertEqual((busy.posts, busy.comments, busy.authors),
+                         (3, 1, 2))
+        self.assertFalse(GroupActivity.objects.filter(
+            group=self.old
+        ).exists())
+        alice = AuthorActivity.objects.get(author=self.alice)
+        self.assertEqual((alice.posts, alice.comments, alice.followers),
+                         (2, 1, 1))
+        self.assertGreater(alice.score,
+                           AuthorActivity.objects.get(author=self.bob).score)
+
+    def test_aggregate_replaces_rows(self):
+        aggregate()
+        Post.objects.filter(group=self.busy).delete()
+        aggregate()
+        self.assertFalse(GroupActivity.objects.exists())
+        self.assertEqual(list(AuthorActivity.objects.values_list(
+            'author_id', 'followers'
+        )), [(self.alice.pk, 1)])
+
+    def test_group_directory_reads_summary(self):
+        call_command('aggregate_trending', stdout=StringIO())
+        # число групп, группы с активностью одним JOIN, активные авторы
+        with self.assertNumQueries(3):
+            response = Client().get(reverse('posts:groups'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups[0], self.busy)
+        self.assertEqual({group.slug for group in groups[1:]},
+                         {'old', 'quiet'})
+        self.assertContains(response, 'постов 3')
+        self.assertContains(response, reverse('posts:profile',
+                                              args=['alice']))
+
+    def test_index_shows_trending(self):
+        aggregate()
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'Сейчас активны')
+        self.assertContains(response, reverse('posts:group_list',
+                                              args=['busy']))
+
+    def test_task_schedules_next_run(self):
+        aggregate_trending()
+        aggregate_trending()
+        task = Task.objects.get(name=aggregate_trending.task_name)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertTrue(GroupActivity.objects.filter(
+            group=self.busy
+        ).exists())
@@ -0,0 +1,103 @@
+"""Активность групп и авторов за скользящее окно.
+
+Считать её по всем постам на каждый запрос слишком дорого, поэтому
+задача aggregate_trending раз в TRENDING_INTERVAL секунд собирает посты,
+комментарии и новые подписки за последние TRENDING_WINDOW секунд
+и целиком заменяет строки GroupActivity и AuthorActivity. Каталог групп
+и блок «Сейчас активны» читают только эти таблицы.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import AuthorActivity, Comment, Follow, GroupActivity, Post
+
+
+def score(counts):
+    weights = settings.TRENDING_WEIGHTS
+    return float(sum(weights.get(name, 0) * value
+                     for name, value in counts.items()))
+
+
+def collect(since):
+    """Счётчики за окно: {group_id: Counter}, {author_id: Counter}."""
+    groups = defaultdict(Counter)
+    authors = defaultdict(Counter)
+    for alias in settings.POST_SHARDS or ['default']:
+        # посты автора лежат в одном шарде, так что пара (группа, автор)
+        # встречается один раз и число строк — число авторов группы
+        posts = Post.objects.using(alias).filter(
+            pub_date__gte=since
+        ).order_by().values_list('group_id', 'author_id').annotate(
+            total=Count('pk')
+        )
+        for group_id, author_id, total in posts:
+            authors[author_id]['posts'] += total
+            if group_id is not None:
+                groups[group_id]['posts'] += total
+                groups[group_id]['authors'] += 1
+        comments = Comment.objects.using(alias).filter(
+            created__gte=since
+        ).order_by().values_list(
+            'post__group_id', 'post__author_id'
+        ).annotate(total=Count('pk'))
+        for group_id, author_id, total in comments:
+            authors[author_id]['comments'] += total
+            if group_id is not None:
+                groups[group_id]['comments'] += total
+    follows = Follow.objects.filter(
+        created__gte=since
+    ).order_by().values_list('author_id').annotate(total=Count('pk'))
+    for author_id, total in follows:
+        authors[author_id]['followers'] += total
+    return groups, authors
+
+
+def aggregate(now=None):
+    """Пересчитывает таблицы активности, возвращает число групп и авторов."""
+    now = now or timezone.now()
+    groups, authors = collect(
+        now - timedelta(seconds=settings.TRENDING_WINDOW)
+    )
+    with transaction.atomic():
+        GroupActivity.objects.all().delete()
+        GroupActivity.objects.bulk_create([
+            GroupActivity(group_id=group_id, score=score(counts),
+                          computed=now, **counts)
+            for group_id, counts in groups.items()
+        ], batch_size=settings.TRENDING_BATCH_SIZE)
+        AuthorActivity.objects.all().delete()
+        AuthorActivity.objects.bulk_create([
+            AuthorActivity(author_id=author_id, score=score(counts),
+                           computed=now, **counts)
+            for author_id, counts in authors.items()
+        ], batch_size=settings.TRENDING_BATCH_SIZE)
+    return len(groups), len(authors)
+
+
+def schedule():
+    """Ставит следующую агрегацию на ближайшую границу интервала."""
+    from .tasks import aggregate_trending
+    interval = settings.TRENDING_INTERVAL
+    slot = (int(time.time()) // interval + 1) * interval
+    return aggregate_trending.enqueue(
+        run_at=datetime.fromtimestamp(slot, tz=timezone.utc),
+        key=f'trending:{slot}',
+    )
+
+
+def trending_groups(limit=None):
+    return GroupActivity.objects.select_related('group')[
+        :limit or settings.TRENDING_LIMIT
+    ]
+
+
+def trending_authors(limit=None):
+    return AuthorActivity.objects.select_related('author')[
+        :limit or settings.TRENDING_LIMIT
+    ]
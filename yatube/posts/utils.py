@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import router
+
+
+@contextmanager
+def preserve_auto_now_add(*fields):
+    """Позволяет bulk_create записать заданные даты вместо текущего времени.
+
+    auto_now_add подставляет now() в pre_save даже при массовой вставке,
+    поэтому на время блока флаг у полей снимается.
+    """
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+def raw_delete(queryset):
+    """Удаляет строки одним DELETE: без загрузки объектов, каскада
+    и сигналов.
+
+    Штатный delete() грузит строки в память и на каждую шлёт сигналы,
+    например uncount_comment. Вызывающий сам удаляет зависимые строки
+    и обновляет счётчики и кеши.
+    """
+    # без явного using() queryset.db для чтения может оказаться репликой
+    alias = queryset._db or router.db_for_write(queryset.model)
+    return queryset._raw_delete(alias)
+
+
+FEED_VERSION_KEY = 'feed_cache_version'
+
+
+def feed_cache_version():
+    return cache.get_or_set(FEED_VERSION_KEY, 1, None)
+
+
+def invalidate_feed_cache():
+    """Меняет версию в ключах {% cache %} лент, блока «Сейчас активны»
+    и списка популярных постов; старые записи больше не читаются
+    и доживают до истечения таймаута."""
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 2, None)
@@ -1,11 +1,23 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db.models import F
+from django.http import (Http404, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, render, redirect
 
 from yatube.settings import POSTS_PER_PAGE
+from .archive import author_posts, get_post_or_archived
+from .cursors import encode_cursor, keyset_page
+from .exporting import csv_lines, export_rows, fields_for, ndjson_lines
+from .following import followed_authors
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Follow
+from .models import ArchivedPost, Group, Post, Follow
+from .popularity import popular_ids, popular_posts, record_view
+from .recommendations import recommended_authors
+from .sharding import feed, get_post_or_404, posts_by_authors
+from .trending import trending_authors, trending_groups
 
 User = get_user_model()
 
@@ -16,15 +28,65 @@ def create_pag(request, obj):
     return paginator.get_page(page_number)
 
 
+def feed_posts():
+    return Post.objects.select_related('author', 'group')
+
+
+def render_fragment(request, post_list, auth=True):
+    """Только записи ленты: первая порция по номеру страницы, дальше —
+    по курсору последней показанной записи."""
+    cursor = request.GET.get('cursor')
+    if cursor is None:
+        page_obj = create_pag(request, post_list)
+        posts = list(page_obj)
+        next_cursor = None
+        if page_obj.has_next() and posts:
+            next_cursor = encode_cursor(posts[-1], 'pub_date')
+    else:
+        try:
+            posts, next_cursor = keyset_page(post_list, cursor,
+                                             POSTS_PER_PAGE, 'pub_date')
+        except ValueError:
+            raise Http404
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'auth': auth,
+    }
+    return render(request, 'posts/includes/feed_fragment.html', context)
+
+
 def index(request):
-    post_list = Post.objects.all()
+    post_list = feed(feed_posts())
     page_obj = create_pag(request, post_list)
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    context = {
+        'page_obj': page_obj,
+        'trending_groups': trending_groups(),
+        'trending_authors': trending_authors(),
+    }
+    return render(request, 'posts/index.html', context)
+
+
+def popular(request):
+    page_obj = create_pag(request, popular_ids())
+    page_obj.object_list = popular_posts(page_obj.object_list)
+    return render(request, 'posts/popular.html', {'page_obj': page_obj})
+
+
+def group_index(request):
+    groups = Group.objects.select_related('activity').order_by(
+        F('activity__score').desc(nulls_last=True), 'title'
+    )
+    context = {
+        'page_obj': create_pag(request, groups),
+        'trending_authors': trending_authors(),
+    }
+    return render(request, 'posts/groups.html', context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = feed(feed_posts().filter(group=group))
     page_obj = create_pag(request, post_list)
     context = {
         'group': group,
@@ -35,32 +97,59 @@ def group_posts(request, slug):
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    post_list = author_posts(author)
     page_obj = create_pag(request, post_list)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author
-    ).exists()
+    following = author.pk in followed_authors(request.user)
     context = {
         'page_obj': page_obj,
         'author': author,
         'following': following
     }
+    if request.user.is_authenticated:
+        context['recommendations'] = recommended_authors(request.user,
+                                                         exclude=author)
     return render(request, 'posts/profile.html', context)
 
 
+def comments_page(request, post):
+    try:
+        return keyset_page(post.comments.select_related('author'),
+                           request.GET.get('cursor'),
+                           settings.COMMENTS_PER_PAGE,
+                           'created')
+    except ValueError:
+        raise Http404
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post.objects.select_related('author'),
-                             pk=post_id)
-    comments = post.comments.all()
-    form = CommentForm()
+    post = get_post_or_archived(post_id,
+                                Post.objects.select_related('author'))
+    archived = isinstance(post, ArchivedPost)
+    if not archived:
+        record_view(post)
+    comments, next_cursor = comments_page(request, post)
     context = {
         'post': post,
         'comments': comments,
-        'form': form
+        'next_cursor': next_cursor,
+        'archived': archived,
     }
+    if not archived:
+        context['form'] = CommentForm()
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_post_or_archived(post_id)
+    comments, next_cursor = comments_page(request, post)
+    context = {
+        'post': post,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/includes/comment_items.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -74,7 +163,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(request.POST or None,
@@ -93,7 +182,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -105,14 +194,38 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = posts_by_authors(
+        request.user.follower.values_list('author_id', flat=True)
+    )
     page_obj = create_pag(request, post_list)
     context = {
         'page_obj': page_obj,
+        'recommendations': recommended_authors(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
+def index_fragment(request):
+    return render_fragment(request, feed(feed_posts()))
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return render_fragment(request, feed(feed_posts().filter(group=group)))
+
+
+def profile_fragment(request, username):
+    author = get_object_or_404(User, username=username)
+    return render_fragment(request, author_posts(author), auth=False)
+
+
+@login_required
+def follow_fragment(request):
+    return render_fragment(request, posts_by_authors(
+        request.user.follower.values_list('author_id', flat=True)
+    ))
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -128,3 +241,26 @@ def profile_unfollow(request, username):
     follow = get_object_or_404(Follow, user=request.user, author=following)
     follow.delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def export(request):
+    kind = request.GET.get('type', 'posts')
+    export_format = request.GET.get('format', 'ndjson')
+    images = request.GET.get('images') == '1'
+    if kind not in ('posts', 'comments'):
+        return HttpResponseBadRequest('type: posts или comments')
+    if export_format not in ('ndjson', 'csv'):
+        return HttpResponseBadRequest('format: ndjson или csv')
+    rows = export_rows(kind, request.user, images)
+    if export_format == 'csv':
+        lines = csv_lines(rows, fields_for(kind, images))
+        content_type = 'text/csv; charset=utf-8'
+    else:
+        lines = ndjson_lines(rows)
+        content_type = 'application/x-ndjson; charset=utf-8'
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{export_format}"'
+    )
+    return response
@@ -0,0 +1,63 @@
+// Подгрузка порций по ссылкам с data-fragment. Ссылка ведёт на полную
+// страницу и без скрипта работает как обычная пагинация, а со скриптом
+// заменяется фрагментом, в котором уже есть ссылка на следующую порцию.
+// Ссылки с data-auto подгружаются сами, когда доходят до экрана.
+(function () {
+  var observer = 'IntersectionObserver' in window
+    ? new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          load(entry.target);
+        }
+      });
+    }, {rootMargin: '400px'})
+    : null;
+
+  function watch(links) {
+    if (observer) {
+      links.forEach(function (link) {
+        observer.observe(link);
+      });
+    }
+  }
+
+  function autoLinks(root) {
+    return Array.prototype.slice.call(
+      root.querySelectorAll('a[data-fragment][data-auto]')
+    );
+  }
+
+  function load(link) {
+    if (link.dataset.loading) {
+      return;
+    }
+    link.dataset.loading = '1';
+    fetch(link.dataset.fragment, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        var template = document.createElement('template');
+        template.innerHTML = html;
+        var links = autoLinks(template.content);
+        link.replaceWith(template.content);
+        watch(links);
+      })
+      .catch(function () {
+        window.location = link.href;
+      });
+  }
+
+  document.addEventListener('click', function (event) {
+    var link = event.target.closest('a[data-fragment]');
+    if (link) {
+      event.preventDefault();
+      load(link);
+    }
+  });
+  watch(autoLinks(document));
+})();
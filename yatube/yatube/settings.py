@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
@@ -51,8 +52,12 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.routers.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.profiling.SamplingMiddleware',
+    'core.memory.RequestMemoryMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -70,6 +75,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.feed_cache',
+                'posts.context_processors.following',
             ],
         },
     },
@@ -81,13 +88,77 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# пул соединений подмешан к штатному бэкенду, см. core.db.pool
+DATABASE_ENGINE = 'core.db.backends.sqlite3'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': DATABASE_ENGINE,
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# реплики для чтения лент; локально YATUBE_SQLITE_REPLICAS=N заводит
+# N файлов-копий, которые обновляет команда sync_replicas
+DATABASE_REPLICAS = []
+for number in range(1, int(os.getenv('YATUBE_SQLITE_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': DATABASE_ENGINE,
+        'NAME': os.path.join(BASE_DIR, f'db-replica{number}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+# шарды постов и комментариев; YATUBE_POST_SHARDS=N заводит N файлов,
+# авторы распределяются по хешу id, перенос — команда reshard
+POST_SHARDS = []
+for number in range(1, int(os.getenv('YATUBE_POST_SHARDS', 0)) + 1):
+    DATABASES[f'shard{number}'] = {
+        'ENGINE': DATABASE_ENGINE,
+        'NAME': os.path.join(BASE_DIR, f'db-shard{number}.sqlite3'),
+    }
+    POST_SHARDS.append(f'shard{number}')
+# сколько секунд процесс помнит привязку автора к шарду
+SHARD_ASSIGNMENT_TTL = 60
+
+# посты старше ARCHIVE_AFTER_DAYS команда archive_posts переносит в архив;
+# YATUBE_ARCHIVE_DB=1 выносит архив в отдельный файл
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_DATABASE = 'default'
+if os.getenv('YATUBE_ARCHIVE_DB'):
+    DATABASES['archive'] = {
+        'ENGINE': DATABASE_ENGINE,
+        'NAME': os.path.join(BASE_DIR, 'db-archive.sqlite3'),
+    }
+    ARCHIVE_DATABASE = 'archive'
+
+# пул на каждый алиас в процессе: MAX_SIZE соединений не старше
+# MAX_LIFETIME секунд, за свободным ждём не дольше TIMEOUT секунд
+DATABASE_POOL = {
+    'MAX_SIZE': int(os.getenv('YATUBE_DB_POOL_SIZE', 10)),
+    'MAX_LIFETIME': 600,
+    'TIMEOUT': 10,
+}
+
+DATABASE_ROUTERS = [
+    'posts.routers.ArchiveRouter',
+    'posts.routers.ShardRouter',
+    'core.db.routers.PrimaryReplicaRouter',
+]
+
+REPLICA_READ_VIEWS = [
+    'posts:index',
+    'posts:popular',
+    'posts:groups',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+]
+# сколько секунд после записи клиент читает с основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -135,12 +206,69 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-# подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма копятся в outbox и уходят из воркера (core.mail)
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
+# чем воркер отправляет письма на самом деле
+OUTBOX_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# писем на одно соединение, писем в секунду (0 — без ограничения)
+# и попыток на письмо
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_RATE_LIMIT = 10
+OUTBOX_MAX_ATTEMPTS = 5
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+# просмотры копятся в памяти процесса и пишутся в базу не чаще раза
+# в VIEWS_FLUSH_INTERVAL секунд или при VIEWS_FLUSH_SIZE постах в буфере
+VIEWS_FLUSH_INTERVAL = 30
+VIEWS_FLUSH_SIZE = 500
+# за сколько секунд вес просмотра в популярности падает вдвое
+POPULARITY_HALF_LIFE = 24 * 60 * 60
+# сколько постов во вкладке «Популярное» и сколько секунд держится список
+POPULAR_LIMIT = 500
+POPULAR_CACHE_SECONDS = 60
+# активность групп и авторов (posts.trending): за какое окно в секундах,
+# как часто пересчитывается, с какими весами и сколько строк в блоке
+TRENDING_WINDOW = 7 * 24 * 60 * 60
+TRENDING_INTERVAL = 15 * 60
+TRENDING_WEIGHTS = {'posts': 3, 'comments': 1, 'authors': 5, 'followers': 2}
+TRENDING_LIMIT = 5
+TRENDING_BATCH_SIZE = 500
+# рекомендации подписок (posts.recommendations): сколько авторов хранится
+# и показывается на пользователя, по скольку пользователей пишется за раз
+# и за сколько секунд копятся изменения подписок до пересчёта
+RECOMMEND_TOP_K = 20
+RECOMMEND_SHOWN = 5
+RECOMMEND_BATCH_SIZE = 1000
+RECOMMEND_REFRESH_DELAY = 60
+# сколько секунд в кеше живёт список id авторов, на которых подписан
+# пользователь (posts.following); LocMemCache свой у каждого процесса,
+# столько же другие процессы могут показывать устаревшие подписки
+FOLLOWING_CACHE_SECONDS = 30
+# сколько записей API отдаёт за раз по ?limit=
+API_MAX_LIMIT = 100
+# сколько операций принимает один пакетный запрос на запись
+API_MAX_BATCH = 100
+# дальше этого числа строк админка не считает записи точно
+ADMIN_COUNT_LIMIT = 10000
+# массовые действия модерации: строк в одной транзакции и запуск через
+# очередь задач; без очереди задача выполняется прямо в запросе админки
+MODERATION_BATCH_SIZE = 500
+MODERATION_BACKGROUND = True
+
+# очередь фоновых задач (core.tasks, команда runworker): как часто воркер
+# смотрит в пустую очередь, сколько задач забирает за раз, на сколько
+# секунд берёт их в аренду, сколько раз и с какой растущей паузой
+# повторяет упавшую
+TASK_POLL_INTERVAL = 1.0
+TASK_BATCH_SIZE = 20
+TASK_LEASE = 60
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_RETRY_MAX_DELAY = 3600
+TASK_KEEP_DAYS = 7
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
@@ -151,3 +279,51 @@ CACHES = {
 }
 
 INTERNAL_IPS = ['127.0.0.1', ]
+
+# профилирование запросов по требованию сотрудника
+PROFILING_PARAM = 'profile'
+PROFILING_HEADER = 'HTTP_X_PROFILE'
+PROFILING_INTERVAL = 0.001
+PROFILES_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILES_KEEP = 200
+
+# постоянный семплер воркеров, запускается из wsgi.py
+SAMPLER_ENABLED = os.getenv('YATUBE_SAMPLER', '') == '1'
+SAMPLER_INTERVAL = 0.01
+SAMPLER_OVERHEAD = 0.01
+SAMPLER_FLUSH_INTERVAL = 60
+SAMPLER_DIR = os.path.join(PROFILES_DIR, 'sampler')
+SAMPLER_KEEP = 1000
+
+# снимки tracemalloc и учёт памяти по запросам
+MEMORY_SNAPSHOTS_DIR = os.path.join(PROFILES_DIR, 'memory')
+MEMORY_TRACE_FRAMES = 1
+# трассировка с самого старта воркера, включается из wsgi.py
+MEMORY_TRACE_ON_START = os.getenv('YATUBE_MEMORY_TRACE', '') == '1'
+MEMORY_PROFILE_REQUESTS = os.getenv('YATUBE_MEMORY_PROFILE', '') == '1'
+
+# результаты нагрузочных прогонов
+BENCHMARKS_DIR = os.path.join(BASE_DIR, 'benchmarks')
+
+# адреса, которые при повторе журнала идут от залогиненной сессии
+LOGIN_REQUIRED_VIEWS = [
+    'posts:post_create',
+    'posts:post_edit',
+    'posts:add_comment',
+    'posts:follow_index',
+    'posts:profile_follow',
+    'posts:profile_unfollow',
+]
+
+# PRAGMA для каждого нового SQLite-соединения: WAL не даёт читателям
+# ждать пишущих, busy_timeout ждёт блокировку вместо "database is locked"
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+# раз в столько секунд процесс выполняет PRAGMA optimize и checkpoint
+SQLITE_MAINTENANCE_INTERVAL = 3600
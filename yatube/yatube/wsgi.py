@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# постоянный семплер стеков, включается YATUBE_SAMPLER=1
+from core.profiling import start_sampler  # noqa: E402
+
+start_sampler()
+
+# tracemalloc для снимков памяти, включается YATUBE_MEMORY_TRACE=1
+from core.memory import start_tracing  # noqa: E402
+
+start_tracing()